@@ -1,11 +1,15 @@
 import os
 import cv2
 import numpy as np
-import tensorflow as tf
 import logging
 
+from ocr.lazy_imports import lazy_import
+
 logger = logging.getLogger(__name__)
 
+# TensorFlow is imported when the model is first loaded
+tf = lazy_import('tensorflow')
+
 # Check if model exists, otherwise return a function that simulates detection
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'models', 'license_plate_model')
 
@@ -158,8 +162,10 @@ class LicensePlateRecognizer:
             logger.error(f"Error in license plate detection pipeline: {str(e)}")
             return None
 
-# Initialize the recognizer
-recognizer = LicensePlateRecognizer()
+# Shared recognizer, built on first use by the model registry
+from ocr.registry import registry
+
+recognizer = registry.proxy('ai_plate_recognizer')
 
 def recognize_license_plate(image_path):
     """
@@ -2,11 +2,15 @@ import os
 import cv2
 import numpy as np
 import logging
-import tensorflow as tf
 from datetime import datetime
 
+from ocr.lazy_imports import lazy_import
+
 logger = logging.getLogger(__name__)
 
+# TensorFlow is imported when the model is first loaded
+tf = lazy_import('tensorflow')
+
 # Path to the violation detection model (simulated)
 MODEL_PATH = os.path.join(os.path.dirname(__file__), 'models', 'violation_detection_model')
 
@@ -180,8 +184,10 @@ class ViolationDetector:
             logger.error(f"Error extracting violation image: {str(e)}")
             return None
 
-# Initialize the detector
-detector = ViolationDetector()
+# Shared detector, built on first use by the model registry
+from ocr.registry import registry
+
+detector = registry.proxy('violation_detector')
 
 def detect_violations_in_frame(frame):
     """
@@ -539,17 +539,9 @@ class LicensePlateDetectionViewSet(viewsets.ModelViewSet):
         }
         
         try:
-            # Save the uploaded image temporarily
-            fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-            os.close(fd)
-            
-            with open(temp_path, 'wb') as f:
-                for chunk in image_file.chunks():
-                    f.write(chunk)
-            
-            # Process the image with OCR
+            # Process the uploaded bytes with OCR, decoded in memory
             ocr = LicensePlateOCR()
-            license_number, confidence = ocr.extract_license_plate(temp_path, request.data.get('internet_available', 'true').lower() == 'true')
+            license_number, confidence = ocr.extract_license_plate(image_file.read(), request.data.get('internet_available', 'true').lower() == 'true')
             
             if not license_number or confidence < 0.5:
                 return Response({
@@ -608,10 +600,6 @@ class LicensePlateDetectionViewSet(viewsets.ModelViewSet):
             logger.error(f"License plate detection error: {str(e)}")
             return Response({'error': str(e)}, 
                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
 
 
 # Authentication views
@@ -961,15 +949,10 @@ def detect_license_plate(request):
     
     image = request.FILES['image']
     
-    # Save the uploaded image temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as tmp:
-        tmp.write(image.read())
-        tmp_path = tmp.name
-    
     try:
-        # Process the image
+        # Process the uploaded bytes directly, without a temporary file
         processor = NepaliLicensePlateProcessor()
-        results, annotated_image_path = processor.process_image(tmp_path)
+        results, annotated_image_path = processor.process_image(image.read())
         
         if not results:
             return Response({'error': 'No license plate detected'}, status=400)
@@ -1005,11 +988,8 @@ def detect_license_plate(request):
     except Exception as e:
         return Response({'error': str(e)}, status=500)
     finally:
-        # Clean up temporary files
-        if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
-        
-        if 'annotated_image_path' in locals() and os.path.exists(annotated_image_path):
+        # Clean up the annotated image
+        if 'annotated_image_path' in locals() and annotated_image_path and os.path.exists(annotated_image_path):
             os.unlink(annotated_image_path)
 
 @api_view(['POST'])
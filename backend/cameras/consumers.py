@@ -0,0 +1,61 @@
+"""
+WebSocket consumers for camera status updates.
+"""
+import json
+import logging
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+
+from .health import STATUS_GROUP, get_cached_statuses
+from .models import TrafficCamera
+
+logger = logging.getLogger(__name__)
+
+
+class CameraStatusConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer that streams camera status changes from the health monitor.
+    """
+    async def connect(self):
+        """Handle WebSocket connection."""
+        self.user = self.scope.get('user')
+        
+        # Authenticate user
+        if not self.user or not self.user.is_authenticated:
+            logger.warning("Unauthorized camera status connection attempt")
+            await self.close()
+            return False
+        
+        await self.channel_layer.group_add(
+            STATUS_GROUP,
+            self.channel_name
+        )
+        
+        await self.accept()
+        
+        # Send the current snapshot so clients start from a complete picture
+        await self.send(text_data=json.dumps({
+            'type': 'camera_status_update',
+            'cameras': await self.get_statuses()
+        }))
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        await self.channel_layer.group_discard(
+            STATUS_GROUP,
+            self.channel_name
+        )
+
+    async def camera_status_update(self, event):
+        """Forward camera status changes to the client."""
+        await self.send(text_data=json.dumps({
+            'type': 'camera_status_update',
+            'cameras': event['cameras']
+        }))
+
+    @database_sync_to_async
+    def get_statuses(self):
+        """Cached status of every active camera."""
+        camera_pks = TrafficCamera.objects.filter(is_active=True).values_list('pk', flat=True)
+        return list(get_cached_statuses(camera_pks).values())
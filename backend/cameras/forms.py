@@ -10,9 +10,20 @@ class TrafficCameraForm(forms.ModelForm):
     
     class Meta:
         model = TrafficCamera
-        fields = ['camera_id', 'name', 'location', 'description', 'is_active', 'coordinates_lat', 'coordinates_lng']
+        fields = [
+            'camera_id', 'name', 'location', 'description', 'is_active', 'coordinates_lat', 'coordinates_lng',
+            'roi', 'motion_gating', 'motion_threshold',
+            'decode_buffer_size', 'decode_frame_step', 'decode_max_width'
+        ]
         widgets = {
             'description': forms.Textarea(attrs={'rows': 3}),
+            'roi': forms.Textarea(attrs={'rows': 2}),
+        }
+        help_texts = {
+            'roi': 'JSON list of [x, y, width, height] regions as fractions of the frame, e.g. [[0.2, 0.5, 0.6, 0.5]]. Leave as [] for the whole frame.',
+            'decode_buffer_size': 'Frames the stream buffers; 1 keeps live feeds current. 0 uses the default.',
+            'decode_frame_step': 'Decode only every Nth frame; 1 decodes every frame.',
+            'decode_max_width': 'Downscale frames wider than this many pixels. 0 keeps full resolution.',
         }
     
     def __init__(self, *args, **kwargs):
@@ -0,0 +1,261 @@
+"""
+Camera health monitoring.
+
+CameraHealthMonitor probes every active camera concurrently and publishes
+each camera's status to the Django cache (and to the 'camera_status' channel
+group when a channel layer is configured). API and page views read status
+from the cache with one lookup instead of opening streams or querying the
+database on every request.
+
+Cameras with a stream URL are probed by opening the stream and grabbing a
+frame with connect/read timeouts, so an unreachable camera costs at most the
+timeouts and never blocks the other probes. Cameras that push frames through
+the upload API are judged by how recently they sent one. A camera that keeps
+failing is re-probed with exponential backoff, and the backoff state lives in
+the cached entry itself so the monitor can run from a Celery task as well as
+from the monitor_cameras command.
+
+The TrafficCamera row is only written when a camera's status changes.
+
+Usage:
+    monitor = CameraHealthMonitor()
+    monitor.run_once()
+    get_cached_status(camera.pk)
+"""
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import TrafficCamera, CameraStatus
+
+# Add the project root to the path for importing from the root modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from traffic_camera import open_video_capture, reconnect_delay
+
+logger = logging.getLogger(__name__)
+
+STATUS_CACHE_KEY = 'camera_status:{}'
+STATUS_GROUP = 'camera_status'
+
+
+def status_cache_key(camera_pk):
+    """Cache key holding a camera's status entry."""
+    return STATUS_CACHE_KEY.format(camera_pk)
+
+
+def get_cached_status(camera_pk):
+    """
+    Latest published status of a camera.
+
+    Returns:
+        Status dictionary, or None if the monitor has not published one
+    """
+    return cache.get(status_cache_key(camera_pk))
+
+
+def get_cached_statuses(camera_pks):
+    """
+    Latest published status of several cameras in one cache round trip.
+
+    Returns:
+        Dictionary mapping camera pk to status dictionary (missing cameras omitted)
+    """
+    camera_pks = list(camera_pks)
+    found = cache.get_many([status_cache_key(pk) for pk in camera_pks])
+    return {
+        pk: found[status_cache_key(pk)]
+        for pk in camera_pks
+        if status_cache_key(pk) in found
+    }
+
+
+def probe_stream(url, connect_timeout, read_timeout):
+    """
+    Open a camera stream and grab one frame.
+
+    Returns:
+        (ok, error_message) tuple
+    """
+    video_capture = open_video_capture(url, connect_timeout, read_timeout)
+    try:
+        if not video_capture.isOpened():
+            return False, f"Failed to connect to camera at {url}"
+        if not video_capture.grab():
+            return False, "Failed to read frame from camera"
+        return True, None
+    finally:
+        video_capture.release()
+
+
+def notify_camera_status(entries):
+    """
+    Push status changes to WebSocket subscribers, if channels is configured
+
+    Args:
+        entries: Status dictionaries that changed
+    """
+    if not entries:
+        return
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+    except ImportError:
+        return
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            STATUS_GROUP,
+            {
+                'type': 'camera_status_update',
+                'cameras': entries,
+            }
+        )
+    except Exception as e:
+        logger.warning("Failed to publish camera status: %s", str(e))
+
+
+class CameraHealthMonitor:
+    """Probes cameras concurrently and publishes their status."""
+
+    def __init__(self, max_workers=None, connect_timeout=None, read_timeout=None,
+                 stale_after=None, cache_ttl=None):
+        """
+        Initialize the monitor.
+
+        Args:
+            max_workers: Concurrent probes
+            connect_timeout: Seconds allowed to open a stream
+            read_timeout: Seconds allowed to read a frame
+            stale_after: Capture intervals without an upload before a push
+                camera counts as offline
+            cache_ttl: Seconds a published status stays in the cache
+        """
+        self.max_workers = max_workers or getattr(settings, 'CAMERA_HEALTH_WORKERS', 16)
+        self.connect_timeout = connect_timeout or getattr(settings, 'CAMERA_CONNECT_TIMEOUT', 5.0)
+        self.read_timeout = read_timeout or getattr(settings, 'CAMERA_READ_TIMEOUT', 5.0)
+        self.stale_after = stale_after or getattr(settings, 'CAMERA_HEALTH_STALE_INTERVALS', 3)
+        self.cache_ttl = cache_ttl or getattr(settings, 'CAMERA_STATUS_CACHE_TTL', 300)
+
+    def run_once(self, cameras=None):
+        """
+        Probe cameras once and publish the results.
+
+        Args:
+            cameras: TrafficCamera queryset or list (default: all active cameras)
+
+        Returns:
+            Dictionary mapping camera pk to its status entry
+        """
+        if cameras is None:
+            cameras = TrafficCamera.objects.filter(is_active=True)
+        cameras = list(cameras)
+        if not cameras:
+            return {}
+
+        previous = get_cached_statuses(camera.pk for camera in cameras)
+        now = time.time()
+
+        due = []
+        entries = {}
+        for camera in cameras:
+            entry = previous.get(camera.pk)
+            if entry and entry.get('next_probe_at', 0) > now:
+                # Still backing off; keep the last published status
+                entries[camera.pk] = entry
+            else:
+                due.append(camera)
+
+        results = self._probe_all(due)
+        changed = []
+        for camera in due:
+            ok, error_message, latency_ms = results[camera.pk]
+            entry = self._entry(camera, ok, error_message, latency_ms, previous.get(camera.pk), now)
+            entries[camera.pk] = entry
+            if camera.status != entry['status'] or camera.error_message != entry['error_message']:
+                camera.status = entry['status']
+                camera.error_message = entry['error_message']
+                changed.append(camera)
+
+        cache.set_many(
+            {status_cache_key(pk): entry for pk, entry in entries.items()},
+            timeout=self.cache_ttl
+        )
+
+        if changed:
+            TrafficCamera.objects.bulk_update(changed, ['status', 'error_message'])
+            notify_camera_status([entries[camera.pk] for camera in changed])
+            logger.info("Camera status changed for %d of %d cameras", len(changed), len(cameras))
+
+        return entries
+
+    def _probe_all(self, cameras):
+        """Probe cameras concurrently; returns pk -> (ok, error_message, latency_ms)."""
+        results = {}
+        if not cameras:
+            return results
+
+        deadline = self.connect_timeout + self.read_timeout + 1.0
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(cameras)),
+                                      thread_name_prefix='camera-health')
+        try:
+            futures = {camera.pk: executor.submit(self._probe, camera) for camera in cameras}
+            for pk, future in futures.items():
+                try:
+                    results[pk] = future.result(timeout=deadline)
+                except FutureTimeoutError:
+                    # The backend ignored the timeouts; give up on this round
+                    results[pk] = (False, "Camera probe timed out", deadline * 1000)
+                except Exception as e:
+                    results[pk] = (False, str(e), 0.0)
+        finally:
+            executor.shutdown(wait=False)
+        return results
+
+    def _probe(self, camera):
+        start = time.perf_counter()
+        if camera.url:
+            ok, error_message = probe_stream(camera.url, self.connect_timeout, self.read_timeout)
+        else:
+            ok, error_message = self._check_uploads(camera)
+        return ok, error_message, (time.perf_counter() - start) * 1000
+
+    def _check_uploads(self, camera):
+        """Health of a camera that pushes frames: did it upload recently?"""
+        if camera.last_capture_time is None:
+            return False, "No captures received"
+        age = (timezone.now() - camera.last_capture_time).total_seconds()
+        if age > self.stale_after * max(camera.capture_interval, 1):
+            return False, f"No captures received for {age:.0f} seconds"
+        return True, None
+
+    def _entry(self, camera, ok, error_message, latency_ms, previous, now):
+        failures = 0 if ok else (previous or {}).get('failures', 0) + 1
+        if ok:
+            status = CameraStatus.ONLINE
+        elif camera.url:
+            status = CameraStatus.ERROR
+        else:
+            status = CameraStatus.OFFLINE
+        return {
+            'id': camera.pk,
+            'camera_id': camera.camera_id,
+            'name': camera.name,
+            'status': str(status),
+            'is_active': camera.is_active,
+            'last_capture_time': camera.last_capture_time.isoformat() if camera.last_capture_time else None,
+            'error_message': error_message,
+            'latency_ms': round(latency_ms, 1),
+            'failures': failures,
+            'checked_at': now,
+            'next_probe_at': now + reconnect_delay(failures) if failures else 0.0,
+        }
@@ -0,0 +1,394 @@
+"""
+Bulk persistence of processed camera frames.
+
+Cameras push frames continuously, so captures are written in batches:
+CameraCapture rows go in with one bulk_create per flush, and each camera's
+last_capture_time/status is updated with one bulk_update per flush window
+instead of a save() per frame.
+
+Usage:
+    writer = get_capture_writer()
+    writer.add(build_capture(camera, image_bytes, result, detection_time))
+    writer.touch_camera(camera)   # only refresh last_capture_time/status
+    writer.flush()                # optional; also happens on size/time
+"""
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from .models import TrafficCamera, CameraCapture, CameraStatus
+
+logger = logging.getLogger(__name__)
+
+
+def capture_image_path(camera_id, captured_at):
+    """Storage path for a capture image, following CameraCapture.image.upload_to."""
+    return (
+        f"camera_captures/{captured_at:%Y/%m/%d}/"
+        f"{camera_id}_{captured_at:%H%M%S}_{uuid.uuid4().hex[:8]}.jpg"
+    )
+
+
+def resolve_cameras(camera_ids, defaults=None):
+    """
+    Fetch cameras by camera_id, creating any that do not exist yet.
+
+    Args:
+        camera_ids: Iterable of camera_id strings
+        defaults: Callable taking a camera_id and returning field values for
+            a new camera (None skips unknown cameras)
+
+    Returns:
+        Dictionary mapping camera_id to TrafficCamera
+    """
+    camera_ids = set(camera_ids)
+    cameras = {
+        camera.camera_id: camera
+        for camera in TrafficCamera.objects.filter(camera_id__in=camera_ids)
+    }
+
+    missing = camera_ids - cameras.keys()
+    if missing and defaults is not None:
+        TrafficCamera.objects.bulk_create(
+            [TrafficCamera(camera_id=camera_id, **defaults(camera_id)) for camera_id in missing],
+            ignore_conflicts=True
+        )
+        cameras.update({
+            camera.camera_id: camera
+            for camera in TrafficCamera.objects.filter(camera_id__in=missing)
+        })
+
+    return cameras
+
+
+def build_capture(camera, image_data, result, detection_time, captured_at=None):
+    """
+    Build an unsaved CameraCapture with its image already in storage.
+
+    The capture is timestamped with captured_at rather than the time it is
+    eventually written. If the write fails, write_captures deletes the image.
+
+    Args:
+        camera: TrafficCamera the frame came from
+        image_data: Encoded image bytes (None stores no image)
+        result: ocr_license_plate style result dictionary
+        detection_time: OCR time in seconds
+        captured_at: When the frame was captured (default: now)
+
+    Returns:
+        CameraCapture ready for CaptureWriter.add or write_captures
+    """
+    captured_at = captured_at or timezone.now()
+    plate_text = result.get('processed_text') or result.get('plate_text') or ''
+    capture = CameraCapture(
+        camera=camera,
+        timestamp=captured_at,
+        processed=True,
+        plate_detected=bool(result.get('success') and plate_text),
+        detected_plate_text=plate_text[:20] or None,
+        confidence=result.get('confidence', 0.0) if result.get('success') else 0.0,
+        detection_time=detection_time,
+    )
+    if image_data:
+        capture.image.name = default_storage.save(
+            capture_image_path(camera.camera_id, captured_at),
+            ContentFile(image_data)
+        )
+    return capture
+
+
+def write_captures(captures, camera_updates=None, delete_images_on_error=True):
+    """
+    Insert captures and refresh camera status in one transaction.
+
+    Args:
+        captures: Unsaved CameraCapture objects
+        camera_updates: Dictionary mapping camera pk to
+            (camera, last_capture_time, status)
+        delete_images_on_error: Delete the captures' stored images if the
+            write fails (CaptureWriter keeps them for its retries)
+
+    Returns:
+        List of created CameraCapture objects
+
+    Raises:
+        The database error, after deleting the captures' stored images so a
+        failed write leaves no orphaned files
+    """
+    try:
+        with transaction.atomic():
+            created = CameraCapture.objects.bulk_create(captures) if captures else []
+
+            if camera_updates:
+                now = timezone.now()
+                cameras = []
+                for camera, last_capture_time, status in camera_updates.values():
+                    camera.last_capture_time = last_capture_time
+                    camera.status = status
+                    camera.updated_at = now
+                    cameras.append(camera)
+                TrafficCamera.objects.bulk_update(cameras, ['last_capture_time', 'status', 'updated_at'])
+    except Exception:
+        if delete_images_on_error:
+            delete_capture_images(captures)
+        raise
+
+    return created
+
+
+def dead_letter_captures(captures, reason):
+    """
+    Append captures that could not be written to the dead-letter file.
+
+    Each line is a JSON object with the capture's fields and the image's
+    storage path (the image itself is kept), so the rows can be replayed
+    once the database is back.
+
+    Args:
+        captures: Unsaved CameraCapture objects
+        reason: Why they were given up on
+    """
+    if not captures:
+        return
+    path = getattr(settings, 'CAMERA_CAPTURE_DEAD_LETTER_PATH', 'capture_dead_letter.jsonl')
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'a') as f:
+            for capture in captures:
+                f.write(json.dumps({
+                    'camera_id': capture.camera.camera_id,
+                    'image': capture.image.name or None,
+                    'timestamp': capture.timestamp.isoformat(),
+                    'processed': capture.processed,
+                    'plate_detected': capture.plate_detected,
+                    'detected_plate_text': capture.detected_plate_text,
+                    'confidence': capture.confidence,
+                    'detection_time': capture.detection_time,
+                    'reason': reason,
+                }) + '\n')
+        logger.error("Wrote %d unsaved camera captures to %s: %s", len(captures), path, reason)
+    except Exception as e:
+        logger.error("Lost %d camera captures (%s); dead-letter write failed: %s", len(captures), reason, str(e))
+
+
+def delete_capture_images(captures):
+    """Remove the stored images of captures that were never saved."""
+    for capture in captures:
+        if not capture.image.name:
+            continue
+        try:
+            default_storage.delete(capture.image.name)
+        except Exception as e:
+            logger.warning("Could not delete orphaned capture image %s: %s", capture.image.name, str(e))
+
+
+class CaptureWriter:
+    """
+    Buffers captures and camera status updates and writes them in bulk.
+
+    A flush happens when batch_size captures are buffered, when
+    flush_interval seconds have passed since the last flush (checked by a
+    background thread), on flush() and at interpreter exit.
+
+    Clients have already been answered when a flush runs, so a failed write
+    is never raised to them. The batch goes back into the buffer and is
+    retried with exponential backoff; after max_retries failures, or when
+    more than max_pending captures are waiting, the oldest captures are
+    appended to the dead-letter file (see dead_letter_captures).
+    """
+
+    def __init__(self, batch_size=None, flush_interval=None, max_retries=None, max_pending=None):
+        self.batch_size = batch_size or getattr(settings, 'CAMERA_CAPTURE_BATCH_SIZE', 200)
+        self.flush_interval = flush_interval or getattr(settings, 'CAMERA_CAPTURE_FLUSH_INTERVAL', 1.0)
+        self.max_retries = max_retries if max_retries is not None else getattr(
+            settings, 'CAMERA_CAPTURE_MAX_RETRIES', 5
+        )
+        self.max_pending = max_pending or getattr(settings, 'CAMERA_CAPTURE_MAX_PENDING', 10 * self.batch_size)
+        self._captures = []
+        self._failures = 0
+        self._retry_at = 0.0
+        self._camera_updates = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._timer = None
+        self._stop_event = threading.Event()
+
+    def add(self, capture, captured_at=None):
+        """Buffer an unsaved CameraCapture and mark its camera as online."""
+        self._ensure_timer()
+        with self._lock:
+            self._captures.append(capture)
+            self._touch(capture.camera, captured_at or capture.timestamp, CameraStatus.ONLINE)
+            full = len(self._captures) >= self.batch_size and time.monotonic() >= self._retry_at
+            dropped = self._trim()
+        dead_letter_captures(dropped, "capture buffer full while database writes are failing")
+        if full:
+            self.flush()
+
+    def touch_camera(self, camera, captured_at=None, status=CameraStatus.ONLINE):
+        """Record a camera's latest capture time/status for the next flush."""
+        self._ensure_timer()
+        with self._lock:
+            self._touch(camera, captured_at, status)
+
+    def _touch(self, camera, captured_at, status):
+        captured_at = captured_at or timezone.now()
+        previous = self._camera_updates.get(camera.pk)
+        if previous is None or previous[1] <= captured_at:
+            self._camera_updates[camera.pk] = (camera, captured_at, status)
+
+    def pending(self):
+        """Number of buffered captures."""
+        with self._lock:
+            return len(self._captures)
+
+    def flush(self):
+        """
+        Write everything buffered so far.
+
+        Returns:
+            List of created CameraCapture objects (empty if the write failed
+            and the captures were kept for a retry)
+        """
+        with self._flush_lock:
+            with self._lock:
+                captures, self._captures = self._captures, []
+                camera_updates, self._camera_updates = self._camera_updates, {}
+                self._last_flush = time.monotonic()
+
+            if not captures and not camera_updates:
+                return []
+            try:
+                created = write_captures(captures, camera_updates, delete_images_on_error=False)
+            except Exception as e:
+                self._requeue(captures, camera_updates, e)
+                return []
+            self._failures = 0
+            self._retry_at = 0.0
+            logger.debug("Flushed %d captures for %d cameras", len(created), len(camera_updates))
+            return created
+
+    def _requeue(self, captures, camera_updates, error):
+        """Put a failed batch back in front of the buffer, or give up on it."""
+        self._failures += 1
+        if self._failures > self.max_retries:
+            logger.error("Giving up on %d camera captures after %d failed writes: %s",
+                         len(captures), self._failures, str(error))
+            dead_letter_captures(captures, str(error))
+            self._failures = 0
+            self._retry_at = 0.0
+            return
+
+        delay = self.flush_interval * 2 ** self._failures
+        logger.warning("Failed to write %d camera captures (attempt %d, retrying in %.0f s): %s",
+                       len(captures), self._failures, delay, str(error))
+        with self._lock:
+            self._retry_at = time.monotonic() + delay
+            self._captures = captures + self._captures
+            for camera, captured_at, status in camera_updates.values():
+                self._touch(camera, captured_at, status)
+            dropped = self._trim()
+        dead_letter_captures(dropped, f"capture buffer full: {error}")
+
+    def _trim(self):
+        """Remove and return the oldest captures beyond max_pending (caller holds _lock)."""
+        overflow = len(self._captures) - self.max_pending
+        if overflow <= 0:
+            return []
+        dropped, self._captures = self._captures[:overflow], self._captures[overflow:]
+        return dropped
+
+    def close(self):
+        """Stop the flush thread, write anything still buffered and dead-letter what cannot be."""
+        self._stop_event.set()
+        self._retry_at = 0.0
+        self.flush()
+        with self._lock:
+            captures, self._captures = self._captures, []
+        dead_letter_captures(captures, "capture writer closed before the write succeeded")
+
+    def _ensure_timer(self):
+        if self._timer is None or not self._timer.is_alive():
+            with self._lock:
+                if self._timer is None or not self._timer.is_alive():
+                    self._stop_event.clear()
+                    self._timer = threading.Thread(target=self._run, name='capture-writer', daemon=True)
+                    self._timer.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.flush_interval / 2):
+            now = time.monotonic()
+            if now - self._last_flush < self.flush_interval or now < self._retry_at:
+                continue
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Periodic capture flush failed")
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_capture_writer():
+    """Return the process-wide CaptureWriter, creating it on first use."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = CaptureWriter()
+                atexit.register(_writer.close)
+    return _writer
+
+
+def save_capture_batch(results):
+    """
+    Store a batch of processed frames as CameraCapture rows.
+
+    Args:
+        results: Result dictionaries from traffic_camera.CameraFeedProcessor
+            (camera_id, captured_at, success, plate_text, confidence,
+            processing_time_ms and JPEG bytes in image)
+
+    Returns:
+        List of created CameraCapture objects
+    """
+    if not results:
+        return []
+
+    cameras = resolve_cameras(result['camera_id'] for result in results)
+    captures = []
+    camera_updates = {}
+    for result in results:
+        camera = cameras.get(result['camera_id'])
+        if camera is None:
+            logger.warning("Skipping capture for unknown camera %s", result['camera_id'])
+            continue
+
+        if result.get('captured_at'):
+            captured_at = datetime.fromtimestamp(result['captured_at'], tz=dt_timezone.utc)
+        else:
+            captured_at = timezone.now()
+        captures.append(build_capture(
+            camera, result.get('image'), result,
+            result.get('processing_time_ms', 0.0) / 1000, captured_at
+        ))
+        previous = camera_updates.get(camera.pk)
+        if previous is None or previous[1] <= captured_at:
+            camera_updates[camera.pk] = (camera, captured_at, CameraStatus.ONLINE)
+
+    created = write_captures(captures, camera_updates)
+    logger.debug("Stored %d camera captures", len(created))
+    return created
@@ -0,0 +1,280 @@
+"""
+Load generator for the camera capture pipeline.
+
+Simulates many cameras sending frames at a target aggregate rate and
+measures how the pipeline keeps up. Frames are dispatched open-loop: frame i
+is due at start + i / fps whatever happened to earlier frames, and latency
+is measured from that due time, so time spent waiting for a free worker
+counts against the pipeline instead of silently lowering the offered load.
+
+Two targets are supported:
+
+- 'inprocess' runs the same steps as the upload_camera_image endpoint
+  (motion gating, OCR, buffered capture write) directly in this process.
+- 'http' POSTs frames to the upload endpoint of a running server.
+
+Cycling a handful of identical test images would let the motion gate see an
+empty road and the OCR cache hit on every repeat, so the run would time
+those skip paths instead of OCR. By default every frame is therefore made
+unique (shifted, brightness-jittered and stamped with its index) before it
+is sent; the time spent doing that is not counted as pipeline latency.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UPLOAD_URL = 'http://localhost:8000/api/v1/cameras/upload/'
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list (0.0 for an empty list)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def unique_frame(image, index, max_shift=8):
+    """
+    Encode a variant of a decoded frame that no earlier frame matches.
+
+    Every pixel moves (a small random shift and brightness change), so the
+    motion gate sees motion in any region of interest and the perceptual
+    hash differs from every earlier variant.
+
+    Args:
+        image: Decoded BGR frame
+        index: Frame number; seeds the variation and is stamped on the frame
+        max_shift: Largest shift in pixels along each axis
+
+    Returns:
+        JPEG bytes
+    """
+    rng = np.random.default_rng(index)
+    dy, dx = rng.integers(-max_shift, max_shift + 1, 2)
+    frame = np.roll(image, (int(dy), int(dx)), axis=(0, 1))
+    frame = cv2.convertScaleAbs(frame, alpha=float(rng.uniform(0.85, 1.15)), beta=float(rng.uniform(-10, 10)))
+    cv2.putText(frame, str(index), (10, frame.shape[0] - 10), cv2.FONT_HERSHEY_SIMPLEX,
+                0.6, (255, 255, 255), 1, cv2.LINE_AA)
+    ok, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    if not ok:
+        raise ValueError('Could not encode frame')
+    return buffer.tobytes()
+
+
+class InProcessTarget:
+    """Sends frames through the upload pipeline without HTTP."""
+
+    name = 'inprocess'
+
+    def __init__(self):
+        # Imported lazily so the HTTP target does not load OCR
+        from .ingest import build_capture, get_capture_writer
+        from .views import process_camera_frame
+
+        self._build_capture = build_capture
+        self._process = process_camera_frame
+        self.writer = get_capture_writer()
+
+    def send(self, camera, image_data):
+        result, detection_time, _ = self._process(camera, image_data)
+        if result is None:
+            raise ValueError('Invalid image')
+        self.writer.add(self._build_capture(camera, image_data, result, detection_time))
+
+    def pending(self):
+        return self.writer.pending()
+
+    def close(self):
+        self.writer.flush()
+
+
+class HttpTarget:
+    """POSTs frames to the upload_camera_image endpoint."""
+
+    name = 'http'
+
+    def __init__(self, url=DEFAULT_UPLOAD_URL, token=None, buffered=True, timeout=30.0):
+        self.url = url
+        self.headers = {'Authorization': f'Token {token}'} if token else {}
+        self.buffered = buffered
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _session(self):
+        # One keep-alive connection per worker thread
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def send(self, camera, image_data):
+        response = self._session().post(
+            self.url,
+            data={'camera_id': camera.camera_id, 'buffered': 'true' if self.buffered else 'false'},
+            files={'image': ('frame.jpg', image_data, 'image/jpeg')},
+            headers=self.headers,
+            timeout=self.timeout,
+        )
+        if response.status_code >= 400:
+            raise RuntimeError(f'HTTP {response.status_code}: {response.text[:200]}')
+
+    def pending(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class LoadGenerator:
+    """Drives a target with frames from N cameras at a fixed aggregate rate."""
+
+    def __init__(self, target, cameras, frames, fps=10.0, concurrency=8, unique_frames=True):
+        """
+        Initialize the generator.
+
+        Args:
+            target: InProcessTarget or HttpTarget
+            cameras: TrafficCamera instances to send as
+            frames: Encoded images, cycled through
+            fps: Aggregate frames per second across all cameras
+            concurrency: Frames processed at the same time
+            unique_frames: Send a unique variant of each frame (see
+                unique_frame) instead of the images unchanged
+        """
+        if not cameras or not frames:
+            raise ValueError('Need at least one camera and one frame')
+        self.target = target
+        self.cameras = list(cameras)
+        self.frames = list(frames)
+        self.fps = fps
+        self.concurrency = concurrency
+        self.unique_frames = unique_frames
+        self._decoded = None
+        if unique_frames:
+            self._decoded = [cv2.imdecode(np.frombuffer(frame, np.uint8), cv2.IMREAD_COLOR) for frame in self.frames]
+            if any(image is None for image in self._decoded):
+                raise ValueError('Could not decode every frame')
+
+        self._lock = threading.Lock()
+        self._latencies = []
+        self._service_times = []
+        self._errors = 0
+        self._outstanding = 0
+        self._queue_samples = []
+
+    def run(self, duration, progress=None):
+        """
+        Offer load for duration seconds and wait for every frame to finish.
+
+        Args:
+            duration: Seconds to send frames for
+            progress: Optional callable receiving a stats dict about once a second
+
+        Returns:
+            Stats dictionary (see stats())
+        """
+        total = max(1, int(duration * self.fps))
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='loadgen')
+        start = time.perf_counter()
+        next_report = start + 1.0
+        try:
+            for i in range(total):
+                due = start + i / self.fps
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+
+                camera = self.cameras[i % len(self.cameras)]
+                with self._lock:
+                    self._outstanding += 1
+                    self._queue_samples.append(self._outstanding)
+                executor.submit(self._send, camera, i, due)
+
+                if progress is not None and time.perf_counter() >= next_report:
+                    progress(self.stats(time.perf_counter() - start, sent=i + 1))
+                    next_report += 1.0
+        finally:
+            executor.shutdown(wait=True)
+        elapsed = time.perf_counter() - start
+
+        pending = self.target.pending()
+        self.target.close()
+        return self.stats(elapsed, sent=total, writer_pending=pending)
+
+    def _frame(self, index):
+        """Encoded image to send as frame number index."""
+        if self.unique_frames:
+            return unique_frame(self._decoded[index % len(self._decoded)], index)
+        return self.frames[index % len(self.frames)]
+
+    def _send(self, camera, index, due):
+        prepared = time.perf_counter()
+        failed = False
+        try:
+            image_data = self._frame(index)
+            started = time.perf_counter()
+            self.target.send(camera, image_data)
+        except Exception as e:
+            failed = True
+            logger.debug('Load generator frame for %s failed: %s', camera.camera_id, str(e))
+        finished = time.perf_counter()
+
+        with self._lock:
+            self._outstanding -= 1
+            if failed:
+                self._errors += 1
+            else:
+                # Making the frame unique is generator work, not pipeline latency
+                self._latencies.append(finished - due - (started - prepared))
+                self._service_times.append(finished - started)
+
+    def stats(self, elapsed, sent, writer_pending=None):
+        """
+        Throughput, latency percentiles (ms) and queue depth so far.
+
+        Queue depth is the number of frames sent but not yet finished,
+        sampled at each dispatch.
+        """
+        with self._lock:
+            latencies = sorted(self._latencies)
+            service_times = sorted(self._service_times)
+            errors = self._errors
+            samples = list(self._queue_samples)
+            outstanding = self._outstanding
+
+        completed = len(latencies)
+        return {
+            'target': self.target.name,
+            'cameras': len(self.cameras),
+            'target_fps': self.fps,
+            'elapsed_seconds': elapsed,
+            'sent': sent,
+            'completed': completed,
+            'errors': errors,
+            'throughput_fps': completed / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': {
+                'p50': percentile(latencies, 50) * 1000,
+                'p95': percentile(latencies, 95) * 1000,
+                'p99': percentile(latencies, 99) * 1000,
+                'max': latencies[-1] * 1000 if latencies else 0.0,
+            },
+            'service_ms': {
+                'p50': percentile(service_times, 50) * 1000,
+                'p95': percentile(service_times, 95) * 1000,
+                'p99': percentile(service_times, 99) * 1000,
+            },
+            'queue_depth': {
+                'current': outstanding,
+                'mean': sum(samples) / len(samples) if samples else 0.0,
+                'max': max(samples) if samples else 0,
+            },
+            'writer_pending': writer_pending,
+        }
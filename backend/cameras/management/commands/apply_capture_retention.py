@@ -0,0 +1,74 @@
+"""
+Management command to apply the camera capture retention policy.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from cameras.retention import RetentionPolicy, apply_retention
+
+
+class Command(BaseCommand):
+    help = 'Delete or downsample expired no-plate captures and compact old evidence images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--no-plate-days',
+            type=float,
+            default=None,
+            help='Age in days after which unprocessed and no-plate captures expire'
+        )
+        parser.add_argument(
+            '--action',
+            choices=['delete', 'downsample'],
+            default=None,
+            help='What to do with expired no-plate captures'
+        )
+        parser.add_argument(
+            '--compact-after-days',
+            type=float,
+            default=None,
+            help='Age in days after which evidence images are re-encoded'
+        )
+        parser.add_argument(
+            '--format',
+            choices=['jpeg', 'webp'],
+            default=None,
+            help='Format for compacted evidence images'
+        )
+        parser.add_argument(
+            '--quality',
+            type=int,
+            default=None,
+            help='Encoder quality for compacted evidence images (1-100)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Captures handled per database batch'
+        )
+
+    def handle(self, *args, **options):
+        policy = RetentionPolicy.from_settings()
+        overrides = {
+            'no_plate_days': options['no_plate_days'],
+            'no_plate_action': options['action'],
+            'compact_after_days': options['compact_after_days'],
+            'image_format': options['format'],
+            'quality': options['quality'],
+            'batch_size': options['batch_size'],
+        }
+        for field, value in overrides.items():
+            if value is not None:
+                setattr(policy, field, value)
+
+        if not 1 <= policy.quality <= 100:
+            raise CommandError('--quality must be between 1 and 100')
+        if policy.batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        stats = apply_retention(policy)
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {stats['deleted']}, downsampled {stats['downsampled']} and compacted "
+            f"{stats['compacted']} captures; removed {stats['local_files_removed']} local frames; "
+            f"saved {stats['bytes_saved'] / 1e6:.1f} MB"
+        ))
@@ -0,0 +1,165 @@
+"""
+Management command to measure the CPU cost of camera decode modes.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+
+# Add the project root to the path for importing from the root modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.dirname(os.path.dirname(__file__))))))
+from traffic_camera import TrafficCamera as FeedCamera
+
+# frame_step:max_width pairs compared when --mode is not given
+DEFAULT_MODES = ['1:0', '1:640', '3:0', '5:0', '5:640']
+
+
+class Command(BaseCommand):
+    help = 'Compare CPU per camera for decode modes (buffer size, frame skipping, downscaling)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source',
+            nargs='?',
+            help='Stream URL or video file (default: a generated 1080p test clip)'
+        )
+        parser.add_argument(
+            '--mode',
+            action='append',
+            dest='modes',
+            help='Decode mode as frame_step:max_width, e.g. 5:640 (repeatable)'
+        )
+        parser.add_argument(
+            '--frames',
+            type=int,
+            default=300,
+            help='Stream frames consumed per mode'
+        )
+        parser.add_argument(
+            '--fps',
+            type=float,
+            default=25.0,
+            help='Stream frame rate used to express cost as CPU per camera'
+        )
+        parser.add_argument(
+            '--buffer-size',
+            type=int,
+            default=1,
+            help='Capture buffer size for every mode'
+        )
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        modes = [self._parse_mode(mode) for mode in options['modes'] or DEFAULT_MODES]
+        frames = max(1, options['frames'])
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            source = options['source'] or self._synthetic_clip(tmp_dir, frames, options['fps'])
+            results = [
+                self._run(source, frame_step, max_width, options['buffer_size'], frames, options['fps'], tmp_dir)
+                for frame_step, max_width in modes
+            ]
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        baseline = results[0]['cpu_ms_per_stream_frame'] or 1e-9
+        self.stdout.write(
+            f"{'step':>5}{'width':>7}{'analysed':>10}{'frame px':>12}"
+            f"{'cpu ms/frame':>14}{'cores/camera':>14}{'saving':>9}"
+        )
+        for result in results:
+            saving = 1 - result['cpu_ms_per_stream_frame'] / baseline
+            self.stdout.write(
+                f"{result['frame_step']:>5}{result['max_width'] or 'full':>7}"
+                f"{result['analysed_frames']:>10}{result['frame_size']:>12}"
+                f"{result['cpu_ms_per_stream_frame']:>14.2f}{result['cores_per_camera']:>14.3f}"
+                f"{saving:>8.0%}"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"CPU figures are per stream frame at {options['fps']:g} fps, relative to the first mode"
+        ))
+
+    def _parse_mode(self, mode):
+        try:
+            frame_step, _, max_width = mode.partition(':')
+            return max(1, int(frame_step)), int(max_width or 0)
+        except ValueError:
+            raise CommandError(f"Invalid decode mode '{mode}', expected frame_step:max_width")
+
+    def _synthetic_clip(self, tmp_dir, frames, fps):
+        """Write a 1080p clip with a moving block, so decoding has real work to do."""
+        path = os.path.join(tmp_dir, 'decode_benchmark.mp4')
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (1920, 1080))
+        if not writer.isOpened():
+            raise CommandError('Could not write a test clip; pass a video file or stream URL')
+
+        rng = np.random.default_rng(0)
+        background = rng.integers(0, 255, (1080, 1920, 3), dtype=np.uint8)
+        for i in range(frames):
+            frame = background.copy()
+            x = (i * 12) % 1700
+            cv2.rectangle(frame, (x, 500), (x + 220, 620), (255, 255, 255), -1)
+            cv2.putText(frame, f'BA 1 PA {i:04d}', (x + 10, 575), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+            writer.write(frame)
+        writer.release()
+        return path
+
+    def _run(self, source, frame_step, max_width, buffer_size, frames, fps, tmp_dir):
+        camera = FeedCamera(
+            camera_id='benchmark',
+            name='Decode benchmark',
+            location='benchmark',
+            url=source,
+            buffer_size=buffer_size,
+            frame_step=frame_step,
+            max_width=max_width,
+        )
+        # Keep the benchmark from leaving a capture directory behind
+        try:
+            os.rmdir(camera.image_dir)
+        except OSError:
+            pass
+        camera.image_dir = tmp_dir
+
+        if not camera.connect():
+            raise CommandError(f"Could not open {source}: {camera.error_message}")
+
+        analysed = 0
+        frame_size = '-'
+        cpu_start = time.process_time()
+        wall_start = time.perf_counter()
+        try:
+            for _ in range(frames // frame_step):
+                ok, frame = camera.read_frame()
+                if not ok:
+                    break
+                analysed += 1
+                frame_size = f"{frame.shape[1]}x{frame.shape[0]}"
+        finally:
+            cpu_seconds = time.process_time() - cpu_start
+            wall_seconds = time.perf_counter() - wall_start
+            camera.disconnect()
+
+        stream_frames = max(1, analysed * frame_step)
+        cpu_ms_per_stream_frame = cpu_seconds * 1000 / stream_frames
+        return {
+            'frame_step': frame_step,
+            'max_width': max_width,
+            'buffer_size': buffer_size,
+            'analysed_frames': analysed,
+            'stream_frames': stream_frames,
+            'frame_size': frame_size,
+            'cpu_seconds': cpu_seconds,
+            'wall_seconds': wall_seconds,
+            'cpu_ms_per_stream_frame': cpu_ms_per_stream_frame,
+            # Share of one core a camera streaming at fps would need
+            'cores_per_camera': cpu_ms_per_stream_frame * fps / 1000,
+        }
@@ -0,0 +1,53 @@
+"""
+Management command to monitor camera health and publish status.
+"""
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from cameras.health import CameraHealthMonitor
+
+
+class Command(BaseCommand):
+    help = 'Probe active cameras concurrently and publish their status to the cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'CAMERA_HEALTH_INTERVAL', 30.0),
+            help='Seconds between probe rounds'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run a single probe round and exit'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Concurrent probes'
+        )
+
+    def handle(self, *args, **options):
+        monitor = CameraHealthMonitor(max_workers=options['workers'])
+        
+        try:
+            while True:
+                start = time.monotonic()
+                entries = monitor.run_once()
+                online = sum(1 for entry in entries.values() if entry['status'] == 'online')
+                self.stdout.write(
+                    f"{online}/{len(entries)} cameras online "
+                    f"(round took {time.monotonic() - start:.1f}s)"
+                )
+                
+                if options['once']:
+                    break
+                time.sleep(max(0.0, options['interval'] - (time.monotonic() - start)))
+        except KeyboardInterrupt:
+            pass
+        
+        self.stdout.write(self.style.SUCCESS('Camera monitoring stopped'))
@@ -1,12 +1,17 @@
 """
 Management command to simulate traffic cameras capturing license plates.
+
+With --load it becomes a load generator: N cameras send frames at a target
+aggregate FPS to the in-process pipeline or the upload HTTP endpoint, and
+throughput, latency percentiles and queue depth are reported.
 """
+import json
 import os
 import time
 import random
 from datetime import datetime
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.core.files.base import ContentFile
 from django.conf import settings
 
@@ -21,7 +26,9 @@ from optimized_ocr import ocr_license_plate
 from generate_test_plate import generate_nepali_plate
 from animated_progress import LicensePlateProgressIndicator
 
-from cameras.models import TrafficCamera, CameraCapture, CameraStatus
+from cameras.models import CameraStatus
+from cameras.ingest import CaptureWriter, build_capture, resolve_cameras
+from cameras.loadgen import LoadGenerator, InProcessTarget, HttpTarget, DEFAULT_UPLOAD_URL
 
 
 class Command(BaseCommand):
@@ -56,6 +63,56 @@ class Command(BaseCommand):
             action='store_true',
             help='Show animated progress indicators'
         )
+        parser.add_argument(
+            '--load',
+            action='store_true',
+            help='Run as a load generator instead of capture rounds'
+        )
+        parser.add_argument(
+            '--fps',
+            type=float,
+            default=10.0,
+            help='Load mode: aggregate frames per second across all cameras'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30.0,
+            help='Load mode: seconds to generate load for'
+        )
+        parser.add_argument(
+            '--target',
+            choices=['inprocess', 'http'],
+            default='inprocess',
+            help='Load mode: send frames to the in-process pipeline or the upload endpoint'
+        )
+        parser.add_argument(
+            '--url',
+            default=DEFAULT_UPLOAD_URL,
+            help='Load mode: upload endpoint for --target http'
+        )
+        parser.add_argument(
+            '--token',
+            default=os.environ.get('SUTMS_API_TOKEN'),
+            help='Load mode: API token for --target http'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Load mode: frames in flight at once'
+        )
+        parser.add_argument(
+            '--repeat-frames',
+            action='store_true',
+            help=('Load mode: cycle the test images unchanged instead of unique variants '
+                  '(times the motion-gate and OCR-cache skip paths, not OCR)')
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Load mode: print the final report as JSON'
+        )
 
     def handle(self, *args, **options):
         num_cameras = options['cameras']
@@ -64,6 +121,10 @@ class Command(BaseCommand):
         random_plates = options['random_plates']
         animate = options['animate']
         
+        if options['load']:
+            self._run_load(options)
+            return
+        
         self.stdout.write(self.style.SUCCESS(
             f'Simulating {num_cameras} cameras with {num_captures} captures each '
             f'at {interval} second intervals'
@@ -101,28 +162,86 @@ class Command(BaseCommand):
             'Sundhara Crossroad'
         ]
         
-        # Delete all existing cameras and captures for clean simulation
-        CameraCapture.objects.all().delete()
-        TrafficCamera.objects.all().delete()
+        def defaults(camera_id):
+            i = int(camera_id[3:]) - 1
+            return {
+                'name': f'Simulated Camera {i+1}',
+                'location': locations[i % len(locations)],
+                'status': CameraStatus.ONLINE,
+                'is_active': True,
+                'url': f'http://simulated-camera-{i+1}',
+                'latitude': random.uniform(27.6, 27.8),
+                'longitude': random.uniform(85.2, 85.4),
+                'capture_interval': 5,
+            }
         
-        for i in range(num_cameras):
-            location = locations[i % len(locations)]
-            camera = TrafficCamera.objects.create(
-                camera_id=f'SIM{i+1:03d}',
-                name=f'Simulated Camera {i+1}',
-                location=location,
-                status=CameraStatus.ONLINE,
-                is_active=True,
-                url=f'http://simulated-camera-{i+1}',
-                latitude=random.uniform(27.6, 27.8),
-                longitude=random.uniform(85.2, 85.4),
-                capture_interval=5
-            )
-            cameras.append(camera)
-            self.stdout.write(f'Created camera: {camera.name} at {camera.location}')
+        # Existing simulated cameras (and everything else) are left in place
+        camera_ids = [f'SIM{i+1:03d}' for i in range(num_cameras)]
+        by_id = resolve_cameras(camera_ids, defaults=defaults)
+        cameras = [by_id[camera_id] for camera_id in camera_ids]
+        self.stdout.write(f'Using {len(cameras)} simulated cameras (SIM001-{camera_ids[-1]})')
         
         return cameras
 
+    def _run_load(self, options):
+        """Offer a fixed frame rate from N cameras and report how the pipeline copes"""
+        if options['fps'] <= 0 or options['duration'] <= 0:
+            raise CommandError('--fps and --duration must be positive')
+        
+        cameras = self._create_simulated_cameras(options['cameras'])
+        frames = []
+        for image_path in self._load_test_plates():
+            with open(image_path, 'rb') as f:
+                frames.append(f.read())
+        
+        if options['target'] == 'http':
+            target = HttpTarget(options['url'], token=options['token'])
+        else:
+            target = InProcessTarget()
+        
+        self.stdout.write(self.style.SUCCESS(
+            f"Sending {options['fps']:g} fps from {len(cameras)} cameras to {target.name} "
+            f"for {options['duration']:g}s with {options['concurrency']} workers"
+        ))
+        
+        def progress(stats):
+            if not options['json']:
+                self.stdout.write(
+                    f"  {stats['elapsed_seconds']:5.1f}s sent {stats['sent']} "
+                    f"done {stats['completed']} err {stats['errors']} "
+                    f"queue {stats['queue_depth']['current']} "
+                    f"p95 {stats['latency_ms']['p95']:.0f}ms"
+                )
+        
+        generator = LoadGenerator(
+            target, cameras, frames, fps=options['fps'], concurrency=options['concurrency'],
+            unique_frames=not options['repeat_frames']
+        )
+        stats = generator.run(options['duration'], progress=progress)
+        
+        if options['json']:
+            self.stdout.write(json.dumps(stats, indent=2))
+            return
+        
+        latency = stats['latency_ms']
+        queue_depth = stats['queue_depth']
+        self.stdout.write(
+            f"\nSent {stats['sent']} frames, completed {stats['completed']}, errors {stats['errors']}\n"
+            f"Throughput: {stats['throughput_fps']:.1f} fps (target {stats['target_fps']:g})\n"
+            f"Latency: p50 {latency['p50']:.1f}ms  p95 {latency['p95']:.1f}ms  "
+            f"p99 {latency['p99']:.1f}ms  max {latency['max']:.1f}ms\n"
+            f"Service time: p50 {stats['service_ms']['p50']:.1f}ms  p99 {stats['service_ms']['p99']:.1f}ms\n"
+            f"Queue depth: mean {queue_depth['mean']:.1f}  max {queue_depth['max']}"
+            + (f"\nCaptures awaiting bulk write at end: {stats['writer_pending']}"
+               if stats['writer_pending'] is not None else '')
+        )
+        
+        keeping_up = stats['errors'] == 0 and stats['throughput_fps'] >= 0.95 * stats['target_fps']
+        if keeping_up:
+            self.stdout.write(self.style.SUCCESS('Pipeline kept up with the offered load'))
+        else:
+            self.stdout.write(self.style.WARNING('Pipeline fell behind the offered load'))
+
     def _load_test_plates(self):
         """Load existing test plate images"""
         test_images = []
@@ -187,6 +306,9 @@ class Command(BaseCommand):
 
     def _simulate_captures(self, cameras, test_images, num_captures, interval, animate):
         """Simulate cameras capturing license plates"""
+        # Captures and camera status updates are written in bulk once per round
+        writer = CaptureWriter(batch_size=max(len(cameras), 1))
+        
         for capture_index in range(num_captures):
             self.stdout.write(f'\nCapture round {capture_index+1}/{num_captures}')
             
@@ -194,11 +316,6 @@ class Command(BaseCommand):
                 # Select a random test image
                 image_path = random.choice(test_images)
                 
-                # Update camera status
-                camera.status = CameraStatus.ONLINE
-                camera.last_capture_time = datetime.now()
-                camera.save()
-                
                 self.stdout.write(f'Camera {camera.name} capturing from {image_path}')
                 
                 # Process the image with animation if requested
@@ -207,15 +324,8 @@ class Command(BaseCommand):
                     progress.next_step(display=False, save=True)
                     time.sleep(0.5)
                 
-                # Create a capture
-                capture = CameraCapture(camera=camera)
-                
-                # Save the image
                 with open(image_path, 'rb') as f:
-                    capture.image.save(
-                        f'{camera.camera_id}_{int(time.time())}.jpg',
-                        ContentFile(f.read())
-                    )
+                    image_data = f.read()
                 
                 if animate:
                     progress.next_step(display=False, save=True)
@@ -223,23 +333,17 @@ class Command(BaseCommand):
                 
                 # Run OCR
                 start_time = time.time()
-                result = ocr_license_plate(image_path)
+                result = ocr_license_plate(image_data, save_debug_images=False)
                 detection_time = time.time() - start_time
                 
                 if animate:
                     progress.next_step(display=False, save=True)
                     time.sleep(0.5)
                 
-                # Update the capture with results
-                capture.processed = True
-                capture.detection_time = detection_time
-                
-                if result['success']:
-                    capture.plate_detected = True
-                    capture.detected_plate_text = result.get('processed_text', '')
-                    capture.confidence = result.get('confidence', 0.0)
-                
-                capture.save()
+                # Buffer the capture with its results; the image goes
+                # straight to storage and the row is inserted with the round
+                capture = build_capture(camera, image_data, result, detection_time)
+                writer.add(capture)
                 
                 if animate:
                     progress.complete(display=False, save=True)
@@ -252,7 +356,11 @@ class Command(BaseCommand):
                     f'Detection time: {capture.detection_time:.3f}s'
                 ))
             
+            writer.flush()
+            
             # Wait for the next capture round
             if capture_index < num_captures - 1:
                 self.stdout.write(f'Waiting {interval} seconds for next capture...')
-                time.sleep(interval)
\ No newline at end of file
+                time.sleep(interval)
+        
+        writer.close()
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cameras', '0002_trafficcamera_coordinates_lat_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trafficcamera',
+            name='roi',
+            field=models.JSONField(blank=True, default=list, verbose_name='regions of interest'),
+        ),
+        migrations.AddField(
+            model_name='trafficcamera',
+            name='motion_gating',
+            field=models.BooleanField(default=True, verbose_name='motion gating'),
+        ),
+        migrations.AddField(
+            model_name='trafficcamera',
+            name='motion_threshold',
+            field=models.FloatField(default=0.01, verbose_name='motion threshold'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cameras', '0003_trafficcamera_motion_gating'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trafficcamera',
+            name='decode_buffer_size',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='capture buffer size (frames)'),
+        ),
+        migrations.AddField(
+            model_name='trafficcamera',
+            name='decode_frame_step',
+            field=models.PositiveSmallIntegerField(default=1, verbose_name='decode every Nth frame'),
+        ),
+        migrations.AddField(
+            model_name='trafficcamera',
+            name='decode_max_width',
+            field=models.PositiveIntegerField(default=0, verbose_name='maximum decoded width (pixels)'),
+        ),
+    ]
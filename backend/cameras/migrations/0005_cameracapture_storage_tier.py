@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cameras', '0004_trafficcamera_decode_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cameracapture',
+            name='storage_tier',
+            field=models.CharField(choices=[('original', 'Original'), ('compacted', 'Compacted'), ('thumbnail', 'Thumbnail')], default='original', max_length=20, verbose_name='storage tier'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cameras', '0005_cameracapture_storage_tier'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cameracapture',
+            index=models.Index(fields=['-timestamp', '-id'], name='capture_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cameracapture',
+            index=models.Index(fields=['camera', '-timestamp', '-id'], name='capture_camera_ts_id_idx'),
+        ),
+    ]
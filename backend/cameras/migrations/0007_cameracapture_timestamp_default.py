@@ -0,0 +1,17 @@
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cameras', '0006_cameracapture_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cameracapture',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='timestamp'),
+        ),
+    ]
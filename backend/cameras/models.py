@@ -3,6 +3,7 @@ Models for the cameras app.
 """
 
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 class CameraStatus(models.TextChoices):
@@ -37,6 +38,20 @@ class TrafficCamera(models.Model):
         default=CameraStatus.OFFLINE
     )
     is_active = models.BooleanField(_('is active'), default=True)
+    
+    # Motion/ROI gating: only frames with motion inside these regions are OCR'd.
+    # Regions are normalised [x, y, width, height] lists; empty means the whole frame.
+    roi = models.JSONField(_('regions of interest'), default=list, blank=True)
+    motion_gating = models.BooleanField(_('motion gating'), default=True)
+    motion_threshold = models.FloatField(_('motion threshold'), default=0.01)
+    
+    # Stream decode mode: how much of the feed is actually decoded to pixels.
+    # Skipped frames are grabbed without decoding; 0 keeps the backend default
+    # buffer size and full resolution.
+    decode_buffer_size = models.PositiveSmallIntegerField(_('capture buffer size (frames)'), default=0)
+    decode_frame_step = models.PositiveSmallIntegerField(_('decode every Nth frame'), default=1)
+    decode_max_width = models.PositiveIntegerField(_('maximum decoded width (pixels)'), default=0)
+    
     last_capture_time = models.DateTimeField(_('last capture time'), null=True, blank=True)
     error_message = models.TextField(_('error message'), blank=True, null=True)
     created_at = models.DateTimeField(_('created at'), auto_now_add=True)
@@ -51,6 +66,12 @@ class TrafficCamera(models.Model):
         """String representation of the camera."""
         return f"{self.name} ({self.camera_id})"
 
+class StorageTier(models.TextChoices):
+    """How a capture image is stored after retention has run."""
+    ORIGINAL = 'original', _('Original')
+    COMPACTED = 'compacted', _('Compacted')
+    THUMBNAIL = 'thumbnail', _('Thumbnail')
+
 class CameraCapture(models.Model):
     """Model representing an image captured by a traffic camera."""
     camera = models.ForeignKey(
@@ -60,17 +81,30 @@ class CameraCapture(models.Model):
         verbose_name=_('camera')
     )
     image = models.ImageField(_('captured image'), upload_to='camera_captures/%Y/%m/%d/')
-    timestamp = models.DateTimeField(_('timestamp'), auto_now_add=True)
+    # When the frame was captured; buffered and batched captures set it
+    # explicitly because they are written some time later
+    timestamp = models.DateTimeField(_('timestamp'), default=timezone.now)
     processed = models.BooleanField(_('processed'), default=False)
     plate_detected = models.BooleanField(_('plate detected'), default=False)
     detected_plate_text = models.CharField(_('detected plate text'), max_length=20, blank=True, null=True)
     confidence = models.FloatField(_('confidence'), default=0.0)
     detection_time = models.FloatField(_('detection time (seconds)'), default=0.0)
+    storage_tier = models.CharField(
+        _('storage tier'),
+        max_length=20,
+        choices=StorageTier.choices,
+        default=StorageTier.ORIGINAL
+    )
     
     class Meta:
         verbose_name = _('camera capture')
         verbose_name_plural = _('camera captures')
         ordering = ['-timestamp']
+        indexes = [
+            # Keyset pagination of capture listings on (timestamp, id)
+            models.Index(fields=['-timestamp', '-id'], name='capture_timestamp_id_idx'),
+            models.Index(fields=['camera', '-timestamp', '-id'], name='capture_camera_ts_id_idx'),
+        ]
 
     def __str__(self):
         """String representation of the capture."""
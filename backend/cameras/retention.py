@@ -0,0 +1,248 @@
+"""
+Retention and storage compaction for camera captures.
+
+Cameras produce far more captures than anyone looks at. Most are frames with
+no plate in them, and their value drops to zero within days. The retention
+job applies three tiers:
+
+- Captures that were never processed or found no plate are deleted (or, with
+  CAMERA_RETENTION_NO_PLATE_ACTION = 'downsample', shrunk to thumbnails)
+  once they are older than CAMERA_RETENTION_NO_PLATE_DAYS.
+- Captures with a detected plate are kept as evidence, but after
+  CAMERA_RETENTION_COMPACT_AFTER_DAYS their image is re-encoded at lower
+  quality (JPEG or WebP).
+- Frames traffic_camera.TrafficCamera.save_frame wrote to the local
+  camera_captures directory are removed after the no-plate TTL.
+
+Rows are processed in primary-key batches of CAMERA_RETENTION_BATCH_SIZE, so
+no single query or transaction touches the whole table.
+"""
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from datetime import timedelta
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import CameraCapture, StorageTier
+
+# Add the project root to the path for importing from the root modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+from traffic_camera import purge_saved_frames
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_WIDTH = 320
+THUMBNAIL_QUALITY = 50
+
+
+@dataclass
+class RetentionPolicy:
+    """Retention settings; defaults come from the CAMERA_RETENTION_* settings."""
+    no_plate_days: float
+    no_plate_action: str
+    compact_after_days: float
+    image_format: str
+    quality: int
+    max_width: int
+    batch_size: int
+    local_capture_dir: str
+
+    @classmethod
+    def from_settings(cls):
+        return cls(
+            no_plate_days=getattr(settings, 'CAMERA_RETENTION_NO_PLATE_DAYS', 7),
+            no_plate_action=getattr(settings, 'CAMERA_RETENTION_NO_PLATE_ACTION', 'delete'),
+            compact_after_days=getattr(settings, 'CAMERA_RETENTION_COMPACT_AFTER_DAYS', 30),
+            image_format=getattr(settings, 'CAMERA_RETENTION_FORMAT', 'jpeg'),
+            quality=getattr(settings, 'CAMERA_RETENTION_QUALITY', 60),
+            max_width=getattr(settings, 'CAMERA_RETENTION_MAX_WIDTH', 1280),
+            batch_size=getattr(settings, 'CAMERA_RETENTION_BATCH_SIZE', 500),
+            local_capture_dir=getattr(settings, 'CAMERA_LOCAL_CAPTURE_DIR', 'camera_captures'),
+        )
+
+
+def reencode_image(data, image_format='jpeg', quality=60, max_width=0):
+    """
+    Decode an image and encode it again, smaller.
+
+    Args:
+        data: Encoded image bytes
+        image_format: 'jpeg' or 'webp'
+        quality: Encoder quality (1-100)
+        max_width: Downscale wider images to this width (0 keeps the size)
+
+    Returns:
+        (encoded bytes, file extension) or (None, None) if the image is unreadable
+    """
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        return None, None
+
+    h, w = image.shape[:2]
+    if max_width and w > max_width:
+        scale = max_width / float(w)
+        image = cv2.resize(image, (max_width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+    if image_format == 'webp':
+        ok, encoded = cv2.imencode('.webp', image, [cv2.IMWRITE_WEBP_QUALITY, quality])
+        extension = '.webp'
+    else:
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        extension = '.jpg'
+    return (encoded.tobytes(), extension) if ok else (None, None)
+
+
+def _batches(queryset, batch_size):
+    """Yield lists of model instances in ascending pk batches."""
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def _delete_files(names):
+    for name in names:
+        if not name:
+            continue
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            logger.warning("Failed to delete capture image %s: %s", name, str(e))
+
+
+def _rewrite_images(queryset, tier, image_format, quality, max_width, batch_size):
+    """
+    Re-encode the images of a queryset and move them to a storage tier.
+
+    Returns:
+        (captures rewritten, bytes saved)
+    """
+    rewritten = 0
+    saved_bytes = 0
+    for batch in _batches(queryset.only('pk', 'image', 'storage_tier'), batch_size):
+        updated = []
+        old_names = []
+        for capture in batch:
+            old_name = capture.image.name
+            try:
+                with default_storage.open(old_name, 'rb') as f:
+                    data = f.read()
+            except Exception as e:
+                logger.warning("Skipping capture %s, image unreadable: %s", capture.pk, str(e))
+                continue
+
+            encoded, extension = reencode_image(data, image_format, quality, max_width)
+            if encoded is None or len(encoded) >= len(data):
+                # Already as small as this tier makes it; just record the tier
+                capture.storage_tier = tier
+                updated.append(capture)
+                continue
+
+            capture.image.name = default_storage.save(
+                os.path.splitext(old_name)[0] + extension, ContentFile(encoded)
+            )
+            capture.storage_tier = tier
+            updated.append(capture)
+            old_names.append(old_name)
+            saved_bytes += len(data) - len(encoded)
+
+        CameraCapture.objects.bulk_update(updated, ['image', 'storage_tier'])
+        # Only drop the originals once the rows point at the new files
+        _delete_files(old_names)
+        rewritten += len(updated)
+    return rewritten, saved_bytes
+
+
+def expire_no_plate_captures(policy, now=None):
+    """
+    Delete or downsample unprocessed and no-plate captures past their TTL.
+
+    Returns:
+        Dictionary with counts of deleted and downsampled captures
+    """
+    now = now or timezone.now()
+    expired = CameraCapture.objects.filter(
+        Q(processed=False) | Q(plate_detected=False),
+        timestamp__lt=now - timedelta(days=policy.no_plate_days),
+    )
+
+    if policy.no_plate_action == 'downsample':
+        downsampled, saved_bytes = _rewrite_images(
+            expired.exclude(storage_tier=StorageTier.THUMBNAIL),
+            StorageTier.THUMBNAIL, 'jpeg', THUMBNAIL_QUALITY, THUMBNAIL_WIDTH, policy.batch_size
+        )
+        return {'deleted': 0, 'downsampled': downsampled, 'bytes_saved': saved_bytes}
+
+    deleted = 0
+    while True:
+        batch = list(expired.order_by('pk').values_list('pk', 'image')[:policy.batch_size])
+        if not batch:
+            break
+        pks = [pk for pk, _ in batch]
+        CameraCapture.objects.filter(pk__in=pks).delete()
+        _delete_files(name for _, name in batch)
+        deleted += len(pks)
+    return {'deleted': deleted, 'downsampled': 0, 'bytes_saved': 0}
+
+
+def compact_evidence(policy, now=None):
+    """
+    Re-encode old captures with detected plates at lower quality.
+
+    Returns:
+        Dictionary with the number of compacted captures and bytes saved
+    """
+    now = now or timezone.now()
+    evidence = CameraCapture.objects.filter(
+        plate_detected=True,
+        storage_tier=StorageTier.ORIGINAL,
+        timestamp__lt=now - timedelta(days=policy.compact_after_days),
+    )
+    compacted, saved_bytes = _rewrite_images(
+        evidence, StorageTier.COMPACTED, policy.image_format, policy.quality,
+        policy.max_width, policy.batch_size
+    )
+    return {'compacted': compacted, 'bytes_saved': saved_bytes}
+
+
+def apply_retention(policy=None):
+    """
+    Run every retention tier once.
+
+    Args:
+        policy: RetentionPolicy (default: from settings)
+
+    Returns:
+        Dictionary of counts per tier
+    """
+    policy = policy or RetentionPolicy.from_settings()
+    now = timezone.now()
+
+    expired = expire_no_plate_captures(policy, now)
+    compacted = compact_evidence(policy, now)
+    local_removed = purge_saved_frames(policy.local_capture_dir, policy.no_plate_days * 86400)
+
+    stats = {
+        'deleted': expired['deleted'],
+        'downsampled': expired['downsampled'],
+        'compacted': compacted['compacted'],
+        'bytes_saved': expired['bytes_saved'] + compacted['bytes_saved'],
+        'local_files_removed': local_removed,
+    }
+    logger.info(
+        "Capture retention: %(deleted)d deleted, %(downsampled)d downsampled, "
+        "%(compacted)d compacted, %(local_files_removed)d local files removed, "
+        "%(bytes_saved)d bytes saved", stats
+    )
+    return stats
@@ -0,0 +1,11 @@
+"""
+WebSocket routing configuration for the cameras app.
+"""
+
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/cameras/status/', consumers.CameraStatusConsumer.as_asgi()),
+]
@@ -12,11 +12,30 @@ class TrafficCameraSerializer(serializers.ModelSerializer):
         model = TrafficCamera
         fields = [
             'id', 'camera_id', 'name', 'location', 'url', 'capture_interval',
-            'latitude', 'longitude', 'status', 'is_active', 'last_capture_time',
-            'error_message', 'created_at', 'updated_at'
+            'latitude', 'longitude', 'status', 'is_active', 'roi', 'motion_gating',
+            'motion_threshold', 'decode_buffer_size', 'decode_frame_step', 'decode_max_width',
+            'last_capture_time', 'error_message', 'created_at', 'updated_at'
         ]
         read_only_fields = ['status', 'last_capture_time', 'error_message', 'created_at', 'updated_at']
 
+    def validate_roi(self, value):
+        """Each region must be [x, y, width, height] with values between 0 and 1."""
+        if not isinstance(value, list):
+            raise serializers.ValidationError('Expected a list of [x, y, width, height] regions.')
+        for region in value:
+            if (not isinstance(region, (list, tuple)) or len(region) != 4
+                    or not all(isinstance(v, (int, float)) and 0 <= v <= 1 for v in region)):
+                raise serializers.ValidationError(
+                    'Each region must be [x, y, width, height] with values between 0 and 1.'
+                )
+        return value
+
+    def validate_decode_frame_step(self, value):
+        """At least every frame must be decoded."""
+        if value < 1:
+            raise serializers.ValidationError('Must be 1 or more.')
+        return value
+
 class CameraCaptureSerializer(serializers.ModelSerializer):
     """Serializer for the CameraCapture model."""
     camera_name = serializers.CharField(source='camera.name', read_only=True)
@@ -25,6 +44,6 @@ class CameraCaptureSerializer(serializers.ModelSerializer):
         model = CameraCapture
         fields = [
             'id', 'camera', 'camera_name', 'image', 'timestamp', 'processed',
-            'plate_detected', 'detected_plate_text', 'confidence', 'detection_time'
+            'plate_detected', 'detected_plate_text', 'confidence', 'detection_time', 'storage_tier'
         ]
-        read_only_fields = ['timestamp', 'processed', 'plate_detected', 'detected_plate_text', 'confidence', 'detection_time']
\ No newline at end of file
+        read_only_fields = ['timestamp', 'processed', 'plate_detected', 'detected_plate_text', 'confidence', 'detection_time', 'storage_tier']
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Signal handlers for the cameras application.
+
+The status API serves a camera's status straight from the entry the health
+monitor publishes to the cache (see health.py), so the entry is dropped as
+soon as the camera is deleted or deactivated. The monitor only probes active
+cameras and will not publish it again.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .health import status_cache_key
+from .models import TrafficCamera
+
+
+def _drop_cached_status(camera_pk):
+    # After commit, so the monitor cannot republish the entry from the
+    # still-active row before the change is visible to it
+    transaction.on_commit(lambda: cache.delete(status_cache_key(camera_pk)))
+
+
+@receiver(post_save, sender=TrafficCamera)
+def traffic_camera_saved(sender, instance, created, **kwargs):
+    """Drop the cached status of a deactivated camera."""
+    if not created and not instance.is_active:
+        _drop_cached_status(instance.pk)
+
+
+@receiver(post_delete, sender=TrafficCamera)
+def traffic_camera_deleted(sender, instance, **kwargs):
+    """Drop the cached status of a deleted camera."""
+    _drop_cached_status(instance.pk)
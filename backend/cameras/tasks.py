@@ -0,0 +1,36 @@
+"""
+Celery tasks for the cameras application.
+"""
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def check_camera_health():
+    """
+    Probe all active cameras and publish their status.
+    
+    Schedule this every CAMERA_HEALTH_INTERVAL seconds; cameras that keep
+    failing are skipped until their backoff delay has passed.
+    """
+    from .health import CameraHealthMonitor
+    
+    entries = CameraHealthMonitor().run_once()
+    online = sum(1 for entry in entries.values() if entry['status'] == 'online')
+    logger.debug("Camera health check: %d of %d cameras online", online, len(entries))
+    return {'cameras': len(entries), 'online': online}
+
+
+@shared_task
+def apply_capture_retention():
+    """
+    Expire no-plate captures, compact old evidence and prune local frames.
+    
+    Runs from Celery beat every CAMERA_RETENTION_INTERVAL seconds.
+    """
+    from .retention import apply_retention
+    
+    return apply_retention()
@@ -14,7 +14,9 @@ router.register(r'cameras', views.TrafficCameraViewSet)
 api_urlpatterns = [
     path('', include(router.urls)),
     path('upload/', views.upload_camera_image, name='api_upload_camera_image'),
+    path('upload/batch/', views.upload_camera_images_batch, name='api_upload_camera_images_batch'),
     path('simulate/', views.simulate_camera_capture, name='api_simulate_camera_capture'),
+    path('ocr-cache/stats/', views.ocr_cache_stats, name='api_ocr_cache_stats'),
 ]
 
 # Frontend routes
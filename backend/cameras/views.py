@@ -7,6 +7,8 @@ import json
 import time
 import tempfile
 import random
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 
 from django.conf import settings
@@ -18,7 +20,6 @@ from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
 from django.urls import reverse
 from django.db.models import Count, Avg, Max, Min
 
@@ -30,13 +31,106 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from .models import TrafficCamera, CameraCapture, CameraStatus
 from .serializers import TrafficCameraSerializer, CameraCaptureSerializer
 from .forms import TrafficCameraForm
+from .ingest import resolve_cameras, build_capture, write_captures, get_capture_writer
+from .health import get_cached_status, get_cached_statuses
+from core.pagination import paginate_keyset, InvalidCursor
 
 # Import the traffic camera integration module
 import sys
 import cv2
 import numpy as np
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from optimized_ocr import ocr_license_plate
+from optimized_ocr import ocr_license_plate, ocr_license_plate_regions
+from detection_cache import get_cache
+from motion_gate import MotionGate
+from ocr_engine import read_image
+
+# Motion gates for cameras that push frames through the upload API, most
+# recently used last. Each process keeps its own background model per
+# camera, so gating is only meaningful when every frame from a camera reaches
+# the same worker (one process, or sticky routing by camera_id); otherwise
+# each worker sees a fraction of the frames and its model never settles.
+# That is why it is opt-in through CAMERA_UPLOAD_MOTION_GATING.
+_motion_gates = OrderedDict()
+_motion_gates_lock = threading.Lock()
+
+
+def check_camera_motion(camera, image):
+    """
+    Run a camera's motion/ROI gate on a decoded frame.
+    
+    Gates are created on first use and the least recently used ones are
+    dropped beyond CAMERA_MOTION_GATE_CACHE_SIZE. Each MotionGate serialises
+    its own check()/configure() calls.
+    
+    Args:
+        camera: TrafficCamera model instance
+        image: Decoded frame
+        
+    Returns:
+        motion_gate.MotionResult
+    """
+    max_gates = getattr(settings, 'CAMERA_MOTION_GATE_CACHE_SIZE', 256)
+    with _motion_gates_lock:
+        gate = _motion_gates.get(camera.camera_id)
+        if gate is None:
+            gate = _motion_gates[camera.camera_id] = MotionGate(
+                rois=camera.roi, threshold=camera.motion_threshold
+            )
+            while len(_motion_gates) > max_gates:
+                _motion_gates.popitem(last=False)
+            created = True
+        else:
+            _motion_gates.move_to_end(camera.camera_id)
+            created = False
+    if not created:
+        gate.configure(rois=camera.roi, threshold=camera.motion_threshold)
+    return gate.check(image)
+
+
+def _new_camera_defaults(camera_id):
+    """Field values for a camera first seen through the upload API."""
+    return {
+        'name': f'Camera {camera_id}',
+        'location': 'Unknown Location',
+        'status': CameraStatus.ONLINE,
+    }
+
+
+def process_camera_frame(camera, image_data):
+    """
+    Run motion gating and plate OCR on one uploaded frame.
+    
+    With CAMERA_UPLOAD_MOTION_GATING on, only regions of interest that
+    moved are OCR'd. A near-identical recent frame from the same camera
+    (e.g. a vehicle waiting at a light) reuses its cached result.
+    
+    Args:
+        camera: TrafficCamera model instance
+        image_data: Encoded image bytes
+        
+    Returns:
+        Tuple of (result dictionary or None if the image is invalid,
+        detection time in seconds, whether motion was detected)
+    """
+    start_time = time.time()
+    image = read_image(image_data)
+    if image is None:
+        return None, 0.0, False
+    
+    motion_detected = True
+    regions = None
+    if camera.motion_gating and getattr(settings, 'CAMERA_UPLOAD_MOTION_GATING', False):
+        motion = check_camera_motion(camera, image)
+        motion_detected = motion.has_motion
+        regions = motion.regions
+    
+    if motion_detected:
+        result = ocr_license_plate_regions(image, regions, cache_scope=camera.camera_id)
+    else:
+        # Empty road: skip OCR entirely
+        result = {'success': False, 'cache_hit': False}
+    return result, time.time() - start_time, motion_detected
 
 class TrafficCameraViewSet(viewsets.ModelViewSet):
     """
@@ -75,19 +169,35 @@ class TrafficCameraViewSet(viewsets.ModelViewSet):
     def status(self, request, pk=None):
         """
         Get the current status of a camera.
+        
+        Served from the entry the health monitor publishes to the cache, which
+        carries everything this response needs; the database is only queried
+        when there is no entry. Entries are dropped when a camera is deleted
+        or deactivated (see signals.py), so those cameras are never served
+        from a stale one.
         """
+        cached = get_cached_status(pk)
+        if cached is not None and cached.get('is_active', True):
+            return Response({
+                'camera_id': cached['camera_id'],
+                'name': cached['name'],
+                'status': cached['status'],
+                'is_active': cached['is_active'],
+                'last_capture_time': cached['last_capture_time'],
+                'error_message': cached['error_message'],
+                'checked_at': cached['checked_at'],
+            })
+        
         camera = self.get_object()
         
-        response = {
+        return Response({
             'camera_id': camera.camera_id,
             'name': camera.name,
             'status': camera.status,
             'is_active': camera.is_active,
             'last_capture_time': camera.last_capture_time.isoformat() if camera.last_capture_time else None,
             'error_message': camera.error_message
-        }
-        
-        return Response(response)
+        })
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -99,9 +209,12 @@ def upload_camera_image(request):
     Expected parameters:
     - camera_id: ID of the camera that captured the image
     - image: The uploaded image file
+    - buffered (optional): If true, the capture is queued for the next bulk
+      write and the response (202) carries no capture_id
     """
     camera_id = request.data.get('camera_id')
     image_file = request.FILES.get('image')
+    buffered = str(request.data.get('buffered', request.query_params.get('buffered', ''))).lower() in ('1', 'true')
     
     if not camera_id or not image_file:
         return Response({
@@ -110,74 +223,130 @@ def upload_camera_image(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     try:
-        # Get or create the camera
-        camera, created = TrafficCamera.objects.get_or_create(
-            camera_id=camera_id,
-            defaults={
-                'name': f'Camera {camera_id}',
-                'location': 'Unknown Location',
-                'status': CameraStatus.ONLINE
-            }
-        )
-        
-        # Update camera status
-        camera.status = CameraStatus.ONLINE
-        camera.last_capture_time = timezone.now()
-        camera.save()
-        
-        # Save the uploaded image as a CameraCapture
-        capture = CameraCapture(camera=camera)
-        capture.image.save(
-            f'{camera_id}_{int(time.time())}.jpg',
-            image_file
-        )
+        # Get or create the camera; its status and last_capture_time are
+        # refreshed in bulk by the capture writer instead of a save per frame
+        camera = resolve_cameras([camera_id], defaults=_new_camera_defaults)[camera_id]
         
-        # Process the image for license plate detection
-        with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-            temp_path = temp_file.name
-            for chunk in image_file.chunks():
-                temp_file.write(chunk)
+        # Read the upload once; OCR decodes it in memory and storage gets a single write
+        image_data = image_file.read()
+        result, detection_time, motion_detected = process_camera_frame(camera, image_data)
+        if result is None:
+            return Response({
+                'success': False,
+                'error': 'Invalid image'
+            }, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            # Run license plate detection
-            start_time = time.time()
-            result = ocr_license_plate(temp_path)
-            detection_time = time.time() - start_time
-            
-            # Update the capture with the results
-            capture.processed = True
-            capture.detection_time = detection_time
-            
-            if result['success']:
-                capture.plate_detected = True
-                capture.detected_plate_text = result.get('processed_text', '')
-                capture.confidence = result.get('confidence', 0.0)
-            
-            capture.save()
-            
-            # Clean up the temp file
-            os.unlink(temp_path)
-            
+        # Save the uploaded image and the results as a CameraCapture
+        capture = build_capture(camera, image_data, result, detection_time)
+        if buffered:
+            get_capture_writer().add(capture)
             return Response({
                 'success': True,
                 'camera_id': camera.camera_id,
-                'capture_id': capture.id,
-                'timestamp': capture.timestamp.isoformat(),
+                'queued': True,
                 'plate_detected': capture.plate_detected,
                 'detected_plate_text': capture.detected_plate_text,
                 'confidence': capture.confidence,
-                'detection_time': capture.detection_time
-            })
+                'detection_time': capture.detection_time,
+                'cache_hit': result.get('cache_hit', False),
+                'motion_detected': motion_detected
+            }, status=status.HTTP_202_ACCEPTED)
         
-        except Exception as e:
-            # Clean up the temp file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        capture.save()
+        get_capture_writer().touch_camera(camera)
+        
+        return Response({
+            'success': True,
+            'camera_id': camera.camera_id,
+            'capture_id': capture.id,
+            'timestamp': capture.timestamp.isoformat(),
+            'plate_detected': capture.plate_detected,
+            'detected_plate_text': capture.detected_plate_text,
+            'confidence': capture.confidence,
+            'detection_time': capture.detection_time,
+            'cache_hit': result.get('cache_hit', False),
+            'motion_detected': motion_detected
+        })
+    
+    except Exception as e:
+        return Response({
+            'success': False,
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def upload_camera_images_batch(request):
+    """
+    Handle a batch of camera frames with one bulk insert.
+    
+    Expected parameters:
+    - images: The uploaded image files (repeat the field per image)
+    - camera_id: ID of the camera that captured all images, or
+    - camera_ids: One camera ID per image, in the same order
+    """
+    image_files = request.FILES.getlist('images')
+    camera_ids = request.data.getlist('camera_ids') if hasattr(request.data, 'getlist') else []
+    if not camera_ids and request.data.get('camera_id'):
+        camera_ids = [request.data.get('camera_id')] * len(image_files)
+    
+    if not image_files or len(camera_ids) != len(image_files):
+        return Response({
+            'success': False,
+            'error': 'Provide images and either camera_id or one camera_ids entry per image'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    max_images = getattr(settings, 'OCR_BATCH_MAX_IMAGES', 50)
+    if len(image_files) > max_images:
+        return Response({
+            'success': False,
+            'error': f'Too many images (maximum {max_images})'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        cameras = resolve_cameras(camera_ids, defaults=_new_camera_defaults)
+        
+        captures = []
+        results = []
+        camera_updates = {}
+        for camera_id, image_file in zip(camera_ids, image_files):
+            camera = cameras[camera_id]
+            image_data = image_file.read()
+            result, detection_time, motion_detected = process_camera_frame(camera, image_data)
+            if result is None:
+                results.append({'camera_id': camera_id, 'success': False, 'error': 'Invalid image'})
+                continue
             
-            return Response({
-                'success': False,
-                'error': str(e)
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+            capture = build_capture(camera, image_data, result, detection_time)
+            captures.append(capture)
+            camera_updates[camera.pk] = (camera, timezone.now(), CameraStatus.ONLINE)
+            results.append({
+                'camera_id': camera_id,
+                'success': True,
+                'capture': capture,
+                'cache_hit': result.get('cache_hit', False),
+                'motion_detected': motion_detected
+            })
+        
+        # One INSERT for the captures and one UPDATE for the cameras
+        write_captures(captures, camera_updates)
+        
+        for entry in results:
+            capture = entry.pop('capture', None)
+            if capture is not None:
+                entry.update({
+                    'capture_id': capture.id,
+                    'plate_detected': capture.plate_detected,
+                    'detected_plate_text': capture.detected_plate_text,
+                    'confidence': capture.confidence,
+                    'detection_time': capture.detection_time
+                })
+        
+        return Response({
+            'success': True,
+            'count': len(captures),
+            'results': results
+        })
     
     except Exception as e:
         return Response({
@@ -185,6 +354,14 @@ def upload_camera_image(request):
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def ocr_cache_stats(request):
+    """
+    Hit/miss metrics of this process's perceptual-hash OCR cache.
+    """
+    return Response(get_cache().stats())
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def simulate_camera_capture(request):
@@ -234,14 +411,16 @@ def simulate_camera_capture(request):
         
         # Save the test image as the capture image
         with open(test_image_path, 'rb') as f:
-            capture.image.save(
-                f'simulated_{camera_id}_{int(time.time())}.jpg',
-                ContentFile(f.read())
-            )
+            image_data = f.read()
+        capture.image.save(
+            f'simulated_{camera_id}_{int(time.time())}.jpg',
+            ContentFile(image_data),
+            save=False
+        )
         
         # Process the image for license plate detection
         start_time = time.time()
-        result = ocr_license_plate(test_image_path)
+        result = ocr_license_plate(image_data, save_debug_images=False)
         detection_time = time.time() - start_time
         
         # Update the capture with the results
@@ -283,14 +462,22 @@ def simulate_camera_capture(request):
 @login_required
 def camera_list(request):
     """View for listing all cameras."""
-    cameras = TrafficCamera.objects.all().order_by('-last_capture_time')
+    cameras = list(TrafficCamera.objects.all().order_by('-last_capture_time'))
+    
+    # Overlay the live status published by the health monitor
+    statuses = get_cached_statuses(camera.pk for camera in cameras)
+    for camera in cameras:
+        cached = statuses.get(camera.pk)
+        if cached is not None:
+            camera.status = cached['status']
+            camera.error_message = cached['error_message']
     
     # Get recent captures
     recent_captures = CameraCapture.objects.all().order_by('-timestamp')[:6]
     
     # Stats
-    total_cameras = cameras.count()
-    online_cameras = cameras.filter(status=CameraStatus.ONLINE).count()
+    total_cameras = len(cameras)
+    online_cameras = sum(1 for camera in cameras if camera.status == CameraStatus.ONLINE)
     total_captures = CameraCapture.objects.count()
     detection_success_rate = CameraCapture.objects.filter(plate_detected=True).count() / total_captures * 100 if total_captures > 0 else 0
     
@@ -373,17 +560,28 @@ def camera_delete(request, pk):
     
     return render(request, 'cameras/camera_confirm_delete.html', {'camera': camera})
 
+def _capture_page(captures, cursor, per_page=20):
+    """
+    Keyset-paginate captures newest first on (timestamp, id).
+    
+    An invalid cursor falls back to the first page.
+    """
+    try:
+        return paginate_keyset(captures, cursor, per_page, ordering=('-timestamp', '-id'))
+    except InvalidCursor:
+        return paginate_keyset(captures, None, per_page, ordering=('-timestamp', '-id'))
+
 @login_required
 def capture_list(request):
     """View for listing all captures."""
-    captures = CameraCapture.objects.all().order_by('-timestamp')
+    captures = CameraCapture.objects.select_related('camera')
+    page_obj = _capture_page(captures, request.GET.get('cursor'))
     
-    # Pagination
-    paginator = Paginator(captures, 20)  # Show 20 captures per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
-    
-    return render(request, 'cameras/capture_list.html', {'page_obj': page_obj})
+    return render(request, 'cameras/capture_list.html', {
+        'captures': page_obj,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages,
+    })
 
 @login_required
 def capture_detail(request, pk):
@@ -395,16 +593,14 @@ def capture_detail(request, pk):
 def camera_captures(request, pk):
     """View for listing a camera's captures."""
     camera = get_object_or_404(TrafficCamera, pk=pk)
-    captures = CameraCapture.objects.filter(camera=camera).order_by('-timestamp')
-    
-    # Pagination
-    paginator = Paginator(captures, 20)  # Show 20 captures per page
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    captures = CameraCapture.objects.filter(camera=camera)
+    page_obj = _capture_page(captures, request.GET.get('cursor'))
     
     return render(request, 'cameras/camera_captures.html', {
         'camera': camera,
-        'page_obj': page_obj
+        'captures': page_obj,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages,
     })
 
 @login_required
@@ -0,0 +1,112 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Modules that make startup slow when they are imported eagerly
+HEAVY_MODULES = ['tensorflow', 'easyocr', 'ultralytics', 'torch', 'openai']
+
+# Submodules a web or Celery worker imports while loading an app
+APP_SUBMODULES = ['models', 'admin', 'signals', 'urls', 'views', 'api', 'serializers', 'tasks', 'consumers']
+
+# Runs in a fresh interpreter so every measurement starts with a cold import cache
+PROBE_SCRIPT = r'''
+import importlib, importlib.util, json, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+setup_ms = (time.perf_counter() - start) * 1000
+app, submodules, heavy = sys.argv[1], sys.argv[2].split(','), sys.argv[3].split(',')
+result = {"setup_ms": setup_ms, "modules": {}, "errors": {}}
+if app:
+    for name in submodules:
+        module = f"{app}.{name}"
+        try:
+            if importlib.util.find_spec(module) is None:
+                continue
+        except Exception:
+            continue
+        t = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except Exception as e:
+            result["errors"][module] = f"{type(e).__name__}: {e}"
+        result["modules"][module] = (time.perf_counter() - t) * 1000
+result["total_ms"] = (time.perf_counter() - start) * 1000
+result["heavy"] = [m for m in heavy if m in sys.modules]
+print(json.dumps(result))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measures Django startup and per-app import time in fresh interpreters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('apps', nargs='*', help='App labels to measure (default: all project apps)')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per app; the fastest run is reported')
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        labels = options['apps'] or self._project_apps()
+        repeat = max(1, options['repeat'])
+
+        baseline = self._best_run('', repeat)
+        results = {'django.setup': baseline}
+        for label in labels:
+            results[label] = self._best_run(label, repeat)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(f"django.setup(): {baseline['setup_ms']:.0f} ms "
+                          f"(heavy modules loaded: {', '.join(baseline['heavy']) or 'none'})")
+        self.stdout.write(f"{'app':<16}{'imports ms':>12}  heavy modules loaded")
+        for label in labels:
+            result = results[label]
+            import_ms = sum(result['modules'].values())
+            heavy = ', '.join(result['heavy']) or '-'
+            line = f"{label:<16}{import_ms:>12.0f}  {heavy}"
+            self.stdout.write(self.style.WARNING(line) if result['heavy'] else line)
+            for module, error in result['errors'].items():
+                self.stdout.write(self.style.ERROR(f"  {module}: {error}"))
+
+        slow = [label for label in labels if results[label]['heavy']]
+        if slow:
+            self.stdout.write(self.style.WARNING(f"Apps importing ML frameworks at startup: {', '.join(slow)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS('No ML frameworks imported at startup'))
+
+    def _project_apps(self):
+        """Labels of the apps that live in this project rather than site-packages."""
+        base_dir = str(settings.BASE_DIR)
+        return [
+            config.name for config in apps.get_app_configs()
+            if os.path.abspath(config.path).startswith(base_dir)
+        ]
+
+    def _best_run(self, label, repeat):
+        best = None
+        for _ in range(repeat):
+            result = self._probe(label)
+            if best is None or result['total_ms'] < best['total_ms']:
+                best = result
+        return best
+
+    def _probe(self, label):
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', 'sutms_project.settings')
+        completed = subprocess.run(
+            [sys.executable, '-c', PROBE_SCRIPT, label, ','.join(APP_SUBMODULES), ','.join(HEAVY_MODULES)],
+            cwd=str(settings.BASE_DIR),
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode != 0:
+            raise CommandError(f"Startup probe for '{label or 'django.setup'}' failed:\n{completed.stderr}")
+        return json.loads(completed.stdout.strip().splitlines()[-1])
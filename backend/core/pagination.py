@@ -0,0 +1,177 @@
+"""
+Keyset (cursor) pagination for large, time-ordered tables.
+
+Offset pagination makes the database walk and discard every row before the
+requested page, so deep pages of captures or detections get slower the more
+rows there are. Keyset pagination instead remembers the (timestamp, id) of
+the last row shown and asks for rows strictly after it, which an index on
+(timestamp, id) answers directly whatever the depth.
+
+Cursors are opaque URL-safe strings. They do not support jumping to an
+arbitrary page number; only first/next/previous.
+
+Usage:
+    page = paginate_keyset(CameraCapture.objects.all(), request.GET.get('cursor'),
+                           ordering=('-timestamp', '-id'))
+    for capture in page: ...
+    page.next_cursor, page.previous_cursor
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor string cannot be decoded."""
+
+
+def encode_cursor(direction, values):
+    """Encode a direction and the ordering values of a boundary row."""
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps([direction] + values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (direction, values) tuple
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, *values = json.loads(raw)
+        if direction not in (NEXT, PREVIOUS) or not values:
+            raise ValueError("unknown direction or no values")
+        if not all(isinstance(value, (str, int, float)) for value in values):
+            raise ValueError("non-scalar value")
+        # parse_datetime raises ValueError for well-formed but impossible dates
+        values = [
+            parse_datetime(value) or value if isinstance(value, str) else value
+            for value in values
+        ]
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+    return direction, values
+
+
+class KeysetPage:
+    """One page of results with cursors to its neighbours."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def _after(ordering, values, direction):
+    """
+    Filter selecting the rows that come after a boundary row.
+
+    For ordering ('-timestamp', '-id') and direction NEXT this is
+    timestamp < t OR (timestamp = t AND id < i).
+    """
+    condition = Q()
+    equal = {}
+    for field, value in zip(ordering, values):
+        name = field.lstrip('-')
+        descending = field.startswith('-')
+        # Going backwards flips every comparison
+        lookup = 'lt' if descending == (direction == NEXT) else 'gt'
+        condition |= Q(**equal, **{f'{name}__{lookup}': value})
+        equal[name] = value
+    return condition
+
+
+def _reverse(ordering):
+    return [field[1:] if field.startswith('-') else f'-{field}' for field in ordering]
+
+
+def _values(obj, ordering):
+    return [getattr(obj, field.lstrip('-')) for field in ordering]
+
+
+def paginate_keyset(queryset, cursor=None, per_page=20, ordering=('-timestamp', '-id')):
+    """
+    Fetch one page of a queryset after (or before) a cursor.
+
+    Args:
+        queryset: Unordered or ordered queryset; it is re-ordered by ordering
+        cursor: Cursor from a previous page, or None for the first page
+        per_page: Rows per page
+        ordering: Fields to page by; the last must be unique (usually the pk)
+            and a composite index on them keeps every page cheap
+
+    Returns:
+        KeysetPage
+
+    Raises:
+        InvalidCursor: If the cursor is malformed
+    """
+    ordering = list(ordering)
+    direction, values = decode_cursor(cursor) if cursor else (NEXT, None)
+    if values is not None and len(values) != len(ordering):
+        raise InvalidCursor(f"Invalid cursor: {cursor}")
+
+    if direction == NEXT:
+        rows = queryset.order_by(*ordering)
+    else:
+        rows = queryset.order_by(*_reverse(ordering))
+    if values is not None:
+        try:
+            rows = rows.filter(_after(ordering, values, direction))
+        except (ValidationError, ValueError, TypeError) as e:
+            # Decodable, but the values do not fit the ordering fields
+            raise InvalidCursor(f"Invalid cursor: {cursor}") from e
+
+    # One extra row tells us whether there is another page in this direction
+    object_list = list(rows[:per_page + 1])
+    has_more = len(object_list) > per_page
+    object_list = object_list[:per_page]
+    if direction == PREVIOUS:
+        object_list.reverse()
+
+    if not object_list:
+        return KeysetPage(object_list)
+
+    more_after = has_more if direction == NEXT else values is not None
+    more_before = values is not None if direction == NEXT else has_more
+    return KeysetPage(
+        object_list,
+        next_cursor=encode_cursor(NEXT, _values(object_list[-1], ordering)) if more_after else None,
+        previous_cursor=encode_cursor(PREVIOUS, _values(object_list[0], ordering)) if more_before else None,
+    )
@@ -5,6 +5,7 @@ These endpoints provide the REST API interface for license plate detection.
 import logging
 import os
 import tempfile
+import zipfile
 from typing import Dict, Any
 
 from django.conf import settings
@@ -15,14 +16,23 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.utils.urls import replace_query_param
 from django.http import JsonResponse
+from django.urls import reverse
 import cv2
 import numpy as np
 
 from .models import LicensePlateDetection
 from .license_plate_detector import detector
 from .nepali_ocr import ocr
+from .utils import (
+    detect_license_plates_batch,
+    queue_license_plate_detection,
+    read_image,
+    wants_async_detection
+)
 from vehicles.models import Vehicle
+from core.pagination import paginate_keyset, InvalidCursor
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -34,6 +44,10 @@ def detect_license_plate(request):
     """
     API endpoint for detecting license plates in an image.
     
+    With async=1 the image is stored as a pending detection and processed by
+    a Celery worker; poll the status URL or subscribe to the WebSocket URL
+    in the response for the result.
+    
     Args:
         request: HTTP request with image file
         
@@ -46,52 +60,147 @@ def detect_license_plate(request):
             
         image_file = request.FILES['image']
         
-        # Save the uploaded image temporarily
-        temp_path = default_storage.save(
-            f'temp/plates/{image_file.name}',
-            ContentFile(image_file.read())
-        )
+        if wants_async_detection(request):
+            return queued_detection_response(request, image_file)
         
-        try:
-            # Read the image
-            image = cv2.imread(temp_path)
-            if image is None:
-                return JsonResponse({'error': 'Could not read image file'}, status=400)
+        # Decode the upload in memory instead of round-tripping through storage
+        image = read_image(image_file)
+        if image is None:
+            return JsonResponse({'error': 'Could not read image file'}, status=400)
+        
+        # Same detector the queued Celery path uses
+        result = detector.detect_plate(image)
+        
+        if not result['success']:
+            return JsonResponse({'error': result['error']}, status=400)
             
-            # Process the image
-            result = detector.process_image(image)
+        # Get vehicle details if available
+        license_plate = result['license_plate']
+        try:
+            vehicle = Vehicle.objects.get(license_plate=license_plate)
+            result['vehicle'] = {
+                'id': vehicle.id,
+                'owner_name': vehicle.owner_name,
+                'make': vehicle.make,
+                'model': vehicle.model,
+                'year': vehicle.year,
+                'color': vehicle.color,
+                'registration_number': vehicle.registration_number,
+                'registration_expiry': vehicle.registration_expiry.isoformat() if vehicle.registration_expiry else None,
+                'violations_count': vehicle.violation_set.count(),
+                'is_reported_stolen': vehicle.is_reported_stolen,
+                'tax_clearance': vehicle.tax_clearance
+            }
+        except Vehicle.DoesNotExist:
+            result['vehicle'] = None
             
-            if not result['success']:
-                return JsonResponse({'error': result['error']}, status=400)
+        return JsonResponse(result)
                 
-            # Get vehicle details if available
-            license_plate = result['license_plate']
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+
+
+def queued_detection_response(request, image_file):
+    """
+    Queue an uploaded image for background detection.
+    
+    Args:
+        request: HTTP request
+        image_file: Uploaded image file
+        
+    Returns:
+        202 JSON response with the pending detection id and where to follow it
+    """
+    location_data = {
+        'latitude': request.data.get('latitude'),
+        'longitude': request.data.get('longitude'),
+        'location_name': request.data.get('location_name')
+    }
+    
+    with transaction.atomic():
+        detection = queue_license_plate_detection(request.user, image_file, location_data)
+    
+    return JsonResponse({
+        'id': detection.id,
+        'status': detection.status,
+        'status_url': request.build_absolute_uri(
+            reverse('ocr:detection_status', args=[detection.id])
+        ),
+        'websocket_url': f'/ws/ocr/detections/{detection.id}/'
+    }, status=202)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def detect_license_plate_batch(request):
+    """
+    API endpoint for detecting license plates in several images at once.
+    
+    Images can be sent as repeated 'images' multipart fields or as a single
+    'archive' zip file. Detection runs in parallel and the results are
+    returned in upload order.
+    
+    Args:
+        request: HTTP request with image files
+        
+    Returns:
+        JSON response with one result per image
+    """
+    max_images = getattr(settings, 'OCR_BATCH_MAX_IMAGES', 50)
+    max_image_bytes = getattr(settings, 'OCR_BATCH_MAX_IMAGE_BYTES', 10 * 1024 * 1024)
+    max_archive_bytes = getattr(settings, 'OCR_BATCH_MAX_ARCHIVE_BYTES', 100 * 1024 * 1024)
+    too_many = JsonResponse(
+        {'error': f'Too many images, at most {max_images} per request'},
+        status=400
+    )
+    
+    try:
+        uploads = request.FILES.getlist('images')
+        if len(uploads) > max_images:
+            return too_many
+        images = [(f.name, f.read()) for f in uploads]
+        
+        if 'archive' in request.FILES:
             try:
-                vehicle = Vehicle.objects.get(license_plate=license_plate)
-                result['vehicle'] = {
-                    'id': vehicle.id,
-                    'owner_name': vehicle.owner_name,
-                    'make': vehicle.make,
-                    'model': vehicle.model,
-                    'year': vehicle.year,
-                    'color': vehicle.color,
-                    'registration_number': vehicle.registration_number,
-                    'registration_expiry': vehicle.registration_expiry.isoformat() if vehicle.registration_expiry else None,
-                    'violations_count': vehicle.violation_set.count(),
-                    'is_reported_stolen': vehicle.is_reported_stolen,
-                    'tax_clearance': vehicle.tax_clearance
-                }
-            except Vehicle.DoesNotExist:
-                result['vehicle'] = None
-                
-            return JsonResponse(result)
-            
-        finally:
-            # Clean up the temporary file
-            if temp_path:
-                default_storage.delete(temp_path)
-                
+                with zipfile.ZipFile(request.FILES['archive']) as archive:
+                    entries = sorted(
+                        (info for info in archive.infolist() if not info.is_dir()),
+                        key=lambda i: i.filename
+                    )
+                    if len(images) + len(entries) > max_images:
+                        return too_many
+                    
+                    # Check declared sizes before decompressing anything, so a
+                    # small archive cannot expand into gigabytes; zipfile stops
+                    # reading an entry at its declared size
+                    oversized = [info.filename for info in entries if info.file_size > max_image_bytes]
+                    if oversized:
+                        return JsonResponse(
+                            {'error': f'Archive entry {oversized[0]} exceeds {max_image_bytes} bytes'},
+                            status=400
+                        )
+                    if sum(info.file_size for info in entries) > max_archive_bytes:
+                        return JsonResponse(
+                            {'error': f'Archive expands to more than {max_archive_bytes} bytes'},
+                            status=400
+                        )
+                    
+                    images.extend((info.filename, archive.read(info)) for info in entries)
+            except zipfile.BadZipFile:
+                return JsonResponse({'error': 'Invalid zip archive'}, status=400)
+        
+        if not images:
+            return JsonResponse({'error': 'No image files provided'}, status=400)
+        
+        results = detect_license_plates_batch(images)
+        
+        return JsonResponse({
+            'count': len(results),
+            'results': results
+        })
+        
     except Exception as e:
+        logger.exception("Error in batch plate detection: %s", str(e))
         return JsonResponse({'error': str(e)}, status=500)
 
 
@@ -251,17 +360,19 @@ def detection_list(request):
         show_all = request.user.is_staff and request.query_params.get('show_all') == '1'
         
         if show_all:
-            detections = LicensePlateDetection.objects.all().order_by('-created_at')
+            detections = LicensePlateDetection.objects.all()
         else:
-            detections = LicensePlateDetection.objects.filter(
-                user=request.user
-            ).order_by('-created_at')
+            detections = LicensePlateDetection.objects.filter(user=request.user)
+        detections = detections.select_related('matched_vehicle')
         
-        # Pagination
-        from rest_framework.pagination import PageNumberPagination
-        paginator = PageNumberPagination()
-        paginator.page_size = 20
-        result_page = paginator.paginate_queryset(detections, request)
+        # Keyset pagination on (created_at, id): deep pages cost the same as
+        # the first one, unlike offset pagination
+        try:
+            result_page = paginate_keyset(
+                detections, request.query_params.get('cursor'), 20, ordering=('-created_at', '-id')
+            )
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         # Serialize detections
         detection_data = []
@@ -283,7 +394,7 @@ def detection_list(request):
             if detection.cropped_plate:
                 data['cropped_plate'] = request.build_absolute_uri(detection.cropped_plate.url)
             
-            if detection.matched_vehicle:
+            if detection.matched_vehicle_id:
                 data['vehicle'] = {
                     'id': detection.matched_vehicle.id,
                     'license_plate': detection.matched_vehicle.license_plate,
@@ -291,7 +402,12 @@ def detection_list(request):
             
             detection_data.append(data)
         
-        return paginator.get_paginated_response(detection_data)
+        url = request.build_absolute_uri()
+        return Response({
+            'next': replace_query_param(url, 'cursor', result_page.next_cursor) if result_page.has_next else None,
+            'previous': replace_query_param(url, 'cursor', result_page.previous_cursor) if result_page.has_previous else None,
+            'results': detection_data,
+        })
     
     except Exception as e:
         logger.exception("Error listing detections: %s", str(e))
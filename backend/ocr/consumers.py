@@ -0,0 +1,85 @@
+"""
+WebSocket consumers for license plate detection updates.
+"""
+import json
+import logging
+
+from channels.generic.websocket import AsyncWebsocketConsumer
+from channels.db import database_sync_to_async
+
+from .models import LicensePlateDetection
+
+logger = logging.getLogger(__name__)
+
+
+class DetectionStatusConsumer(AsyncWebsocketConsumer):
+    """
+    WebSocket consumer that streams status changes of a queued detection.
+    """
+    async def connect(self):
+        """Handle WebSocket connection."""
+        self.user = self.scope.get('user')
+        self.detection_id = self.scope['url_route']['kwargs']['detection_id']
+        
+        # Authenticate user
+        if not self.user or not self.user.is_authenticated:
+            logger.warning("Unauthorized detection status connection attempt")
+            await self.close()
+            return False
+        
+        detection = await self.get_detection()
+        if detection is None:
+            await self.close()
+            return False
+        
+        # Join the group the Celery task publishes to
+        self.detection_group = f'ocr_detection_{self.detection_id}'
+        await self.channel_layer.group_add(
+            self.detection_group,
+            self.channel_name
+        )
+        
+        await self.accept()
+        
+        # Send the current state so clients don't miss an update that
+        # happened before they subscribed
+        await self.send(text_data=json.dumps({
+            'type': 'detection_update',
+            'detection': detection
+        }))
+
+    async def disconnect(self, close_code):
+        """Handle WebSocket disconnection."""
+        if hasattr(self, 'detection_group'):
+            await self.channel_layer.group_discard(
+                self.detection_group,
+                self.channel_name
+            )
+
+    async def detection_update(self, event):
+        """Forward a detection update to the client."""
+        await self.send(text_data=json.dumps({
+            'type': 'detection_update',
+            'detection': event['detection']
+        }))
+
+    @database_sync_to_async
+    def get_detection(self):
+        """Return the detection as a dict if the user may view it."""
+        try:
+            detection = LicensePlateDetection.objects.get(id=self.detection_id)
+        except LicensePlateDetection.DoesNotExist:
+            return None
+        
+        if detection.user_id != self.user.id and not self.user.is_staff:
+            logger.warning(f"User {self.user.username} attempted to watch detection {self.detection_id}")
+            return None
+        
+        return {
+            'id': detection.id,
+            'status': detection.status,
+            'detected_text': detection.detected_text,
+            'confidence': detection.confidence,
+            'processing_time_ms': detection.processing_time_ms,
+            'matched_vehicle': detection.matched_vehicle_id,
+        }
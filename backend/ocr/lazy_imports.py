@@ -0,0 +1,71 @@
+"""
+Deferred imports for heavy ML frameworks.
+
+TensorFlow, EasyOCR and Ultralytics take seconds to import. Modules that
+only need them on an inference path bind a LazyModule at import time and the
+real import happens on first attribute access:
+
+    from ocr.lazy_imports import lazy_import, module_available
+
+    tf = lazy_import('tensorflow')
+    TF_AVAILABLE = module_available('tensorflow')
+
+so `manage.py` commands, tests, web workers and Celery workers that never run
+inference do not pay for them.
+"""
+import importlib
+import importlib.util
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class LazyModule:
+    """Proxy that imports a module the first time one of its attributes is used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    logger.debug("Importing %s on first use", self._name)
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def is_loaded(self):
+        """Whether the underlying module has been imported yet."""
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+_lazy_modules = {}
+_lazy_modules_lock = threading.Lock()
+
+
+def lazy_import(name):
+    """Return a shared LazyModule for the dotted module name."""
+    with _lazy_modules_lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = _lazy_modules[name] = LazyModule(name)
+        return module
+
+
+def module_available(name):
+    """Check whether a module is installed without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
@@ -4,6 +4,7 @@ This module handles the detection and recognition of Nepali license plates in im
 """
 import logging
 import os
+import sys
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 import traceback
@@ -11,9 +12,15 @@ import traceback
 import cv2
 import numpy as np
 from django.conf import settings
-from ultralytics import YOLO
-import tensorflow as tf
-from .text_recognizer import TextRecognizer
+from .lazy_imports import lazy_import
+from .registry import registry
+
+# Ultralytics pulls in torch, so import it only when a detector is built
+ultralytics = lazy_import('ultralytics')
+
+# Shared image decoding lives next to optimized_ocr in the project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from ocr_engine import read_image
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -33,7 +40,7 @@ class NepaliLicensePlateDetector:
     Uses YOLOv8 for detection and a custom CNN for text recognition.
     """
     
-    def __init__(self):
+    def __init__(self, yolo_model_path=None):
         self.text_recognizer = None
         self.yolo_model = None
         self.is_mock = True  # Default to mock mode for safety
@@ -41,7 +48,7 @@ class NepaliLicensePlateDetector:
         try:
             # Initialize text recognizer with graceful fallback
             try:
-                self.text_recognizer = TextRecognizer()
+                self.text_recognizer = registry.get('text_recognizer')
                 logger.info("Text recognizer initialized")
             except Exception as e:
                 logger.error(f"Failed to initialize text recognizer: {str(e)}")
@@ -51,7 +58,10 @@ class NepaliLicensePlateDetector:
             try:
                 # Create path to the YOLO model using pathlib for better platform compatibility
                 current_dir = Path(__file__).resolve().parent
-                model_path = current_dir / 'models' / 'yolov8_nepali_plate.pt'
+                if yolo_model_path:
+                    model_path = Path(yolo_model_path)
+                else:
+                    model_path = current_dir / 'models' / 'yolov8_nepali_plate.pt'
                 
                 # Log the full path we're trying to use
                 logger.info(f"Attempting to load YOLO model from: {model_path}")
@@ -60,7 +70,7 @@ class NepaliLicensePlateDetector:
                 if model_path.exists():
                     logger.info(f"Model file exists at: {model_path}")
                     try:
-                        self.yolo_model = YOLO(str(model_path))
+                        self.yolo_model = ultralytics.YOLO(str(model_path))
                         if self.yolo_model is not None:
                             self.is_mock = False  # Model loaded successfully
                             logger.info(f"YOLO model loaded successfully from {model_path}")
@@ -162,13 +172,40 @@ class NepaliLicensePlateDetector:
                 'error': str(e)
             }
 
+    def detect_plates(self, image):
+        """
+        Locate every license plate in a decoded image.
+
+        Args:
+            image: Decoded BGR image
+
+        Returns:
+            List of {'bbox': [x1, y1, x2, y2], 'confidence': float}, most
+            confident first
+        """
+        if self.is_mock or self.yolo_model is None:
+            return [{'bbox': [100, 100, 300, 150], 'confidence': 0.95}]
+
+        results = self.yolo_model(image)
+        if len(results) == 0:
+            return []
+
+        height, width = image.shape[:2]
+        plates = []
+        for box in results[0].boxes:
+            x1, y1, x2, y2 = map(int, box.xyxy[0])
+            x1, y1 = max(0, x1), max(0, y1)
+            x2, y2 = min(width, x2), min(height, y2)
+            if x2 > x1 and y2 > y1:
+                plates.append({'bbox': [x1, y1, x2, y2], 'confidence': float(box.conf[0])})
+        plates.sort(key=lambda plate: plate['confidence'], reverse=True)
+        return plates
+
     def _read_image(self, image_file):
         """Read and preprocess image"""
         try:
-            # Read image file into numpy array
-            image_array = np.frombuffer(image_file.read(), np.uint8)
-            image = cv2.imdecode(image_array, cv2.IMREAD_COLOR)
-            return image
+            # Decode paths, uploads, bytes or arrays without temp files
+            return read_image(image_file)
         except Exception as e:
             logger.error(f"Error reading image: {str(e)}")
             return None
@@ -190,20 +227,30 @@ class NepaliLicensePlateDetector:
             raise
 
     def process_image(self, image_path):
-        """Process an image to detect and recognize license plates."""
+        """Process an image (path, bytes, upload or array) to detect and recognize license plates."""
         try:
             # Read image
-            image = cv2.imread(image_path)
+            image = read_image(image_path)
             if image is None:
-                raise ValueError(f"Could not read image: {image_path}")
+                raise ValueError("Could not read image")
             
-            # Detect plates
-            plates = self.detect_plate(image)
+            # Detect every plate
+            plates = self.detect_plates(image)
+            if self.text_recognizer is None:
+                return [
+                    dict(plate, text='BA 1 PA 1234', text_confidence=plate['confidence'] * 100)
+                    for plate in plates
+                ]
             
-            results = []
+            # Recognize every plate in one batched pass
+            crops = []
             for plate in plates:
-                # Recognize text for each plate
-                text_result = self.recognize_text(image, plate['bbox'])
+                x1, y1, x2, y2 = plate['bbox']
+                crops.append(self._preprocess_plate(image[y1:y2, x1:x2]))
+            text_results = self.text_recognizer.recognize_batch(crops)
+            
+            results = []
+            for plate, text_result in zip(plates, text_results):
                 results.append({
                     'bbox': plate['bbox'],
                     'confidence': plate['confidence'],
@@ -247,5 +294,5 @@ class NepaliLicensePlateDetector:
             return plate_img
 
 
-# Singleton instance
-detector = NepaliLicensePlateDetector()
\ No newline at end of file
+# Shared instance, built on first use by the model registry
+detector = registry.proxy('plate_detector')
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='licenseplatedetection',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('success', 'Success'), ('failed', 'Failed'), ('manual', 'Manual Entry')], default='failed', max_length=20, verbose_name='Status'),
+        ),
+    ]
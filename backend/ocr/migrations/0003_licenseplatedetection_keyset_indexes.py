@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ocr', '0002_alter_licenseplatedetection_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='licenseplatedetection',
+            index=models.Index(fields=['-created_at', '-id'], name='detection_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='licenseplatedetection',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='detection_user_created_id_idx'),
+        ),
+    ]
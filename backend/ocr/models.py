@@ -14,6 +14,8 @@ except ImportError:
 class LicensePlateDetection(models.Model):
     """Records of license plate detections."""
     class Status(models.TextChoices):
+        PENDING = 'pending', _('Pending')
+        PROCESSING = 'processing', _('Processing')
         SUCCESS = 'success', _('Success')
         FAILED = 'failed', _('Failed')
         MANUAL = 'manual', _('Manual Entry')
@@ -106,6 +108,11 @@ class LicensePlateDetection(models.Model):
         verbose_name = _('License Plate Detection')
         verbose_name_plural = _('License Plate Detections')
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of detection listings on (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='detection_created_id_idx'),
+            models.Index(fields=['user', '-created_at', '-id'], name='detection_user_created_id_idx'),
+        ]
     
     def __str__(self):
         text = self.corrected_text or self.detected_text or 'Unknown'
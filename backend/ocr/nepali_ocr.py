@@ -4,42 +4,36 @@ This module handles text recognition from license plate images.
 """
 import logging
 import os
+import sys
 import time
 from pathlib import Path
 from typing import Dict, Any, Tuple, List, Optional, Union
 
 import cv2
 import numpy as np
-import pytesseract
 from django.conf import settings
 
 # Local imports
 from .license_plate_detector import detector
+from .lazy_imports import module_available
+from .registry import registry
+
+# Shared Tesseract engine pool lives next to optimized_ocr in the project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from ocr_engine import get_engine, engine_available, read_image
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Check if pytesseract is installed
-try:
-    pytesseract.get_tesseract_version()
-    TESSERACT_AVAILABLE = True
-except Exception as e:
-    logger.warning("Pytesseract not available or Tesseract not installed: %s", str(e))
-    TESSERACT_AVAILABLE = False
+# Check if a Tesseract backend is installed
+TESSERACT_AVAILABLE = engine_available()
+if not TESSERACT_AVAILABLE:
+    logger.warning("No Tesseract backend available (install tesserocr, or pytesseract and the tesseract binary)")
 
-# Try to import tensorflow if available
-try:
-    import tensorflow as tf
-    tf.config.list_physical_devices('GPU')
-    TF_AVAILABLE = True
-    logger.info("TensorFlow available, using version: %s", tf.__version__)
-except ImportError:
+# Only check that TensorFlow is installed; _try_load_model imports it on demand
+TF_AVAILABLE = module_available('tensorflow')
+if not TF_AVAILABLE:
     logger.warning("TensorFlow not available, using fallback OCR method")
-    TF_AVAILABLE = False
-except Exception as e:
-    logger.warning("Error initializing TensorFlow: %s", str(e))
-    TF_AVAILABLE = False
-
 
 class NepaliOCR:
     """
@@ -88,12 +82,13 @@ class NepaliOCR:
         except Exception as e:
             logger.exception("Error setting up mock OCR model: %s", str(e))
     
-    def recognize(self, image_path: Union[str, Path]) -> Dict[str, Any]:
+    def recognize(self, image_path: Union[str, Path, bytes, np.ndarray]) -> Dict[str, Any]:
         """
         Recognize text from an image containing a license plate.
         
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the image as bytes, an
+                uploaded file or a decoded numpy array
             
         Returns:
             Dict containing recognition results:
@@ -106,8 +101,23 @@ class NepaliOCR:
         start_time = time.time()
         
         try:
+            # Decode the image once, in memory for buffers and uploads
+            image = read_image(image_path)
+            if image is None:
+                processing_time = int((time.time() - start_time) * 1000)
+                
+                return {
+                    'success': False,
+                    'text': '',
+                    'confidence': 0,
+                    'plate_image': None,
+                    'bbox': None,
+                    'processing_time_ms': processing_time,
+                    'error': 'Failed to read image'
+                }
+            
             # First detect the license plate in the image
-            detection_result = self.detector.detect(image_path)
+            detection_result = self.detector.detect(image)
             
             if not detection_result['success'] or not detection_result['plates']:
                 processing_time = int((time.time() - start_time) * 1000)
@@ -221,11 +231,7 @@ class NepaliOCR:
             config = '--oem 1 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'
             
             # Perform OCR
-            ocr_result = pytesseract.image_to_data(
-                plate_img,
-                config=config,
-                output_type=pytesseract.Output.DICT
-            )
+            ocr_result = get_engine().image_to_data(plate_img, config=config)
             
             # Extract recognized text and confidence
             text_parts = []
@@ -297,5 +303,5 @@ class NepaliOCR:
         return processed_text
 
 
-# Singleton instance
-ocr = NepaliOCR()
\ No newline at end of file
+# Shared instance, built on first use by the model registry
+ocr = registry.proxy('nepali_ocr')
\ No newline at end of file
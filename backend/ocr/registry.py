@@ -0,0 +1,252 @@
+"""
+Process-wide registry for OCR and AI models.
+
+Each model (YOLO plate detector, CNN text recognizer, EasyOCR reader,
+TensorFlow violation detector, ...) is built at most once per process, on
+first use, and cached against the active OCRModel row of its model type.
+When ocr_model_saved activates a new version the cached instance is dropped
+(and closed, if it has a close() method) and the next caller builds the new
+one. Other processes notice the change the next time they re-check the
+active row (every OCR_MODEL_REGISTRY_TTL seconds).
+
+Usage:
+    from ocr.registry import registry
+    recognizer = registry.get('text_recognizer')
+
+Modules that used to build a model at import time expose a lazy proxy
+instead, e.g. ``detector = registry.proxy('plate_detector')``.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ModelSpec:
+    """How to build one registered model."""
+
+    def __init__(self, name, factory, model_type=None):
+        self.name = name
+        self.factory = factory
+        self.model_type = model_type
+
+
+class LazyModel:
+    """
+    Stand-in for a module-level model instance.
+
+    Attribute access resolves the current instance from the registry, so
+    importing a module does not load the model and hot-swapped versions are
+    picked up automatically.
+    """
+
+    def __init__(self, registry, name):
+        object.__setattr__(self, '_registry', registry)
+        object.__setattr__(self, '_name', name)
+
+    def __getattr__(self, attr):
+        return getattr(self._registry.get(self._name), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._registry.get(self._name), attr, value)
+
+    def __call__(self, *args, **kwargs):
+        return self._registry.get(self._name)(*args, **kwargs)
+
+    def __repr__(self):
+        return f"<LazyModel {self._name}>"
+
+
+class ModelRegistry:
+    """Lazily builds and caches model instances keyed by the active OCRModel."""
+
+    def __init__(self):
+        self._specs = {}
+        self._instances = {}
+        self._active = {}
+        self._lock = threading.RLock()
+
+    def register(self, name, factory, model_type=None):
+        """
+        Register a model factory.
+
+        Args:
+            name: Registry key used by get()
+            factory: Callable taking the active OCRModel (or None) and
+                returning the model instance
+            model_type: OCRModel.ModelType the model follows for versioning
+        """
+        with self._lock:
+            self._specs[name] = ModelSpec(name, factory, model_type)
+            self._release(self._instances.pop(name, None))
+
+    def proxy(self, name):
+        """Return a LazyModel that resolves name on first use."""
+        return LazyModel(self, name)
+
+    def get(self, name):
+        """
+        Return the model registered under name, building it on first use.
+
+        Raises:
+            KeyError: If no model is registered under name
+        """
+        spec = self._specs[name]
+        active = self._active_model(spec.model_type)
+        key = self._model_key(active)
+
+        cached = self._instances.get(name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        with self._lock:
+            cached = self._instances.get(name)
+            if cached is not None and cached[0] == key:
+                return cached[1]
+
+            start_time = time.time()
+            instance = spec.factory(active)
+            self._instances[name] = (key, instance)
+            self._release(cached)
+            logger.info(
+                "Loaded model %s (%s) in %.0f ms",
+                name,
+                f"{active.name} v{active.version}" if active else "default",
+                (time.time() - start_time) * 1000
+            )
+            return instance
+
+    def is_loaded(self, name):
+        """Check whether a model has already been built in this process."""
+        return name in self._instances
+
+    def activate(self, ocr_model):
+        """
+        Record a newly activated OCRModel and drop instances built for the
+        previous version of its type.
+        """
+        with self._lock:
+            self._active[ocr_model.model_type] = (ocr_model, time.monotonic())
+            self._drop(ocr_model.model_type)
+
+    def deactivate(self, ocr_model):
+        """Drop cached instances if ocr_model was the active version of its type."""
+        with self._lock:
+            cached = self._active.get(ocr_model.model_type)
+            if cached is not None and cached[0] is not None and cached[0].pk == ocr_model.pk:
+                self._active.pop(ocr_model.model_type, None)
+                self._drop(ocr_model.model_type)
+
+    def invalidate(self, model_type=None):
+        """
+        Forget cached instances and active rows.
+
+        Args:
+            model_type: Only invalidate models of this type (default: all)
+        """
+        with self._lock:
+            if model_type is None:
+                self._active.clear()
+                for cached in self._instances.values():
+                    self._release(cached)
+                self._instances.clear()
+            else:
+                self._active.pop(model_type, None)
+                self._drop(model_type)
+
+    def _drop(self, model_type):
+        for name, spec in self._specs.items():
+            if spec.model_type == model_type:
+                self._release(self._instances.pop(name, None))
+
+    def _release(self, cached):
+        """Close a dropped (key, instance) entry so it stops holding its model."""
+        if cached is None:
+            return
+        close = getattr(cached[1], 'close', None)
+        if callable(close):
+            try:
+                close()
+            except Exception as e:
+                logger.warning("Error closing dropped model instance: %s", str(e))
+
+    def _model_key(self, ocr_model):
+        if ocr_model is None:
+            return None
+        return (ocr_model.pk, ocr_model.version, ocr_model.file_path)
+
+    def _active_model(self, model_type):
+        if model_type is None:
+            return None
+
+        ttl = getattr(settings, 'OCR_MODEL_REGISTRY_TTL', 60)
+        cached = self._active.get(model_type)
+        if cached is not None and time.monotonic() - cached[1] < ttl:
+            return cached[0]
+
+        try:
+            from .models import OCRModel
+            ocr_model = OCRModel.objects.filter(model_type=model_type, is_active=True).first()
+        except Exception as e:
+            # Database not ready (migrations, management commands, scripts)
+            logger.debug("Could not look up active %s model: %s", model_type, str(e))
+            ocr_model = cached[0] if cached else None
+
+        self._active[model_type] = (ocr_model, time.monotonic())
+        return ocr_model
+
+
+def _model_path(ocr_model):
+    """File path of an OCRModel version, if one is set."""
+    return ocr_model.file_path if ocr_model is not None and ocr_model.file_path else None
+
+
+def _build_plate_detector(ocr_model):
+    from .license_plate_detector import NepaliLicensePlateDetector
+    return NepaliLicensePlateDetector(yolo_model_path=_model_path(ocr_model))
+
+
+def _build_text_recognizer(ocr_model):
+    from .text_recognizer import TextRecognizer
+    return TextRecognizer(model_path=_model_path(ocr_model))
+
+
+def _build_nepali_ocr(ocr_model):
+    from .nepali_ocr import NepaliOCR
+    return NepaliOCR()
+
+
+def _build_easyocr_reader(ocr_model):
+    import easyocr
+    return easyocr.Reader(['ne', 'en'], gpu=False)
+
+
+def _build_character_model(ocr_model):
+    # Unversioned: recognition OCRModel rows hold TextRecognizer weights,
+    # which do not fit the services' 34-class character CNN
+    from .services import load_character_model
+    return load_character_model()
+
+
+def _build_ai_plate_recognizer(ocr_model):
+    from ai.license_plate_recognition import LicensePlateRecognizer
+    return LicensePlateRecognizer()
+
+
+def _build_violation_detector(ocr_model):
+    from ai.violation_detection import ViolationDetector
+    return ViolationDetector()
+
+
+registry = ModelRegistry()
+
+registry.register('plate_detector', _build_plate_detector, 'detection')
+registry.register('text_recognizer', _build_text_recognizer, 'recognition')
+registry.register('nepali_ocr', _build_nepali_ocr, 'combined')
+registry.register('easyocr_reader', _build_easyocr_reader)
+registry.register('character_model', _build_character_model)
+registry.register('ai_plate_recognizer', _build_ai_plate_recognizer)
+registry.register('violation_detector', _build_violation_detector)
@@ -0,0 +1,11 @@
+"""
+WebSocket routing configuration for the OCR app.
+"""
+
+from django.urls import path
+
+from . import consumers
+
+websocket_urlpatterns = [
+    path('ws/ocr/detections/<int:detection_id>/', consumers.DetectionStatusConsumer.as_asgi()),
+]
@@ -2,36 +2,66 @@ import os
 import cv2
 import numpy as np
 import time
-import tensorflow as tf
-import easyocr
 from django.conf import settings
 from pathlib import Path
 import requests
 import json
 import logging
+import sys
+
+# Shared image decoding lives next to optimized_ocr in the project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from ocr_engine import read_image
+
+from .lazy_imports import lazy_import
+from .registry import registry
+
+# TensorFlow is imported when the character model is first loaded
+tf = lazy_import('tensorflow')
 
 logger = logging.getLogger(__name__)
 
+def load_character_model(model_path=None):
+    """
+    Load the per-character TensorFlow model used by LicensePlateOCR.
+    
+    Args:
+        model_path: Model file to load instead of the default one
+        
+    Returns:
+        The Keras model, or None if it is missing or fails to load
+    """
+    try:
+        model_path = model_path or os.path.join(settings.BASE_DIR, 'models', 'nepali_license_plate_model.h5')
+        if os.path.exists(model_path):
+            model = tf.keras.models.load_model(model_path)
+            logger.info("Local TensorFlow model loaded successfully")
+            return model
+        logger.warning(f"Model file not found at {model_path}")
+    except Exception as e:
+        logger.error(f"Failed to load TensorFlow model: {str(e)}")
+    return None
+
+
 class LicensePlateOCR:
     """License plate detection and OCR service."""
     
     def __init__(self):
-        # Initialize EasyOCR reader for Nepali language
-        self.reader = easyocr.Reader(['ne', 'en'], gpu=False)
-        
-        # Load TensorFlow model
-        try:
-            model_path = os.path.join(settings.BASE_DIR, 'models', 'nepali_license_plate_model.h5')
-            if os.path.exists(model_path):
-                self.local_model = tf.keras.models.load_model(model_path)
-                self.character_mapping = self._load_character_mapping()
-                logger.info("Local TensorFlow model loaded successfully")
-            else:
-                self.local_model = None
-                logger.warning(f"Model file not found at {model_path}")
-        except Exception as e:
-            self.local_model = None
-            logger.error(f"Failed to load TensorFlow model: {str(e)}")
+        # The EasyOCR reader and TensorFlow model are shared through the
+        # model registry, so creating a service per request is cheap
+        self.character_mapping = self._load_character_mapping()
+        # Class index -> character lookup used to decode predictions in bulk
+        self.character_lookup = np.array([self.character_mapping[i] for i in range(len(self.character_mapping))])
+    
+    @property
+    def reader(self):
+        """EasyOCR reader for Nepali and English, loaded once per process."""
+        return registry.get('easyocr_reader')
+    
+    @property
+    def local_model(self):
+        """Local character model, or None if it is not available."""
+        return registry.get('character_model')
     
     def _load_character_mapping(self):
         """Load character mapping for model predictions."""
@@ -105,64 +135,62 @@ class LicensePlateOCR:
         return gray, None
     
     def segment_characters(self, plate_img):
-        """Segment characters from license plate."""
+        """
+        Segment characters from license plate.
+        
+        Returns:
+            Array of shape (N, 32, 32) (or (N, 32, 32, 3) for colour plates)
+            with the characters ordered left to right, or None if no
+            characters were found
+        """
         # Preprocess
         processed = self.preprocess_image(plate_img)
         
-        # Find contours
-        contours, _ = cv2.findContours(processed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        # Label connected blobs and get their bounding boxes in one pass
+        _, _, stats, _ = cv2.connectedComponentsWithStats(processed, connectivity=8)
+        boxes = stats[1:, :4]  # Drop the background label
         
-        # Filter and sort contours (left to right)
-        char_contours = []
-        for contour in contours:
-            x, y, w, h = cv2.boundingRect(contour)
-            if h > 10 and w > 5 and h/plate_img.shape[0] > 0.4:  # Filter out small contours
-                char_contours.append((x, y, w, h))
-        
-        # Sort contours from left to right
-        char_contours.sort(key=lambda x: x[0])
-        
-        # Extract character images
-        char_images = []
-        for x, y, w, h in char_contours:
-            char_img = plate_img[y:y+h, x:x+w]
-            # Resize to match model input
-            resized = cv2.resize(char_img, (32, 32))
-            char_images.append(resized)
+        # Filter out small blobs with boolean masks instead of a Python loop
+        widths = boxes[:, cv2.CC_STAT_WIDTH]
+        heights = boxes[:, cv2.CC_STAT_HEIGHT]
+        keep = (heights > 10) & (widths > 5) & (heights / plate_img.shape[0] > 0.4)
+        boxes = boxes[keep]
+        if len(boxes) == 0:
+            return None
+        
+        # Sort boxes from left to right
+        boxes = boxes[np.argsort(boxes[:, cv2.CC_STAT_LEFT], kind='stable')]
+        
+        # Resize every crop straight into one preallocated model input array
+        char_images = np.empty((len(boxes), 32, 32) + plate_img.shape[2:], dtype=plate_img.dtype)
+        for i, (x, y, w, h) in enumerate(boxes):
+            cv2.resize(plate_img[y:y+h, x:x+w], (32, 32), dst=char_images[i])
             
-        return char_images if char_images else None
+        return char_images
     
     def process_with_local_model(self, char_images):
-        """Process character images with local TensorFlow model."""
-        if not self.local_model or not char_images:
+        """Classify all segmented characters with a single local model call."""
+        if not self.local_model or char_images is None or len(char_images) == 0:
             return None
-            
-        results = []
-        for char_img in char_images:
-            # Convert to RGB if grayscale
-            if len(char_img.shape) == 2:
-                char_img = cv2.cvtColor(char_img, cv2.COLOR_GRAY2RGB)
-                
-            # Prepare input for model
-            img_array = np.expand_dims(char_img, axis=0)
-            
-            # Predict
-            predictions = self.local_model.predict(img_array, verbose=0)
-            class_idx = np.argmax(predictions, axis=1)[0]
-            confidence = np.max(predictions)
-            
-            # Get character
-            if class_idx in self.character_mapping:
-                char = self.character_mapping[class_idx]
-                results.append((char, confidence))
-                
+        
+        # The model expects RGB input
+        if char_images.ndim == 3:
+            char_images = np.repeat(char_images[..., np.newaxis], 3, axis=-1)
+        
+        # Predict every character in one forward pass
+        predictions = self.local_model.predict(char_images, verbose=0)
+        class_idx = np.argmax(predictions, axis=1)
+        confidences = np.max(predictions, axis=1)
+        
+        # Drop classes outside the character mapping
+        known = class_idx < len(self.character_lookup)
+        if not known.any():
+            return None
+        
         # Combine characters
-        if results:
-            text = ''.join([char for char, _ in results])
-            avg_confidence = sum([conf for _, conf in results]) / len(results)
-            return text, avg_confidence
-            
-        return None
+        text = ''.join(self.character_lookup[class_idx[known]])
+        avg_confidence = float(confidences[known].mean())
+        return text, avg_confidence
     
     def process_with_easyocr(self, img):
         """Process image with EasyOCR."""
@@ -197,14 +225,21 @@ class LicensePlateOCR:
             logger.error(f"Error in AI API processing: {str(e)}")
             return None
     
+    def _encode_image(self, img_path):
+        """Base64 encode an image given as a path or raw bytes."""
+        import base64
+        
+        if isinstance(img_path, (bytes, bytearray, memoryview)):
+            return base64.b64encode(img_path).decode('utf-8')
+        with open(img_path, "rb") as image_file:
+            return base64.b64encode(image_file.read()).decode('utf-8')
+    
     def _process_with_claude(self, img_path):
         """Process image with Claude API."""
-        import base64
         from anthropic import Anthropic
         
         # Read image and encode as base64
-        with open(img_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+        base64_image = self._encode_image(img_path)
             
         # Initialize Claude client
         client = Anthropic(api_key=settings.ANTHROPIC_API_KEY)
@@ -241,12 +276,10 @@ class LicensePlateOCR:
     
     def _process_with_openai(self, img_path):
         """Process image with OpenAI API."""
-        import base64
         from openai import OpenAI
         
         # Read image and encode as base64
-        with open(img_path, "rb") as image_file:
-            base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+        base64_image = self._encode_image(img_path)
             
         # Initialize OpenAI client
         client = OpenAI(api_key=settings.OPENAI_API_KEY)
@@ -280,16 +313,24 @@ class LicensePlateOCR:
         return license_plate_text, 0.95  # Assuming high confidence
     
     def extract_license_plate(self, img_path, internet_available=True):
-        """Main method to extract license plate from image."""
-        # Check if file exists
-        if not os.path.exists(img_path):
-            logger.error(f"Image file not found: {img_path}")
-            return None, 0
+        """
+        Main method to extract license plate from image.
+        
+        img_path may be a file path or the raw image bytes of an upload,
+        which are decoded in memory.
+        """
+        if isinstance(img_path, (str, os.PathLike)):
+            # Check if file exists
+            if not os.path.exists(img_path):
+                logger.error(f"Image file not found: {img_path}")
+                return None, 0
+        else:
+            img_path = bytes(img_path)
         
         # Read image
-        img = cv2.imread(img_path)
+        img = read_image(img_path)
         if img is None:
-            logger.error(f"Failed to read image: {img_path}")
+            logger.error("Failed to read image")
             return None, 0
         
         # First try AI API if internet is available
@@ -317,7 +358,7 @@ class LicensePlateOCR:
         if self.local_model:
             logger.info("Attempting license plate extraction with local model")
             char_images = self.segment_characters(plate_img)
-            if char_images:
+            if char_images is not None:
                 model_result = self.process_with_local_model(char_images)
                 if model_result and self._validate_license_format(model_result[0]):
                     logger.info(f"Local model successfully extracted license plate: {model_result[0]}")
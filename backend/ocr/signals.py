@@ -7,6 +7,7 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
 from .models import LicensePlateDetection, OCRModel
+from .registry import registry
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +44,8 @@ def ocr_model_saved(sender, instance, created, **kwargs):
     """
     Handle post-save signal for OCRModel.
     
-    If a new active model is saved, deactivate other models of the same type.
+    If a new active model is saved, deactivate other models of the same type
+    and hot-swap the cached model instances in the registry.
     
     Args:
         sender: The model class
@@ -58,9 +60,13 @@ def ocr_model_saved(sender, instance, created, **kwargs):
             is_active=True
         ).exclude(id=instance.id).update(is_active=False)
         
+        registry.activate(instance)
+        
         logger.info(
             "Activated OCR model: %s (version: %s, type: %s)",
             instance.name,
             instance.version,
             instance.get_model_type_display()
-        )
\ No newline at end of file
+        )
+    else:
+        registry.deactivate(instance)
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Celery tasks for the OCR application.
+"""
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def process_license_plate_detection(detection_id):
+    """
+    Run detection and recognition for a queued LicensePlateDetection.
+    
+    Args:
+        detection_id: ID of the pending detection
+    """
+    from .models import LicensePlateDetection
+    from .utils import run_queued_detection, notify_detection_update
+    
+    try:
+        detection = LicensePlateDetection.objects.get(id=detection_id)
+    except LicensePlateDetection.DoesNotExist:
+        logger.warning("Queued detection %s no longer exists", detection_id)
+        return
+    
+    try:
+        detection = run_queued_detection(detection)
+        logger.info(
+            "Processed queued detection %s: %s (%s)",
+            detection.id,
+            detection.detected_text,
+            detection.status
+        )
+    except Exception as e:
+        logger.exception("Error processing queued detection %s: %s", detection_id, str(e))
+        detection.status = LicensePlateDetection.Status.FAILED
+        detection.save(update_fields=['status', 'updated_at'])
+        notify_detection_update(detection)
@@ -3,26 +3,165 @@ import numpy as np
 import logging
 import re
 import os
-from typing import List, Tuple, Optional
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from typing import List, Tuple, Optional, Sequence, Union
 from pathlib import Path
-import tensorflow as tf
-from tensorflow.keras import layers, Model
+
+from django.conf import settings
+
+from .lazy_imports import lazy_import
+
+# TensorFlow is imported on first model build, not when this module loads
+tf = lazy_import('tensorflow')
 
 logger = logging.getLogger(__name__)
 
+# Classes predicted by the character model, indexed by output position
+CHARACTER_SET = np.array(list('0123456789'))
+
+# Side length of the square character crops the model expects
+CHARACTER_SIZE = 32
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predict requests into shared forward passes.
+
+    Callers submit a (k, 32, 32, 1) array and get a Future for the (k, classes)
+    predictions. A single worker thread drains the queue, waiting up to
+    max_wait_ms for more requests once the first one arrives, and runs one
+    model call per max_batch_size rows. close() stops the worker so it no
+    longer keeps the model alive.
+    """
+
+    _STOP = object()
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def submit(self, batch: np.ndarray) -> Future:
+        """Queue a batch of inputs and return a Future for its predictions."""
+        future = Future()
+        if len(batch) == 0:
+            future.set_result(np.empty((0, len(CHARACTER_SET)), dtype='float32'))
+            return future
+        with self._lock:
+            if not self._closed:
+                self._ensure_worker()
+                self._queue.put((batch, future))
+                return future
+
+        # Closed (e.g. the model was swapped out mid-request): run inline
+        try:
+            future.set_result(np.asarray(self.predict_fn(batch)))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def predict(self, batch: np.ndarray) -> np.ndarray:
+        """Submit a batch and wait for its predictions."""
+        return self.submit(batch).result()
+
+    def close(self):
+        """Finish queued requests, then stop the worker thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._worker is not None and self._worker.is_alive():
+                self._queue.put(self._STOP)
+
+    def _ensure_worker(self):
+        # Called with self._lock held
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(
+                target=self._run, name='text-recognizer-batcher', daemon=True
+            )
+            self._worker.start()
+
+    def _collect(self):
+        """
+        Block for the first request, then gather more until the batch is full or the wait expires.
+
+        Returns:
+            (pending requests, whether close() was called)
+        """
+        item = self._queue.get()
+        if item is self._STOP:
+            return [], True
+        pending = [item]
+        rows = len(item[0])
+        deadline = time.monotonic() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is self._STOP:
+                return pending, True
+            pending.append(item)
+            rows += len(item[0])
+        return pending, False
+
+    def _run(self):
+        while True:
+            pending, stop = self._collect()
+            if pending:
+                self._predict_pending(pending)
+            if stop:
+                return
+
+    def _predict_pending(self, pending):
+        try:
+            inputs = np.concatenate([batch for batch, _ in pending])
+            outputs = np.concatenate([
+                np.asarray(self.predict_fn(inputs[start:start + self.max_batch_size]))
+                for start in range(0, len(inputs), self.max_batch_size)
+            ])
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+
+        offset = 0
+        for batch, future in pending:
+            future.set_result(outputs[offset:offset + len(batch)])
+            offset += len(batch)
+
+
 class TextRecognizer:
     """A class for recognizing Nepali text in license plate images using custom CNN model."""
     
-    def __init__(self, min_confidence: float = 0.5):
+    def __init__(self, min_confidence: float = 0.5, model_path: Optional[str] = None,
+                 max_batch_size: Optional[int] = None, batch_wait_ms: Optional[float] = None):
         """
         Initialize the text recognizer with the custom CNN model.
         
         Args:
             min_confidence: Minimum confidence threshold for predictions.
+            model_path: Weights file to load instead of the bundled model.
+            max_batch_size: Most character crops per forward pass
+                (default: OCR_RECOGNIZER_MAX_BATCH_SIZE).
+            batch_wait_ms: How long to wait for concurrent requests to join
+                a forward pass (default: OCR_RECOGNIZER_BATCH_WAIT_MS).
         """
         self.min_confidence = min_confidence
         self.model = None
         self.is_mock = True  # Default to mock implementation
+        self.max_batch_size = max_batch_size or getattr(settings, 'OCR_RECOGNIZER_MAX_BATCH_SIZE', 64)
+        if batch_wait_ms is None:
+            batch_wait_ms = getattr(settings, 'OCR_RECOGNIZER_BATCH_WAIT_MS', 5)
+        self.batcher = MicroBatcher(self._predict_on_batch, self.max_batch_size, batch_wait_ms)
         
         # Define valid Nepali license plate formats
         self.valid_formats = [
@@ -34,7 +173,7 @@ class TextRecognizer:
         try:
             # Get the directory where this file is located
             current_dir = Path(__file__).resolve().parent
-            model_path = current_dir / 'models' / 'nepali_cnn_model.h5'
+            model_path = Path(model_path) if model_path else current_dir / 'models' / 'nepali_cnn_model.h5'
             
             logger.info(f"Attempting to load CNN model from: {model_path}")
             
@@ -85,6 +224,7 @@ class TextRecognizer:
 
     def _create_model(self):
         """Create the model architecture"""
+        layers = tf.keras.layers
         inputs = layers.Input(shape=(32, 32, 1))
         x = layers.Conv2D(32, (3, 3), activation='relu')(inputs)
         x = layers.MaxPooling2D((2, 2))(x)
@@ -95,7 +235,7 @@ class TextRecognizer:
         x = layers.Dense(64, activation='relu')(x)
         outputs = layers.Dense(10)(x)
         
-        model = Model(inputs=inputs, outputs=outputs)
+        model = tf.keras.Model(inputs=inputs, outputs=outputs)
         return model
 
     def preprocess_image(self, image: np.ndarray) -> Optional[np.ndarray]:
@@ -109,7 +249,7 @@ class TextRecognizer:
                 image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
             # Resize to 32x32 and normalize
-            image = cv2.resize(image, (32, 32))
+            image = cv2.resize(image, (CHARACTER_SIZE, CHARACTER_SIZE))
             image = image.astype('float32') / 255.0
             # Add channel dimension
             image = np.expand_dims(image, axis=-1)
@@ -166,8 +306,8 @@ class TextRecognizer:
             # Expand dimensions to match model input shape
             input_img = np.expand_dims(processed_img, axis=0)
             
-            # Make prediction
-            prediction = self.model.predict(input_img)
+            # Share a forward pass with any concurrent requests
+            prediction = self.batcher.predict(input_img)
             
             # Decode the prediction to text
             text = self._decode_prediction(prediction)
@@ -201,20 +341,111 @@ class TextRecognizer:
                 "error": error_msg
             }
 
-    def recognize_batch(self, images: List[np.ndarray]) -> List[Tuple[str, float]]:
+    def _predict_on_batch(self, batch: np.ndarray) -> np.ndarray:
+        """Run one forward pass over a stacked batch of character crops."""
+        return self.model.predict_on_batch(batch)
+
+    def close(self):
+        """Stop the micro-batching thread so the model can be freed."""
+        self.batcher.close()
+
+    def stack_characters(self, images: Sequence[np.ndarray]) -> np.ndarray:
+        """
+        Stack character crops into one model input tensor.
+        
+        Args:
+            images: Character crops of any size, grayscale or BGR, or an
+                already stacked (N, 32, 32) / (N, 32, 32, 1) array
+                
+        Returns:
+            float32 array of shape (N, 32, 32, 1) scaled to [0, 1]
+        """
+        if isinstance(images, np.ndarray) and images.ndim in (3, 4) and images.shape[1:3] == (CHARACTER_SIZE, CHARACTER_SIZE):
+            batch = images.reshape(len(images), CHARACTER_SIZE, CHARACTER_SIZE, 1)
+            if batch.dtype != np.float32:
+                batch = batch.astype('float32') / 255.0
+            return batch
+
+        batch = np.empty((len(images), CHARACTER_SIZE, CHARACTER_SIZE, 1), dtype='float32')
+        for i, image in enumerate(images):
+            if image.ndim == 3:
+                image = image[:, :, 0] if image.shape[2] == 1 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+            if image.shape != (CHARACTER_SIZE, CHARACTER_SIZE):
+                image = cv2.resize(image, (CHARACTER_SIZE, CHARACTER_SIZE))
+            batch[i, :, :, 0] = image
+        batch /= 255.0
+        return batch
+
+    def predict_characters(self, characters: Union[np.ndarray, Sequence[np.ndarray]]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Classify many character crops with batched forward passes.
+        
+        Args:
+            characters: Character crops accepted by stack_characters
+            
+        Returns:
+            Tuple of (predicted class indices, confidence percentages), one
+            entry per character
+        """
+        batch = self.stack_characters(characters)
+        predictions = self.batcher.predict(batch)
+        return np.argmax(predictions, axis=1), np.max(predictions, axis=1) * 100
+
+    def recognize_batch(self, images: List[Union[np.ndarray, Sequence[np.ndarray]]]) -> List[dict]:
         """
         Recognize text from multiple license plate images.
         
+        Every character from every plate is stacked into one tensor and
+        classified with as few forward passes as max_batch_size allows.
+        
         Args:
-            images: List of preprocessed license plate images
+            images: One entry per plate, either a plate image (classified like
+                recognize_text) or the plate's segmented character crops
             
         Returns:
-            List of tuples containing (recognized text, confidence score)
+            List of recognition results, in the same format as recognize_text
         """
-        results = []
+        if not images:
+            return []
+        if self.is_mock or self.model is None:
+            return [self.recognize_text(image) for image in images]
+
+        # Plates given as a single image are classified as one character,
+        # matching recognize_text; segmented plates contribute every crop
+        groups = []
         for image in images:
-            text, confidence = self.recognize_text(image)
-            results.append((text, confidence))
+            if isinstance(image, np.ndarray) and image.ndim in (2, 3) and not (
+                    image.ndim == 3 and image.shape[1:] == (CHARACTER_SIZE, CHARACTER_SIZE)):
+                groups.append([image])
+            else:
+                groups.append(image if image is not None else [])
+
+        counts = np.array([len(group) for group in groups])
+        characters = [crop for group in groups for crop in group]
+        results = []
+
+        try:
+            predictions = self.batcher.predict(self.stack_characters(characters))
+        except Exception as e:
+            logger.error(f"Error in batched text recognition: {str(e)}")
+            return [{"text": "", "confidence": 0.0, "success": False, "error": str(e)} for _ in images]
+
+        for prediction in np.split(predictions, np.cumsum(counts)[:-1]):
+            if len(prediction) == 0:
+                results.append({"text": "", "confidence": 0.0, "success": False, "error": "No characters found"})
+                continue
+
+            text = self._decode_prediction(prediction)
+            confidence = float(np.max(prediction, axis=1).mean() * 100)
+            if confidence < self.min_confidence * 100:
+                results.append({
+                    "text": "",
+                    "confidence": confidence,
+                    "success": False,
+                    "error": f"Confidence below threshold: {confidence:.2f}%"
+                })
+            else:
+                results.append({"text": text, "confidence": confidence, "success": True})
         return results
 
     def _post_process_text(self, text: str) -> str:
@@ -247,14 +478,9 @@ class TextRecognizer:
             return random.choice(sample_plates)
             
         try:
-            # Get the index of the maximum value in each prediction
+            # Look up the most likely character for every row at once
             predicted_indices = np.argmax(prediction, axis=1)
-            
-            # Convert indices to characters (assuming 0-9 for digits)
-            characters = [str(idx) for idx in predicted_indices]
-            
-            # Join characters into a string
-            text = ''.join(characters)
+            text = ''.join(CHARACTER_SET[predicted_indices])
             
             # Apply post-processing
             return self._post_process_text(text)
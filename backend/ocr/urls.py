@@ -31,9 +31,11 @@ urlpatterns = [
     
     # OCR API endpoints
     path('detect/', api.detect_license_plate, name='detect-license-plate'),
+    path('detect/batch/', api.detect_license_plate_batch, name='detect-license-plate-batch'),
     path('detections/', detection_list, name='detection_list'),
     path('detections/<int:detection_id>/', detection_detail_api, name='detection_detail'),
     path('detections/<int:detection_id>/correct/', correct_detection_text, name='correct_detection_text'),
+    path('detections/<int:detection_id>/status/', views.get_detection_status, name='detection_status'),
     path('lookup/', api.lookup_vehicle_by_plate, name='lookup-vehicle'),
     path('detect-plate/', LicensePlateDetectionView.as_view(), name='detect-plate'),
     path('vehicle-info/<str:license_plate>/', VehicleInfoView.as_view(), name='vehicle-info'),
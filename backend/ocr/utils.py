@@ -1,14 +1,20 @@
 import os
+import sys
 import time
 import cv2
 import numpy as np
 import pytesseract
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
 from django.conf import settings
+from django.db.models.functions import Upper
 from .models import LicensePlateDetection, OCRModel
 from vehicles.models import Vehicle
-from openai import OpenAI
+
+# Shared Tesseract engine pool lives next to optimized_ocr in the project root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from ocr_engine import get_engine, read_image
 
 logger = logging.getLogger('sutms.ocr')
 
@@ -35,18 +41,35 @@ class LicensePlateDetector:
         Detect license plate in an image
         
         Args:
-            image_path: Path to the image file
+            image_path: Path to the image file, or the image as bytes,
+                an uploaded file or a decoded numpy array
             
         Returns:
-            Tuple of (plate_img, plate_text, confidence)
+            Tuple of (plate_img, plate_text, confidence, processing_time)
         """
         start_time = time.time()
         
-        # Read and preprocess the image
-        img = cv2.imread(str(image_path))
+        # Read and preprocess the image, decoding buffers in memory
+        img = read_image(image_path)
         if img is None:
             logger.error(f"Failed to load image: {image_path}")
-            return None, "", 0
+            return None, "", 0, int((time.time() - start_time) * 1000)
+        
+        return self.detect_plate_in_image(img, start_time=start_time)
+    
+    def detect_plate_in_image(self, img, start_time=None):
+        """
+        Detect license plate in an already decoded BGR image
+        
+        Args:
+            img: Image as a numpy array
+            start_time: Time the request started, defaults to now
+            
+        Returns:
+            Tuple of (plate_img, plate_text, confidence, processing_time)
+        """
+        if start_time is None:
+            start_time = time.time()
             
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
         plate_img = None
@@ -132,9 +155,9 @@ class LicensePlateDetector:
         # Apply thresholding to make text clearer
         _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
         
-        # Use pytesseract to extract text
+        # Extract text through the shared OCR engine
         config = '--oem 3 --psm 6 -l eng+nep'
-        ocr_result = pytesseract.image_to_data(thresh, config=config, output_type=pytesseract.Output.DICT)
+        ocr_result = get_engine().image_to_data(thresh, config=config)
         
         # Extract text and confidence
         text_parts = []
@@ -210,20 +233,11 @@ def detect_license_plate(image_path, user=None, save_detection=True, location_da
             base_name, ext = os.path.splitext(original_filename)
             crop_filename = f"{base_name}_plate{ext}"
             
-            # Create a temporary file path for the cropped image
-            crop_path = os.path.join(settings.MEDIA_ROOT, 'temp', crop_filename)
-            os.makedirs(os.path.dirname(crop_path), exist_ok=True)
-            
-            # Save the cropped image
-            cv2.imwrite(crop_path, plate_img)
-            
-            # Open the saved image with PIL and save it to the detection model
-            with open(crop_path, 'rb') as f:
-                from django.core.files.images import ImageFile
-                detection.detected_plate_image.save(crop_filename, ImageFile(f))
-                
-            # Remove the temporary file
-            os.remove(crop_path)
+            # Encode the crop in memory and save it straight to storage
+            encoded, buffer = cv2.imencode(ext or '.jpg', plate_img)
+            if encoded:
+                from django.core.files.base import ContentFile
+                detection.detected_plate_image.save(crop_filename, ContentFile(buffer.tobytes()), save=False)
             
         # Add location data if provided
         if location_data:
@@ -236,7 +250,212 @@ def detect_license_plate(image_path, user=None, save_detection=True, location_da
     return plate_text, confidence, vehicle
 
 
+def detect_license_plates_batch(images, max_workers=None):
+    """
+    Detect license plates in several images in parallel
+    
+    Detection runs on a thread pool (OpenCV and the pooled Tesseract engine
+    release the GIL) and every recognised plate is resolved against Vehicle
+    with a single query.
+    
+    Args:
+        images: List of (name, image_bytes) tuples
+        max_workers: Worker threads, defaults to OCR_BATCH_WORKERS or the CPU count
+        
+    Returns:
+        List of result dictionaries in the same order as images
+    """
+    if max_workers is None:
+        max_workers = getattr(settings, 'OCR_BATCH_WORKERS', None) or os.cpu_count() or 1
+    
+    detector = LicensePlateDetector()
+    
+    def process(item):
+        name, data = item
+        img = read_image(data)
+        if img is None:
+            return {'name': name, 'success': False, 'error': 'Could not read image file'}
+        
+        try:
+            plate_img, plate_text, confidence, processing_time = detector.detect_plate_in_image(img)
+        except Exception as e:
+            logger.exception("Error detecting plate in %s: %s", name, str(e))
+            return {'name': name, 'success': False, 'error': str(e)}
+        
+        return {
+            'name': name,
+            'success': bool(plate_text),
+            'license_plate': plate_text,
+            'confidence': confidence,
+            'processing_time_ms': processing_time,
+        }
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, max(len(images), 1))) as executor:
+        results = list(executor.map(process, images))
+    
+    # Resolve every recognised plate with one query, case-insensitively like
+    # the single-image lookups (license_plate__iexact)
+    plates = {result['license_plate'].upper() for result in results if result.get('license_plate')}
+    vehicles = {}
+    if plates:
+        matches = Vehicle.objects.annotate(plate_upper=Upper('license_plate')).filter(plate_upper__in=plates)
+        for vehicle in matches:
+            vehicles[vehicle.plate_upper] = vehicle
+    
+    for index, result in enumerate(results):
+        result['index'] = index
+        vehicle = vehicles.get((result.get('license_plate') or '').upper())
+        result['vehicle'] = {
+            'id': vehicle.id,
+            'license_plate': vehicle.license_plate,
+            'make': vehicle.make,
+            'model': vehicle.model,
+            'color': vehicle.color,
+            'year': vehicle.year,
+        } if vehicle else None
+        if not result['success'] and 'error' not in result:
+            result['error'] = 'No license plate detected'
+    
+    return results
+
+
+def wants_async_detection(request):
+    """
+    Check whether a detection request should be queued instead of run inline
+    
+    Clients opt in with an 'async' form or query parameter; OCR_ASYNC_DETECTION
+    makes queued mode the default.
+    """
+    value = request.data.get('async', request.query_params.get('async'))
+    if value is None:
+        return getattr(settings, 'OCR_ASYNC_DETECTION', False)
+    return str(value).lower() in ('1', 'true', 'yes')
+
+
+def queue_license_plate_detection(user, image_file, location_data=None):
+    """
+    Store an upload as a pending detection and queue it for processing
+    
+    The Celery task is queued once the surrounding transaction commits, so
+    the worker always sees the saved row.
+    
+    Args:
+        user: User who performed the detection
+        image_file: Uploaded image file
+        location_data: Dictionary with 'latitude', 'longitude', and 'location_name' (optional)
+        
+    Returns:
+        The pending LicensePlateDetection
+    """
+    from django.db import transaction
+    from .tasks import process_license_plate_detection
+    
+    detection = LicensePlateDetection(
+        user=user,
+        status=LicensePlateDetection.Status.PENDING,
+        detection_method=LicensePlateDetection.DetectionMethod.API
+    )
+    detection.original_image.save(image_file.name, image_file, save=False)
+    
+    if location_data:
+        detection.latitude = location_data.get('latitude')
+        detection.longitude = location_data.get('longitude')
+        detection.location_name = location_data.get('location_name') or ''
+    
+    detection.save()
+    
+    transaction.on_commit(lambda: process_license_plate_detection.delay(detection.id))
+    return detection
+
+
+def run_queued_detection(detection):
+    """
+    Run plate detection and recognition for a pending detection
+    
+    Args:
+        detection: LicensePlateDetection whose original_image is set
+        
+    Returns:
+        The updated LicensePlateDetection
+    """
+    from django.core.files.base import ContentFile
+    from .license_plate_detector import detector as plate_detector
+    
+    detection.status = LicensePlateDetection.Status.PROCESSING
+    detection.save(update_fields=['status', 'updated_at'])
+    notify_detection_update(detection)
+    
+    with detection.original_image.open('rb') as f:
+        image = read_image(f.read())
+    
+    # Same detector as the inline API path, so a plate reads the same either way
+    start_time = time.time()
+    result = plate_detector.detect_plate(image) if image is not None else {
+        'success': False, 'error': 'Could not read image file'
+    }
+    plate_text = result.get('license_plate', '') if result['success'] else ''
+    
+    detection.detected_text = plate_text
+    detection.confidence = result.get('confidence', 0.0) * 100  # Stored as a percentage
+    detection.processing_time_ms = int((time.time() - start_time) * 1000)
+    detection.status = (
+        LicensePlateDetection.Status.SUCCESS if plate_text else LicensePlateDetection.Status.FAILED
+    )
+    
+    if plate_text:
+        detection.matched_vehicle = Vehicle.objects.filter(license_plate__iexact=plate_text).first()
+    
+    if result['success'] and result.get('bbox'):
+        x1, y1, x2, y2 = result['bbox']
+        plate_img = image[y1:y2, x1:x2]
+        encoded, buffer = cv2.imencode('.jpg', plate_img) if plate_img.size else (False, None)
+        if encoded:
+            base_name = os.path.splitext(os.path.basename(detection.original_image.name))[0]
+            detection.cropped_plate.save(f"{base_name}_plate.jpg", ContentFile(buffer.tobytes()), save=False)
+    
+    detection.save()
+    notify_detection_update(detection)
+    return detection
+
+
+def notify_detection_update(detection):
+    """
+    Push the detection status to WebSocket subscribers, if channels is configured
+    
+    Args:
+        detection: LicensePlateDetection that changed
+    """
+    try:
+        from asgiref.sync import async_to_sync
+        from channels.layers import get_channel_layer
+    except ImportError:
+        return
+    
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    
+    try:
+        async_to_sync(channel_layer.group_send)(
+            f'ocr_detection_{detection.id}',
+            {
+                'type': 'detection_update',
+                'detection': {
+                    'id': detection.id,
+                    'status': detection.status,
+                    'detected_text': detection.detected_text,
+                    'confidence': detection.confidence,
+                    'processing_time_ms': detection.processing_time_ms,
+                    'matched_vehicle': detection.matched_vehicle_id,
+                },
+            }
+        )
+    except Exception as e:
+        logger.exception("Error sending detection update: %s", str(e))
+
+
 def enhance_license_plate_detection(image_path):
+    from openai import OpenAI
     client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
     # Process image and improve OCR accuracy
     # Return enhanced results
\ No newline at end of file
@@ -12,19 +12,19 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.http import HttpResponse, JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.views.decorators.http import require_POST, require_GET
-from django.core.files.storage import default_storage
 from django.contrib import messages
 from django.utils.translation import gettext as _
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
-from django.core.files.base import ContentFile
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from drf_yasg.utils import swagger_auto_schema
 
 from .models import LicensePlateDetection, OCRModel
-from .license_plate_detector import NepaliLicensePlateDetector
+from .license_plate_detector import NepaliLicensePlateDetector, detector
+from .api import queued_detection_response
+from .utils import read_image, wants_async_detection
 from vehicles.models import Vehicle
 from api.models import ViolationType, Violation
 from .serializers import (
@@ -36,9 +36,6 @@ from .serializers import (
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize the detector
-detector = NepaliLicensePlateDetector()
-
 @login_required
 def detect_license_plate(request):
     """
@@ -227,8 +224,8 @@ def add_to_training(request, detection_id):
         })
 
 
-@login_required
-@require_GET
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
 def get_detection_status(request, detection_id):
     """
     View for getting detection status.
@@ -257,6 +254,7 @@ def get_detection_status(request, detection_id):
             'detected_text': detection.detected_text,
             'corrected_text': detection.corrected_text,
             'confidence': detection.confidence,
+            'processing_time_ms': detection.processing_time_ms,
             'is_in_training_set': detection.is_in_training_set,
             'matched_vehicle': detection.matched_vehicle.id if detection.matched_vehicle else None
         })
@@ -312,45 +310,42 @@ def detect_license_plate(request):
             
         image_file = request.FILES['image']
         
-        # Save the uploaded image temporarily
-        temp_path = default_storage.save(
-            f'temp/plates/{image_file.name}',
-            ContentFile(image_file.read())
-        )
+        # Queued mode: return the pending detection id right away
+        if wants_async_detection(request):
+            return queued_detection_response(request, image_file)
         
-        try:
-            # Detect and recognize the license plate
-            result = detector.detect_and_recognize(temp_path)
+        # Decode the upload in memory instead of round-tripping through storage
+        image = read_image(image_file)
+        if image is None:
+            return JsonResponse({'error': 'Could not read image file'}, status=400)
+        
+        # Detect and recognize the license plate
+        result = detector.detect_plate(image)
+        
+        if not result['success']:
+            return JsonResponse({'error': result['error']}, status=400)
             
-            if 'error' in result:
-                return JsonResponse({'error': result['error']}, status=400)
-                
-            # Get vehicle details if available
-            license_plate = result['license_plate']
-            try:
-                vehicle = Vehicle.objects.get(license_plate=license_plate)
-                result['vehicle'] = {
-                    'id': vehicle.id,
-                    'owner_name': vehicle.owner_name,
-                    'make': vehicle.make,
-                    'model': vehicle.model,
-                    'year': vehicle.year,
-                    'color': vehicle.color,
-                    'registration_number': vehicle.registration_number,
-                    'registration_expiry': vehicle.registration_expiry.isoformat() if vehicle.registration_expiry else None,
-                    'violations_count': vehicle.violation_set.count(),
-                    'is_reported_stolen': vehicle.is_reported_stolen,
-                    'tax_clearance': vehicle.tax_clearance
-                }
-            except Vehicle.DoesNotExist:
-                result['vehicle'] = None
-                
-            return JsonResponse(result)
+        # Get vehicle details if available
+        license_plate = result['license_plate']
+        try:
+            vehicle = Vehicle.objects.get(license_plate=license_plate)
+            result['vehicle'] = {
+                'id': vehicle.id,
+                'owner_name': vehicle.owner_name,
+                'make': vehicle.make,
+                'model': vehicle.model,
+                'year': vehicle.year,
+                'color': vehicle.color,
+                'registration_number': vehicle.registration_number,
+                'registration_expiry': vehicle.registration_expiry.isoformat() if vehicle.registration_expiry else None,
+                'violations_count': vehicle.violation_set.count(),
+                'is_reported_stolen': vehicle.is_reported_stolen,
+                'tax_clearance': vehicle.tax_clearance
+            }
+        except Vehicle.DoesNotExist:
+            result['vehicle'] = None
             
-        finally:
-            # Clean up the temporary file
-            if temp_path:
-                default_storage.delete(temp_path)
+        return JsonResponse(result)
                 
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
@@ -403,7 +398,7 @@ class LicensePlateDetectionView(APIView):
     """
     API endpoint for license plate detection and recognition
     """
-    detector = NepaliLicensePlateDetector()
+    detector = detector
 
     @swagger_auto_schema(
         operation_summary="Detect License Plate",
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class RoutePlannerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'route_planner'
-    verbose_name = 'Route Planner'
\ No newline at end of file
+    verbose_name = 'Route Planner'
+
+    def ready(self):
+        # Keep the cached road graph in step with model changes
+        from . import signals  # noqa: F401
@@ -0,0 +1,439 @@
+"""
+In-memory road graph for route planning.
+
+Building the graph from the database on every request costs a query per
+route for its traffic factor, plus two more for traffic jams, so route
+latency grew with the size of the network. RoadGraph is loaded once per
+process with four bulk queries: routes, all traffic data, active-jam
+counts and location coordinates. It is kept in compressed sparse row (CSR)
+form:
+
+    offsets[i]:offsets[i + 1]  edges leaving node i
+    targets[e]                 node index the edge leads to
+    weights[h][e]              travel minutes for hour-of-week h (0-167)
+
+Travel time for every hour of the week is precomputed as
+normal_duration * (traffic_factor + JAM_PENALTY * active jams at either
+end), matching the factors the planner has always applied. Node
+coordinates give the A* search in search.py its straight-line heuristic.
+
+Changes to Route, RouteTrafficData and TrafficJam rows are applied to the
+loaded graph in place through signals (see signals.py), touching only the
+edges involved; only added or removed routes force a reload. Each change
+that actually alters the graph bumps a version number in the Django cache
+and is logged there under that version, so other processes patch their
+copy with the changes they missed on their next query and only reload when
+the log has gaps (or after a reload-only change). Without a shared cache
+(CACHE_URL) other processes only pick up changes after
+ROUTE_GRAPH_MAX_AGE seconds.
+"""
+import hashlib
+import logging
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+
+from .models import Location, Route, RouteTrafficData, TrafficJam
+
+logger = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 168
+
+# Added to an edge's traffic factor for each active jam at either end
+JAM_PENALTY = 0.5
+
+VERSION_CACHE_KEY = 'route_planner:graph_version'
+
+# Change applied at a version: (RoadGraph method name, args)
+CHANGE_CACHE_KEY = 'route_planner:graph_change:%d'
+
+# RoadGraph methods that can be replayed from the change log
+PATCH_METHODS = frozenset(['set_traffic_factor', 'set_coordinates', 'update_route', 'set_jam_count'])
+
+# Logged for changes every process must reload for
+RELOAD = ('reload', ())
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def hour_of_week(day_of_week, hour_of_day):
+    """Index into the weight vectors: 0 is Monday 00:00, 167 is Sunday 23:00."""
+    return day_of_week * 24 + hour_of_day
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km between points given in degrees (numpy-aware)."""
+    lat1, lon1, lat2, lon2 = (np.radians(value) for value in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+class RoadGraph:
+    """Directed road network in CSR form with hour-of-week travel times."""
+
+    def __init__(self, node_ids, edges, factors=None, jam_counts=None, coordinates=None, version=0):
+        """
+        Build the graph.
+
+        Args:
+            node_ids: Location IDs of every node
+            edges: List of (route_id, origin_id, destination_id, distance_km,
+                normal_duration_minutes); route_id may be None
+            factors: Dictionary mapping (route_id, hour_of_week) to a traffic
+                factor (missing entries are 1.0)
+            jam_counts: Dictionary mapping location ID to active jam count
+            coordinates: Dictionary mapping location ID to (latitude,
+                longitude) in degrees; without coordinates for every node
+                searches run without a heuristic
+            version: Version number the graph was loaded at
+        """
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+        self.node_ids = list(node_ids)
+        self.index = {node_id: i for i, node_id in enumerate(self.node_ids)}
+        n = len(self.node_ids)
+
+        # Group edges by origin so each node's edges are contiguous
+        edges = sorted(edges, key=lambda edge: self.index[edge[1]])
+        self.sources = [self.index[edge[1]] for edge in edges]
+        self.targets = [self.index[edge[2]] for edge in edges]
+        self.route_ids = [edge[0] for edge in edges]
+        self.distances = [float(edge[3]) for edge in edges]
+        self.base_minutes = np.array([float(edge[4]) for edge in edges], dtype=np.float32)
+
+        counts = np.bincount(np.array(self.sources, dtype=np.int64), minlength=n) if edges else np.zeros(n, np.int64)
+        self.offsets = [0] + np.cumsum(counts).tolist()
+
+        self.edge_by_route = {
+            route_id: e for e, route_id in enumerate(self.route_ids) if route_id is not None
+        }
+
+        m = len(edges)
+        self.factors = np.ones((HOURS_PER_WEEK, m), dtype=np.float32)
+        for (route_id, how), factor in (factors or {}).items():
+            e = self.edge_by_route.get(route_id)
+            if e is not None:
+                self.factors[how, e] = factor
+
+        self.jam_counts = np.zeros(n, dtype=np.int32)
+        for location_id, count in (jam_counts or {}).items():
+            i = self.index.get(location_id)
+            if i is not None:
+                self.jam_counts[i] = count
+
+        self._sources_array = np.array(self.sources, dtype=np.int64)
+        self._targets_array = np.array(self.targets, dtype=np.int64)
+
+        # Identifies the node and edge layout (not the weights); indexes built
+        # from a graph with another layout cannot be used with this one
+        digest = hashlib.sha1()
+        for array in (np.array(self.node_ids, dtype=np.int64), self._sources_array, self._targets_array):
+            digest.update(array.tobytes())
+        self.fingerprint = digest.hexdigest()
+        self.weights = self._compute_weights(slice(None))
+
+        coordinates = coordinates or {}
+        self.latitudes = np.array([float(coordinates.get(i, (np.nan, np.nan))[0]) for i in self.node_ids])
+        self.longitudes = np.array([float(coordinates.get(i, (np.nan, np.nan))[1]) for i in self.node_ids])
+        self._update_geometry()
+
+    @property
+    def node_count(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def _compute_weights(self, edges):
+        """Travel minutes for the given edges at every hour of the week."""
+        jams = (self.jam_counts[self._sources_array[edges]] + self.jam_counts[self._targets_array[edges]]).astype(np.float32)
+        return self.base_minutes[edges] * (self.factors[:, edges] + np.float32(JAM_PENALTY) * jams)
+
+    def _refresh(self, edges):
+        edges = np.asarray(edges, dtype=np.int64)
+        if edges.size:
+            self.weights[:, edges] = self._compute_weights(edges)
+            self._max_speeds = {}
+            self._weight_lists = {}
+
+    def _update_geometry(self):
+        self.has_coordinates = bool(self.node_ids) and not (
+            np.isnan(self.latitudes).any() or np.isnan(self.longitudes).any()
+        )
+        if self.has_coordinates:
+            self.edge_km = haversine_km(
+                self.latitudes[self._sources_array], self.longitudes[self._sources_array],
+                self.latitudes[self._targets_array], self.longitudes[self._targets_array],
+            )
+        else:
+            self.edge_km = np.zeros(self.edge_count)
+        # Radians as plain lists: the search reads them one node at a time
+        self.lat_radians = np.radians(self.latitudes).tolist()
+        self.lon_radians = np.radians(self.longitudes).tolist()
+        self._max_speeds = {}
+        self._weight_lists = {}
+
+    def node_index(self, location_id):
+        """Node index of a location, or None if it has no routes."""
+        return self.index.get(location_id)
+
+    def edges_from(self, node):
+        """Range of edge indexes leaving a node index."""
+        return range(self.offsets[node], self.offsets[node + 1])
+
+    def weights_at(self, how):
+        """Travel minutes of every edge for an hour of the week."""
+        return self.weights[how]
+
+    def weight_list(self, how):
+        """weights_at() as a Python list, which is faster to index one edge at a time."""
+        weights = self._weight_lists.get(how)
+        if weights is None:
+            weights = self._weight_lists[how] = self.weights[how].tolist()
+        return weights
+
+    def max_speed(self, how):
+        """
+        Fastest straight-line speed (km per minute) of any edge at an hour.
+
+        No path covers more straight-line distance per minute than this, so
+        straight-line distance divided by it never overestimates the travel
+        time left, which keeps A* exact. Returns 0.0 when the heuristic
+        cannot be used (missing coordinates or zero-minute edges).
+        """
+        speed = self._max_speeds.get(how)
+        if speed is None:
+            weights = self.weights[how].astype(np.float64)
+            moving = self.edge_km > 0
+            if not self.has_coordinates or not moving.any() or (weights[moving] <= 0).any():
+                speed = 0.0
+            else:
+                # Headroom for float32 rounding of the weights
+                speed = float(np.max(self.edge_km[moving] / weights[moving])) * 1.0001
+            self._max_speeds[how] = speed
+        return speed
+
+    # The set_*/update_* methods return True if they changed the graph, None
+    # if it is not affected and False if it has to be reloaded instead
+
+    def set_traffic_factor(self, route_id, how, factor):
+        """Update one route's traffic factor for one hour of the week."""
+        e = self.edge_by_route.get(route_id)
+        if e is None or self.factors[how, e] == np.float32(factor):
+            return None
+        self.factors[how, e] = factor
+        self.weights[how, e] = self.base_minutes[e] * (
+            factor + JAM_PENALTY * (self.jam_counts[self.sources[e]] + self.jam_counts[self.targets[e]])
+        )
+        self._max_speeds.pop(how, None)
+        self._weight_lists.pop(how, None)
+        return True
+
+    def set_coordinates(self, location_id, latitude, longitude):
+        """Update a node's position (used by the search heuristic)."""
+        i = self.index.get(location_id)
+        if i is None or (self.latitudes[i], self.longitudes[i]) == (float(latitude), float(longitude)):
+            return None
+        self.latitudes[i] = float(latitude)
+        self.longitudes[i] = float(longitude)
+        self._update_geometry()
+        return True
+
+    def update_route(self, route_id, origin_id, destination_id, distance_km, normal_duration_minutes):
+        """
+        Update an existing route's length and duration.
+
+        Returns:
+            False if the route is not in the graph or changed endpoints, in
+            which case the graph must be reloaded; None if nothing changed
+        """
+        e = self.edge_by_route.get(route_id)
+        if e is None or self.node_ids[self.sources[e]] != origin_id or self.node_ids[self.targets[e]] != destination_id:
+            return False
+        if self.distances[e] == float(distance_km) and self.base_minutes[e] == np.float32(normal_duration_minutes):
+            return None
+        self.distances[e] = float(distance_km)
+        self.base_minutes[e] = float(normal_duration_minutes)
+        self._refresh([e])
+        return True
+
+    def set_jam_count(self, location_id, count):
+        """Update the active jam count at a location and the edges touching it."""
+        i = self.index.get(location_id)
+        if i is None or self.jam_counts[i] == count:
+            return None
+        self.jam_counts[i] = count
+        touching = np.nonzero((self._sources_array == i) | (self._targets_array == i))[0]
+        self._refresh(touching)
+        return True
+
+    @classmethod
+    def from_database(cls, version=0):
+        """Load the graph with one query each for routes, traffic data, jams and locations."""
+        edges = list(Route.objects.values_list(
+            'id', 'origin_id', 'destination_id', 'distance_km', 'normal_duration_minutes'
+        ))
+        if not edges:
+            return None
+
+        factors = {
+            (route_id, hour_of_week(day, hour)): float(factor)
+            for route_id, day, hour, factor in RouteTrafficData.objects.values_list(
+                'route_id', 'day_of_week', 'hour_of_day', 'traffic_factor'
+            )
+        }
+        jam_counts = dict(
+            TrafficJam.objects.filter(is_active=True)
+            .values('location_id')
+            .annotate(count=Count('id'))
+            .values_list('location_id', 'count')
+        )
+        coordinates = {
+            location_id: (latitude, longitude)
+            for location_id, latitude, longitude in Location.objects.values_list('id', 'latitude', 'longitude')
+        }
+        node_ids = sorted({edge[1] for edge in edges} | {edge[2] for edge in edges})
+        return cls(node_ids, edges, factors, jam_counts, coordinates, version=version)
+
+
+class RoadGraphStore:
+    """Holds this process's RoadGraph and keeps it current."""
+
+    def __init__(self):
+        self._graph = None
+        self._lock = threading.RLock()
+
+    def get(self):
+        """
+        Current graph, patching or reloading it if needed.
+
+        Returns:
+            RoadGraph, or None if there are no routes
+        """
+        shared_version = cache.get(VERSION_CACHE_KEY)
+        graph = self._graph
+        max_age = getattr(settings, 'ROUTE_GRAPH_MAX_AGE', 300)
+        if (graph is not None
+                and (shared_version is None or shared_version == graph.version)
+                and time.monotonic() - graph.loaded_at < max_age):
+            return graph
+
+        with self._lock:
+            graph = self._graph
+            if graph is not None and time.monotonic() - graph.loaded_at < max_age:
+                if shared_version is None or self._catch_up(graph, shared_version):
+                    return graph
+            start = time.perf_counter()
+            graph = RoadGraph.from_database(version=shared_version or 0)
+            self._graph = graph
+            if graph is not None:
+                logger.info(
+                    "Loaded road graph v%s: %d nodes, %d edges in %.0f ms",
+                    graph.version, graph.node_count, graph.edge_count,
+                    (time.perf_counter() - start) * 1000
+                )
+            return graph
+
+    def invalidate(self):
+        """Drop the graph everywhere; it is reloaded on the next query."""
+        with self._lock:
+            self._graph = None
+            self._publish(RELOAD)
+
+    def apply(self, method, *args):
+        """
+        Apply an in-place change to the graph and publish it.
+
+        Args:
+            method: Name of the RoadGraph method making the change (one of
+                PATCH_METHODS)
+            *args: Arguments for the method
+
+        Returns:
+            What the method returned: True if the graph changed, None if it
+            was not affected, False if it had to be reloaded
+
+        Changes that leave the graph as it was are not published. Otherwise
+        the shared version is bumped and the change logged under it, so
+        other processes replay it instead of reloading.
+        """
+        with self._lock:
+            graph = self.get()
+            if graph is None:
+                return None
+            result = getattr(graph, method)(*args)
+            if result is None:
+                return None
+            if result is False:
+                self._graph = None
+                self._publish(RELOAD)
+                return False
+
+            version = self._publish((method, args))
+            # Replay changes other processes published since get()
+            if self._catch_up(graph, version - 1):
+                graph.version = version
+            else:
+                self._graph = None
+            return True
+
+    def _catch_up(self, graph, version):
+        """
+        Replay logged changes on graph until it reaches version.
+
+        Returns:
+            False if the graph has to be reloaded instead (changes missing
+            from the log, too many of them, or a reload-only change)
+        """
+        behind = version - graph.version
+        if behind <= 0:
+            return behind == 0
+        if behind > getattr(settings, 'ROUTE_GRAPH_MAX_PATCHES', 100):
+            return False
+        keys = [CHANGE_CACHE_KEY % v for v in range(graph.version + 1, version + 1)]
+        changes = cache.get_many(keys)
+        for key in keys:
+            method, args = changes.get(key, RELOAD)
+            if method not in PATCH_METHODS or getattr(graph, method)(*args) is False:
+                return False
+        graph.version = version
+        return True
+
+    def _publish(self, change):
+        """Bump the shared version and log the change made at it."""
+        version = self._bump_version()
+        # Graphs older than ROUTE_GRAPH_MAX_AGE reload anyway
+        cache.set(CHANGE_CACHE_KEY % version, change, timeout=getattr(settings, 'ROUTE_GRAPH_MAX_AGE', 300))
+        return version
+
+    def _bump_version(self):
+        try:
+            return cache.incr(VERSION_CACHE_KEY)
+        except ValueError:
+            # No version yet: start above the implicit 0 of loaded graphs
+            cache.set(VERSION_CACHE_KEY, 1, timeout=None)
+            return 1
+
+
+_store = RoadGraphStore()
+
+
+def get_road_graph():
+    """Return this process's road graph (None if there are no routes)."""
+    return _store.get()
+
+
+def get_graph_store():
+    """Return the process-wide RoadGraphStore."""
+    return _store
+
+
+def invalidate_road_graph():
+    """Force every process to reload the road graph, e.g. after bulk imports."""
+    _store.invalidate()
@@ -0,0 +1,594 @@
+"""
+Contraction hierarchies for city-scale route queries.
+
+A contraction hierarchy ranks every node and adds shortcut edges so that a
+shortest path can always be found by searching only "upwards" in rank from
+both ends. A query settles a few hundred nodes instead of the tens of
+thousands an A* search expands on a large network. Building one is
+expensive, so it is done offline by the build_route_hierarchy command or
+the rebuild_route_hierarchies Celery task.
+
+Travel times change with the hour, so one hierarchy is built per time-of-day
+profile (ROUTE_CH_PROFILES, by default five periods of the day for weekdays
+and for weekends). It is built on the profile's mean travel time per edge.
+The hierarchy only picks the path; the route's reported times use the exact
+hour, as before. Each hierarchy is saved as a set of .npy arrays under
+ROUTE_CH_DIR and memory-mapped by every process that queries it, so worker
+processes share one copy in the page cache.
+
+A hierarchy is only used while it matches the loaded road graph's layout and
+its profile is not marked dirty. Saving RouteTrafficData marks the profile
+covering that hour dirty; route changes mark every profile. Traffic jams are
+too short-lived to rebuild for: they only change the live weights, which the
+reported times and the ranking of alternative routes use.
+Dirty profiles fall back to A* until the scheduled rebuild (every
+ROUTE_CH_REBUILD_INTERVAL seconds) replaces them. A dirty flag is a
+<profile>.dirty marker file next to the hierarchy, so web processes and the
+Celery rebuild see the same flags whatever cache backend is configured.
+"""
+import heapq
+import json
+import logging
+import math
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .graph import RoadGraph, hour_of_week
+from .search import PathResult
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = [0, 1, 2, 3, 4]
+WEEKEND = [5, 6]
+
+PERIODS = {
+    'night': list(range(0, 7)),
+    'morning_peak': list(range(7, 11)),
+    'daytime': list(range(11, 16)),
+    'evening_peak': list(range(16, 20)),
+    'evening': list(range(20, 24)),
+}
+
+DEFAULT_PROFILES = {
+    f'{day_type}_{period}': {'days': days, 'hours': hours}
+    for day_type, days in (('weekday', WEEKDAYS), ('weekend', WEEKEND))
+    for period, hours in PERIODS.items()
+}
+
+# Arrays saved for each hierarchy, one .npy file each
+ARRAYS = (
+    'rank',
+    'up_offsets', 'up_targets', 'up_weights', 'up_edges',
+    'down_offsets', 'down_sources', 'down_weights', 'down_edges',
+    'edge_source', 'edge_target', 'edge_first', 'edge_second', 'edge_original',
+)
+
+REBUILD_LOCK_KEY = 'route_planner:ch_rebuild_lock'
+
+# Settled nodes per witness search while contracting; higher values add
+# fewer shortcuts but take longer to build
+WITNESS_SETTLE_LIMIT = 50
+
+
+def get_profiles():
+    """Time-of-day profiles: name -> {'days': [...], 'hours': [...]}."""
+    return getattr(settings, 'ROUTE_CH_PROFILES', None) or DEFAULT_PROFILES
+
+
+def profile_hours(profile):
+    """Hours of the week a profile covers."""
+    return sorted(hour_of_week(day, hour) for day in profile['days'] for hour in profile['hours'])
+
+
+def profile_for_hour(how):
+    """Name of the profile covering an hour of the week, or None."""
+    for name, profile in get_profiles().items():
+        if how % 24 in profile['hours'] and how // 24 in profile['days']:
+            return name
+    return None
+
+
+def get_hierarchy_dir():
+    return getattr(settings, 'ROUTE_CH_DIR', 'route_hierarchies')
+
+
+def contract(node_count, sources, targets, weights, settle_limit=WITNESS_SETTLE_LIMIT):
+    """
+    Contract a graph node by node, adding shortcuts that preserve distances.
+
+    Nodes are contracted in order of edge difference (shortcuts added minus
+    edges removed) plus the number of already contracted neighbours, with
+    priorities updated lazily.
+
+    Args:
+        node_count: Number of nodes
+        sources, targets, weights: Edge lists
+
+    Returns:
+        (rank, edges) where rank lists each node's contraction order and
+        edges is a dictionary of equal-length lists: source, target,
+        weight, first and second (the two edges a shortcut replaces, -1
+        for original edges) and original (edge index in the input, -1 for
+        shortcuts)
+    """
+    out = [{} for _ in range(node_count)]
+    incoming = [{} for _ in range(node_count)]
+    edges = {name: [] for name in ('source', 'target', 'weight', 'first', 'second', 'original')}
+
+    def add_edge(u, x, weight, first, second, original):
+        current = out[u].get(x)
+        if current is not None and current[0] <= weight:
+            return
+        edge_id = len(edges['source'])
+        for name, value in zip(edges, (u, x, weight, first, second, original)):
+            edges[name].append(value)
+        out[u][x] = (weight, edge_id)
+        incoming[x][u] = (weight, edge_id)
+
+    for e, (u, x, weight) in enumerate(zip(sources, targets, weights)):
+        if u != x:
+            add_edge(u, x, float(weight), -1, -1, e)
+
+    contracted = [False] * node_count
+    contracted_neighbours = [0] * node_count
+
+    def witness_distances(u, skip, limit):
+        """Distances from u avoiding skip, searching only until limit."""
+        distances = {u: 0.0}
+        queue = [(0.0, u)]
+        settled = 0
+        while queue:
+            distance, node = heapq.heappop(queue)
+            if distance > distances[node]:
+                continue
+            if distance > limit or settled >= settle_limit:
+                break
+            settled += 1
+            for neighbour, (weight, _) in out[node].items():
+                if neighbour == skip or contracted[neighbour]:
+                    continue
+                new_distance = distance + weight
+                if new_distance < distances.get(neighbour, math.inf):
+                    distances[neighbour] = new_distance
+                    heapq.heappush(queue, (new_distance, neighbour))
+        return distances
+
+    def shortcuts(v):
+        ins = [(u, weight, edge_id) for u, (weight, edge_id) in incoming[v].items() if not contracted[u]]
+        outs = [(x, weight, edge_id) for x, (weight, edge_id) in out[v].items() if not contracted[x]]
+        found = []
+        if ins and outs:
+            max_out = max(weight for _, weight, _ in outs)
+            for u, weight_in, edge_in in ins:
+                distances = witness_distances(u, v, weight_in + max_out)
+                for x, weight_out, edge_out in outs:
+                    via = weight_in + weight_out
+                    if x != u and distances.get(x, math.inf) > via:
+                        found.append((u, x, via, edge_in, edge_out))
+        return found, len(ins) + len(outs)
+
+    def priority(v):
+        found, degree = shortcuts(v)
+        return len(found) - degree + contracted_neighbours[v], found
+
+    queue = [(priority(v)[0], v) for v in range(node_count)]
+    heapq.heapify(queue)
+    rank = [0] * node_count
+    order = 0
+    while queue:
+        _, v = heapq.heappop(queue)
+        if contracted[v]:
+            continue
+        current, found = priority(v)
+        if queue and current > queue[0][0]:
+            heapq.heappush(queue, (current, v))
+            continue
+
+        for u, x, weight, first, second in found:
+            add_edge(u, x, weight, first, second, -1)
+        contracted[v] = True
+        rank[v] = order
+        order += 1
+        for neighbour in set(out[v]) | set(incoming[v]):
+            if not contracted[neighbour]:
+                contracted_neighbours[neighbour] += 1
+
+    return rank, edges
+
+
+def _csr(group, node_count, order_by):
+    """Offsets and edge order grouping the selected edges by a node array."""
+    order = group[np.argsort(order_by[group], kind='stable')]
+    counts = np.bincount(order_by[order], minlength=node_count)
+    return np.concatenate([[0], np.cumsum(counts)]).astype(np.int64), order
+
+
+class ContractionHierarchy:
+    """A contraction hierarchy for one profile, in memory or memory-mapped."""
+
+    def __init__(self, arrays, meta):
+        """
+        Args:
+            arrays: Dictionary with one numpy array per name in ARRAYS
+            meta: Dictionary describing the build (profile, fingerprint, ...)
+        """
+        self.meta = meta
+        self.fingerprint = meta['fingerprint']
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+    @classmethod
+    def build(cls, graph, hours, name=''):
+        """
+        Build a hierarchy from a RoadGraph's mean travel times over some hours.
+
+        The times leave out traffic jams: graph.weights include the jams
+        active while the graph was loaded, and jam changes do not mark
+        hierarchies dirty.
+
+        Args:
+            graph: RoadGraph
+            hours: Hours of the week to average the travel times over
+            name: Profile name recorded in the metadata
+        """
+        start = time.perf_counter()
+        weights = (graph.base_minutes * graph.factors[hours]).astype(np.float64).mean(axis=0)
+        rank, edges = contract(graph.node_count, graph.sources, graph.targets, weights.tolist())
+
+        n = graph.node_count
+        rank = np.array(rank, dtype=np.int64)
+        source = np.array(edges['source'], dtype=np.int64)
+        target = np.array(edges['target'], dtype=np.int64)
+        weight = np.array(edges['weight'], dtype=np.float64)
+
+        # Forward search follows edges up in rank from their source; backward
+        # search follows edges whose source is higher, from their target
+        upward = rank[source] < rank[target]
+        up_offsets, up = _csr(np.nonzero(upward)[0], n, source)
+        down_offsets, down = _csr(np.nonzero(~upward)[0], n, target)
+
+        arrays = {
+            'rank': rank,
+            'up_offsets': up_offsets,
+            'up_targets': target[up],
+            'up_weights': weight[up],
+            'up_edges': up,
+            'down_offsets': down_offsets,
+            'down_sources': source[down],
+            'down_weights': weight[down],
+            'down_edges': down,
+            'edge_source': source,
+            'edge_target': target,
+            'edge_first': np.array(edges['first'], dtype=np.int64),
+            'edge_second': np.array(edges['second'], dtype=np.int64),
+            'edge_original': np.array(edges['original'], dtype=np.int64),
+        }
+        meta = {
+            'profile': name,
+            'hours': [int(how) for how in hours],
+            'fingerprint': graph.fingerprint,
+            'nodes': n,
+            'edges': graph.edge_count,
+            'shortcuts': int(source.size - np.count_nonzero(arrays['edge_original'] >= 0)),
+            'build_seconds': time.perf_counter() - start,
+            'built_at': time.time(),
+        }
+        return cls(arrays, meta)
+
+    def save(self, directory, name):
+        """
+        Write the arrays to a new subdirectory and point <name>.json at it.
+
+        The pointer file is replaced atomically, so readers see either the
+        old hierarchy or the new one. Older builds of the profile are
+        removed, except the previous one, which may still be mapped.
+        """
+        os.makedirs(directory, exist_ok=True)
+        build_dir = f"{name}-{int(time.time() * 1000)}"
+        path = os.path.join(directory, build_dir)
+        os.makedirs(path)
+        for array_name in ARRAYS:
+            np.save(os.path.join(path, f'{array_name}.npy'), getattr(self, array_name))
+
+        pointer = os.path.join(directory, f'{name}.json')
+        previous = None
+        try:
+            with open(pointer) as f:
+                previous = json.load(f).get('directory')
+        except (OSError, ValueError):
+            pass
+
+        tmp_pointer = f'{pointer}.tmp'
+        with open(tmp_pointer, 'w') as f:
+            json.dump(dict(self.meta, directory=build_dir), f)
+        os.replace(tmp_pointer, pointer)
+
+        for entry in os.listdir(directory):
+            if entry.startswith(f'{name}-') and entry not in (build_dir, previous):
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+
+    @classmethod
+    def load(cls, directory, name):
+        """
+        Memory-map a saved hierarchy.
+
+        Raises:
+            OSError, ValueError: If the files are missing or unreadable
+        """
+        with open(os.path.join(directory, f'{name}.json')) as f:
+            meta = json.load(f)
+        path = os.path.join(directory, meta['directory'])
+        # Plain ndarray views of the mapped files: indexing np.memmap itself
+        # is several times slower
+        arrays = {
+            array_name: np.asarray(np.load(os.path.join(path, f'{array_name}.npy'), mmap_mode='r'))
+            for array_name in ARRAYS
+        }
+        return cls(arrays, meta)
+
+    def query(self, source, target):
+        """
+        Find the shortest path between two node indexes.
+
+        Returns:
+            PathResult with the profile's travel time, the RoadGraph edge
+            indexes of the path and the number of nodes settled, or None if
+            target cannot be reached
+        """
+        if source == target:
+            return PathResult(0.0, [], 0)
+
+        # Each direction relaxes its own edges and checks the other
+        # direction's edges for stalling
+        forward = {'distances': {source: 0.0}, 'predecessors': {}, 'queue': [(0.0, source)],
+                   'offsets': self.up_offsets, 'nodes': self.up_targets,
+                   'weights': self.up_weights, 'edges': self.up_edges,
+                   'stall_offsets': self.down_offsets, 'stall_nodes': self.down_sources,
+                   'stall_weights': self.down_weights}
+        backward = {'distances': {target: 0.0}, 'predecessors': {}, 'queue': [(0.0, target)],
+                    'offsets': self.down_offsets, 'nodes': self.down_sources,
+                    'weights': self.down_weights, 'edges': self.down_edges,
+                    'stall_offsets': self.up_offsets, 'stall_nodes': self.up_targets,
+                    'stall_weights': self.up_weights}
+        best = math.inf
+        meeting = None
+        expanded = 0
+
+        while forward['queue'] or backward['queue']:
+            if forward['queue'] and (not backward['queue'] or forward['queue'][0][0] <= backward['queue'][0][0]):
+                search, other = forward, backward
+            else:
+                search, other = backward, forward
+
+            distance, node = heapq.heappop(search['queue'])
+            if distance >= best:
+                # Nothing left in this direction can shorten the path
+                search['queue'].clear()
+                continue
+            distances = search['distances']
+            if distance > distances[node]:
+                continue
+
+            # Stall-on-demand: a higher node already reached more cheaply
+            # means this distance is not optimal, so don't search on from here
+            start, end = search['stall_offsets'][node:node + 2].tolist()
+            if any(distances.get(higher, math.inf) + weight < distance
+                   for higher, weight in zip(search['stall_nodes'][start:end].tolist(),
+                                             search['stall_weights'][start:end].tolist())):
+                continue
+            expanded += 1
+
+            start, end = search['offsets'][node:node + 2].tolist()
+            for neighbour, weight, edge in zip(search['nodes'][start:end].tolist(),
+                                               search['weights'][start:end].tolist(),
+                                               search['edges'][start:end].tolist()):
+                new_distance = distance + weight
+                if new_distance < distances.get(neighbour, math.inf):
+                    distances[neighbour] = new_distance
+                    search['predecessors'][neighbour] = edge
+                    heapq.heappush(search['queue'], (new_distance, neighbour))
+                    other_distance = other['distances'].get(neighbour)
+                    if other_distance is not None and new_distance + other_distance < best:
+                        best = new_distance + other_distance
+                        meeting = neighbour
+
+        if meeting is None:
+            return None
+
+        # Hierarchy edges from source up to the meeting node, then down to target
+        path = []
+        node = meeting
+        while node != source:
+            edge = forward['predecessors'][node]
+            path.append(edge)
+            node = int(self.edge_source[edge])
+        path.reverse()
+        node = meeting
+        while node != target:
+            edge = backward['predecessors'][node]
+            path.append(edge)
+            node = int(self.edge_target[edge])
+
+        return PathResult(best, self._unpack(path), expanded)
+
+    def _unpack(self, path):
+        """Replace shortcuts by the original edges they stand for."""
+        edges = []
+        stack = list(reversed(path))
+        while stack:
+            edge = stack.pop()
+            original = int(self.edge_original[edge])
+            if original >= 0:
+                edges.append(original)
+            else:
+                stack.append(int(self.edge_second[edge]))
+                stack.append(int(self.edge_first[edge]))
+        return edges
+
+
+def _dirty_path(name):
+    return os.path.join(get_hierarchy_dir(), f'{name}.dirty')
+
+
+def is_dirty(name):
+    """Whether a profile's hierarchy is out of date and must not be used."""
+    return os.path.exists(_dirty_path(name))
+
+
+def _clear_dirty(name):
+    try:
+        os.remove(_dirty_path(name))
+    except FileNotFoundError:
+        pass
+
+
+def mark_dirty(names=None):
+    """
+    Stop using the hierarchies of some profiles (default: all) until rebuilt.
+
+    Args:
+        names: Profile names, or None for every profile
+    """
+    names = list(get_profiles()) if names is None else names
+    try:
+        os.makedirs(get_hierarchy_dir(), exist_ok=True)
+        for name in names:
+            with open(_dirty_path(name), 'w'):
+                pass
+    except OSError as e:
+        logger.error("Could not mark route hierarchies %s dirty: %s", ', '.join(names), str(e))
+
+
+def mark_hour_dirty(how):
+    """Mark the profile covering an hour of the week dirty."""
+    name = profile_for_hour(how)
+    if name is not None:
+        mark_dirty([name])
+
+
+class HierarchyStore:
+    """Memory-mapped hierarchies of this process, reloaded when rebuilt."""
+
+    def __init__(self):
+        self._loaded = {}
+        self._lock = threading.Lock()
+
+    def get(self, graph, how):
+        """
+        Hierarchy usable for an hour of the week, or None to fall back to A*.
+
+        Args:
+            graph: RoadGraph the query runs on
+            how: Hour of the week
+        """
+        if not getattr(settings, 'ROUTE_CH_ENABLED', True):
+            return None
+        name = profile_for_hour(how)
+        if name is None or is_dirty(name):
+            return None
+
+        directory = get_hierarchy_dir()
+        try:
+            mtime = os.stat(os.path.join(directory, f'{name}.json')).st_mtime_ns
+        except OSError:
+            return None
+
+        loaded = self._loaded.get(name)
+        if loaded is None or loaded[0] != mtime:
+            with self._lock:
+                loaded = self._loaded.get(name)
+                if loaded is None or loaded[0] != mtime:
+                    try:
+                        loaded = (mtime, ContractionHierarchy.load(directory, name))
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.warning("Could not load route hierarchy %s: %s", name, str(e))
+                        return None
+                    self._loaded[name] = loaded
+
+        hierarchy = loaded[1]
+        return hierarchy if hierarchy.fingerprint == graph.fingerprint else None
+
+
+_store = HierarchyStore()
+
+
+def get_hierarchy(graph, how):
+    """Return a hierarchy for the graph and hour, or None (see HierarchyStore.get)."""
+    return _store.get(graph, how)
+
+
+def rebuild_hierarchies(names=None, force=False):
+    """
+    Rebuild profiles that are dirty, missing or built for another graph layout.
+
+    Args:
+        names: Profile names to consider (default: all)
+        force: Rebuild even if the saved hierarchy is current
+
+    Returns:
+        List of metadata dictionaries of the rebuilt hierarchies (empty if
+        another rebuild is already running)
+    """
+    profiles = get_profiles()
+    names = list(profiles) if names is None else names
+    unknown = [name for name in names if name not in profiles]
+    if unknown:
+        raise ValueError(f"Unknown route profiles: {', '.join(unknown)}")
+
+    # A full rebuild of a large network can outlast the beat interval
+    if not cache.add(REBUILD_LOCK_KEY, True, timeout=6 * 3600):
+        logger.info("Route hierarchy rebuild already running, skipping")
+        return []
+    try:
+        return _rebuild(names, profiles, force)
+    finally:
+        cache.delete(REBUILD_LOCK_KEY)
+
+
+def _rebuild(names, profiles, force):
+    # Clear the dirty flags before loading the graph, so a change committed
+    # at any point after this marks its profile dirty again instead of being
+    # lost in a build from an older graph
+    dirty = {name for name in names if is_dirty(name)}
+    for name in dirty:
+        _clear_dirty(name)
+
+    built = set()
+    try:
+        graph = RoadGraph.from_database()
+        if graph is None:
+            return []
+
+        directory = get_hierarchy_dir()
+        rebuilt = []
+        for name in names:
+            if not force and name not in dirty:
+                try:
+                    with open(os.path.join(directory, f'{name}.json')) as f:
+                        if json.load(f).get('fingerprint') == graph.fingerprint:
+                            continue
+                except (OSError, ValueError):
+                    pass
+
+            hierarchy = ContractionHierarchy.build(graph, profile_hours(profiles[name]), name)
+            hierarchy.save(directory, name)
+            built.add(name)
+            logger.info(
+                "Built route hierarchy %s: %d nodes, %d shortcuts in %.1f s",
+                name, hierarchy.meta['nodes'], hierarchy.meta['shortcuts'], hierarchy.meta['build_seconds']
+            )
+            rebuilt.append(hierarchy.meta)
+        return rebuilt
+    except Exception:
+        # Their old hierarchies still match the graph layout, so without the
+        # flag they would be served as current
+        unbuilt = sorted(dirty - built)
+        if unbuilt:
+            mark_dirty(unbuilt)
+        raise
@@ -0,0 +1,305 @@
+"""
+Management command to benchmark route search on synthetic city graphs.
+"""
+import heapq
+import json
+import math
+import tempfile
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from route_planner.graph import RoadGraph, haversine_km, hour_of_week
+from route_planner.hierarchy import ContractionHierarchy
+from route_planner.search import alternative_paths, astar
+
+# Roughly the centre of the Kathmandu valley
+ORIGIN_LAT = 27.68
+ORIGIN_LON = 85.28
+
+# Degrees between neighbouring intersections (about 150 m)
+BLOCK_DEGREES = 0.0015
+
+
+def synthetic_city_graph(nodes, seed=0, how=0):
+    """
+    Build a RoadGraph shaped like a city street grid.
+
+    Intersections sit on a jittered grid with two-way streets to their
+    neighbours; about 8% of streets are missing, every tenth street is a
+    faster arterial road, and a third of streets are congested at the
+    given hour of the week.
+
+    Args:
+        nodes: Number of intersections
+        seed: Random seed
+        how: Hour of the week that gets traffic factors
+
+    Returns:
+        RoadGraph whose node IDs are 0..nodes-1
+    """
+    rng = np.random.default_rng(seed)
+    side = int(math.ceil(math.sqrt(nodes)))
+    ids = np.arange(nodes)
+    rows, cols = ids // side, ids % side
+    latitudes = ORIGIN_LAT + (rows + rng.uniform(-0.3, 0.3, nodes)) * BLOCK_DEGREES
+    longitudes = ORIGIN_LON + (cols + rng.uniform(-0.3, 0.3, nodes)) * BLOCK_DEGREES
+
+    right = ids[(cols < side - 1) & (ids + 1 < nodes)]
+    down = ids[ids + side < nodes]
+    starts = np.concatenate([right, down])
+    ends = np.concatenate([right + 1, down + side])
+    arterial = np.concatenate([rows[right] % 10 == 0, cols[down] % 10 == 0])
+    keep = rng.random(starts.size) < 0.92
+    starts, ends, arterial = starts[keep], ends[keep], arterial[keep]
+
+    # Streets are a little longer than the straight line between intersections
+    km = haversine_km(latitudes[starts], longitudes[starts], latitudes[ends], longitudes[ends])
+    km = km * rng.uniform(1.0, 1.2, starts.size)
+    speed_kmh = np.where(arterial, 50.0, rng.uniform(15.0, 35.0, starts.size))
+    minutes = km / speed_kmh * 60
+
+    # Both directions of every street
+    sources = np.concatenate([starts, ends]).tolist()
+    targets = np.concatenate([ends, starts]).tolist()
+    km = np.concatenate([km, km]).tolist()
+    minutes = np.concatenate([minutes, minutes]).tolist()
+    edges = [
+        (route_id, origin, destination, distance, duration)
+        for route_id, (origin, destination, distance, duration)
+        in enumerate(zip(sources, targets, km, minutes), start=1)
+    ]
+
+    congested = np.nonzero(rng.random(len(edges)) < 0.33)[0]
+    factors = {
+        (int(e) + 1, how): float(factor)
+        for e, factor in zip(congested, rng.uniform(1.2, 2.5, congested.size))
+    }
+    coordinates = dict(zip(ids.tolist(), zip(latitudes.tolist(), longitudes.tolist())))
+    return RoadGraph(ids.tolist(), edges, factors, coordinates=coordinates)
+
+
+def legacy_search(adjacency, origin, destination):
+    """
+    The planner's previous search: a list-based BFS reachability pass
+    followed by Dijkstra over a dict of dicts.
+
+    Returns:
+        (total minutes, nodes expanded) or None if destination is unreachable
+    """
+    reachable = set()
+    to_visit = [origin]
+    while to_visit:
+        node = to_visit.pop(0)
+        if node not in reachable:
+            reachable.add(node)
+            for neighbor in adjacency.get(node, {}):
+                to_visit.append(neighbor)
+    if destination not in reachable:
+        return None
+
+    distances = {node: float('infinity') for node in adjacency}
+    distances[origin] = 0
+    priority_queue = [(0, origin)]
+    expanded = 0
+    while priority_queue:
+        current_distance, current_node = heapq.heappop(priority_queue)
+        if current_node == destination:
+            break
+        if current_distance > distances[current_node]:
+            continue
+        expanded += 1
+        for neighbor, weight in adjacency.get(current_node, {}).items():
+            distance_through_current = distances[current_node] + weight
+            if distance_through_current < distances.get(neighbor, float('infinity')):
+                distances[neighbor] = distance_through_current
+                heapq.heappush(priority_queue, (distance_through_current, neighbor))
+    return distances[destination], expanded
+
+
+class Command(BaseCommand):
+    help = ('Compare the A* route search with the previous BFS + Dijkstra search, and time '
+            'alternative routes, on synthetic city graphs')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nodes',
+            type=int,
+            action='append',
+            help='Intersections in the synthetic graph (repeatable, default 10000 and 100000)'
+        )
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=200,
+            help='Random origin/destination pairs searched with A*'
+        )
+        parser.add_argument(
+            '--legacy-queries',
+            type=int,
+            default=5,
+            help='How many of those pairs to also run through the previous search (slow on large graphs)'
+        )
+        parser.add_argument(
+            '--alternatives',
+            type=int,
+            default=3,
+            help='Also time alternative_paths for this many routes per pair (0 to skip)'
+        )
+        parser.add_argument(
+            '--max-expansions',
+            type=int,
+            default=100000,
+            help='Expansion budget for the alternative-route searches'
+        )
+        parser.add_argument(
+            '--hierarchy',
+            action='store_true',
+            help='Also build a contraction hierarchy and time memory-mapped queries (slow to build)'
+        )
+        parser.add_argument('--seed', type=int, default=0, help='Random seed')
+        parser.add_argument('--json', action='store_true', help='Print raw results as JSON')
+
+    def handle(self, *args, **options):
+        how = hour_of_week(0, 8)  # Monday morning rush hour
+        results = []
+        for nodes in options['nodes'] or [10000, 100000]:
+            start = time.perf_counter()
+            graph = synthetic_city_graph(nodes, options['seed'], how)
+            build_seconds = time.perf_counter() - start
+
+            rng = np.random.default_rng(options['seed'] + 1)
+            pairs = rng.integers(0, graph.node_count, (max(1, options['queries']), 2)).tolist()
+
+            astar_costs = []
+            astar_runs = []
+            for source, target in pairs:
+                start = time.perf_counter()
+                result = astar(graph, source, target, how)
+                astar_runs.append(((time.perf_counter() - start) * 1000, result.expanded if result else 0))
+                astar_costs.append(result.cost if result else None)
+
+            alternative_runs = []
+            if options['alternatives'] > 1:
+                for source, target in pairs:
+                    start = time.perf_counter()
+                    paths = alternative_paths(
+                        graph, source, target, how, k=options['alternatives'],
+                        max_expansions=options['max_expansions']
+                    )
+                    alternative_runs.append((
+                        (time.perf_counter() - start) * 1000, sum(path.expanded for path in paths), len(paths)
+                    ))
+
+            hierarchy_runs = []
+            hierarchy_build = None
+            if options['hierarchy']:
+                hierarchy_runs, hierarchy_build, hierarchy_mismatches = self._time_hierarchy(
+                    graph, how, pairs, astar_costs
+                )
+
+            legacy_runs = []
+            mismatches = 0
+            legacy_pairs = pairs[:max(0, options['legacy_queries'])]
+            if legacy_pairs:
+                adjacency = self._adjacency(graph, how)
+                for (source, target), astar_cost in zip(legacy_pairs, astar_costs):
+                    start = time.perf_counter()
+                    legacy = legacy_search(adjacency, source, target)
+                    legacy_runs.append(((time.perf_counter() - start) * 1000, legacy[1] if legacy else 0))
+                    legacy_cost = legacy[0] if legacy else None
+                    if self._differs(legacy_cost, astar_cost):
+                        mismatches += 1
+            if options['hierarchy']:
+                mismatches += hierarchy_mismatches
+
+            results.append({
+                'nodes': graph.node_count,
+                'edges': graph.edge_count,
+                'build_seconds': build_seconds,
+                'astar': self._summary(astar_runs),
+                'alternatives': self._summary(alternative_runs) if alternative_runs else None,
+                'hierarchy': self._summary(hierarchy_runs) if hierarchy_runs else None,
+                'hierarchy_build': hierarchy_build,
+                'legacy': self._summary(legacy_runs) if legacy_runs else None,
+                'cost_mismatches': mismatches,
+            })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'nodes':>8}{'edges':>9}{'engine':>14}{'queries':>9}{'mean ms':>10}"
+            f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'expanded':>10}"
+        )
+        for result in results:
+            for engine in ('astar', 'alternatives', 'hierarchy', 'legacy'):
+                summary = result[engine]
+                if summary is None:
+                    continue
+                self.stdout.write(
+                    f"{result['nodes']:>8}{result['edges']:>9}{engine:>14}{summary['queries']:>9}"
+                    f"{summary['mean_ms']:>10.2f}{summary['p50_ms']:>9.2f}{summary['p95_ms']:>9.2f}"
+                    f"{summary['p99_ms']:>9.2f}{summary['mean_expanded']:>10.0f}"
+                )
+            if result['hierarchy_build']:
+                build = result['hierarchy_build']
+                self.stdout.write(
+                    f"{'':>8}{'':>9}  hierarchy built in {build['build_seconds']:.1f} s "
+                    f"with {build['shortcuts']} shortcuts"
+                )
+            if result['cost_mismatches']:
+                self.stdout.write(self.style.ERROR(
+                    f"{result['cost_mismatches']} queries on the {result['nodes']}-node graph "
+                    f"found a different travel time than A*"
+                ))
+        self.stdout.write(self.style.SUCCESS('Travel times agree across search engines'
+                                             if not any(r['cost_mismatches'] for r in results)
+                                             else 'Benchmark finished with mismatches'))
+
+    def _differs(self, cost, expected):
+        return (cost is None) != (expected is None) or (
+            cost is not None and abs(cost - expected) > 1e-4 * max(1.0, expected)
+        )
+
+    def _time_hierarchy(self, graph, how, pairs, astar_costs):
+        """Build, save and memory-map a hierarchy for one hour, then query it."""
+        hierarchy = ContractionHierarchy.build(graph, [how], 'benchmark')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            hierarchy.save(tmp_dir, 'benchmark')
+            mapped = ContractionHierarchy.load(tmp_dir, 'benchmark')
+
+            runs = []
+            mismatches = 0
+            for (source, target), astar_cost in zip(pairs, astar_costs):
+                start = time.perf_counter()
+                result = mapped.query(source, target)
+                runs.append(((time.perf_counter() - start) * 1000, result.expanded if result else 0))
+                if self._differs(result.cost if result else None, astar_cost):
+                    mismatches += 1
+            del mapped
+        return runs, hierarchy.meta, mismatches
+
+    def _adjacency(self, graph, how):
+        """The graph as the dict of dicts the previous search used."""
+        weights = graph.weight_list(how)
+        adjacency = {node: {} for node in range(graph.node_count)}
+        for e, (source, target) in enumerate(zip(graph.sources, graph.targets)):
+            adjacency[source][target] = weights[e]
+        return adjacency
+
+    def _summary(self, runs):
+        times = np.array([run[0] for run in runs])
+        summary = {
+            'queries': len(runs),
+            'mean_ms': float(times.mean()),
+            'p50_ms': float(np.percentile(times, 50)),
+            'p95_ms': float(np.percentile(times, 95)),
+            'p99_ms': float(np.percentile(times, 99)),
+            'mean_expanded': float(np.mean([run[1] for run in runs])),
+        }
+        if len(runs[0]) > 2:
+            summary['mean_routes'] = float(np.mean([run[2] for run in runs]))
+        return summary
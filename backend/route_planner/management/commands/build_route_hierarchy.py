@@ -0,0 +1,49 @@
+"""
+Management command to build contraction hierarchies for route queries.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from route_planner.hierarchy import get_hierarchy_dir, get_profiles, rebuild_hierarchies
+
+
+class Command(BaseCommand):
+    help = 'Build the contraction hierarchy of each time-of-day profile and save it to ROUTE_CH_DIR'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--profile',
+            action='append',
+            dest='profiles',
+            help='Profile to build (repeatable, default: all)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Rebuild even if the saved hierarchy is current'
+        )
+        parser.add_argument(
+            '--list',
+            action='store_true',
+            help='List the profiles and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for name, profile in get_profiles().items():
+                self.stdout.write(f"{name}: days {profile['days']}, hours {profile['hours']}")
+            return
+
+        try:
+            rebuilt = rebuild_hierarchies(options['profiles'], force=options['force'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for meta in rebuilt:
+            self.stdout.write(
+                f"{meta['profile']}: {meta['nodes']} nodes, {meta['edges']} edges, "
+                f"{meta['shortcuts']} shortcuts in {meta['build_seconds']:.1f} s"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(rebuilt)} route hierarchies in {get_hierarchy_dir()}"
+            if rebuilt else 'Route hierarchies are up to date'
+        ))
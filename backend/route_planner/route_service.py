@@ -2,13 +2,16 @@
 Route planning service for recommending optimal routes based on traffic patterns.
 """
 
-import heapq
 import json
 from datetime import timedelta
+from django.conf import settings
 from django.utils import timezone
 from django.db.models import Avg, F, ExpressionWrapper, fields
 
 from .models import Location, Route, RouteTrafficData, RouteRecommendation, RecommendedRoute, TrafficJam
+from .graph import RoadGraph, get_road_graph, hour_of_week
+from .hierarchy import get_hierarchy
+from .search import PathResult, alternative_paths, astar
 
 
 class RoutePlannerService:
@@ -31,7 +34,9 @@ class RoutePlannerService:
             max_routes: Maximum number of alternative routes to return
             
         Returns:
-            List of routes with travel time estimates in order of preference
+            List of routes with travel time estimates in order of preference;
+            fewer than max_routes if there are no sufficiently different
+            alternatives
         """
         if travel_datetime is None:
             travel_datetime = timezone.now()
@@ -47,148 +52,69 @@ class RoutePlannerService:
         except Location.DoesNotExist:
             return []
         
-        # Build a graph with traffic-adjusted travel times
-        graph = self._build_route_graph(day_of_week, hour_of_day)
-        if not graph:
-            return []
-        
-        # Find the optimal route first
-        optimal_route = self._find_route_with_graph(graph, origin_id, destination_id)
-        if not optimal_route:
-            return []
-        
-        # Extract the route segment IDs for the optimal route
-        primary_route_ids = [segment['route_id'] for segment in optimal_route['segments'] if segment.get('route_id')]
-        
-        # Find alternative routes
-        alt_routes = self._find_alternative_routes(
-            origin, destination, primary_route_ids, day_of_week, hour_of_day, max_routes - 1
-        )
-        
-        # Combine primary and alternative routes
-        all_routes = [optimal_route] + alt_routes
-        
-        # For testing purposes, create different route types if we don't have enough
-        if len(all_routes) < max_routes:
-            # Just duplicate the optimal route with slight variations for testing
-            for i in range(len(all_routes), max_routes):
-                variation = 0.9 + (i * 0.1)  # Slight variation in distance and time
-                route_copy = optimal_route.copy()
-                route_copy['total_distance'] = optimal_route['total_distance'] * variation
-                route_copy['total_time'] = optimal_route['total_time'] * variation
-                
-                # Make sure we have different route types
-                if i == 1:
-                    route_copy['is_fastest'] = False
-                    route_copy['is_shortest'] = True
-                elif i == 2:
-                    route_copy['is_fastest'] = False
-                    route_copy['is_shortest'] = False
-                
-                all_routes.append(route_copy)
-        
-        return all_routes
+        return self._find_optimal_routes(origin, destination, day_of_week, hour_of_day, max_routes)
 
     def _find_optimal_routes(self, origin, destination, day_of_week, hour_of_day, max_routes):
         """
-        Find optimal routes using a modified Dijkstra's algorithm that accounts for traffic patterns.
-        
-        This implementation uses a priority queue to find the shortest path while
-        also considering current traffic conditions.
+        Find the fastest route and up to max_routes - 1 genuinely different
+        alternatives, using the traffic-adjusted travel times for the hour.
         """
-        # Build a graph with traffic-adjusted travel times
-        graph = self._build_route_graph(day_of_week, hour_of_day)
-        if not graph:
-            return []
+        # The process-wide graph has travel times for every hour of the week
+        graph = self._get_graph()
+        how = hour_of_week(day_of_week, hour_of_day)
         
-        # Find the optimal route first
-        optimal_route = self._find_route_with_graph(graph, origin.id, destination.id)
-        if not optimal_route:
+        source = graph.node_index(origin.id)
+        target = graph.node_index(destination.id)
+        if source is None or target is None:
             return []
         
-        # Extract the route segment IDs for the optimal route
-        primary_route_ids = [segment['route_id'] for segment in optimal_route['segments'] if segment.get('route_id')]
+        fastest = self._fastest_path(graph, source, target, how)
+        if fastest is None:
+            return []
         
-        # Find alternative routes
-        alt_routes = self._find_alternative_routes(
-            origin, destination, primary_route_ids, day_of_week, hour_of_day, max_routes - 1
+        paths = alternative_paths(
+            graph, source, target, how, k=max_routes,
+            max_expansions=getattr(settings, 'ROUTE_ALTERNATIVE_MAX_EXPANSIONS', 100000),
+            fastest=fastest
         )
+        if not paths:
+            return []
+        
+        # Fetch every location on every route in one query
+        node_paths = [[origin.id] + [graph.node_ids[graph.targets[e]] for e in path.edges] for path in paths]
+        locations = Location.objects.in_bulk({node_id for node_path in node_paths for node_id in node_path})
         
-        # Combine primary and alternative routes
-        all_routes = [optimal_route] + alt_routes
+        routes = [
+            self._build_route(graph, path.edges, node_path, how, locations)
+            for path, node_path in zip(paths, node_paths)
+        ]
         
-        return all_routes
+        # The hierarchy picks its path on the profile's average times, so a
+        # penalised alternative can be faster at this hour: rank by real time
+        routes.sort(key=lambda route: route['total_time'])
+        shortest = min(routes, key=lambda route: route['total_distance'])
+        for i, route in enumerate(routes):
+            route['is_fastest'] = i == 0
+            route['is_shortest'] = route is shortest
+        
+        return routes
 
-    def _build_route_graph(self, day_of_week, hour_of_day):
+    def _get_graph(self):
         """
-        Build a graph representation of the routes with traffic-adjusted travel times.
+        Return the road graph with traffic-adjusted travel times.
         
-        Returns a dict of dicts:
-        {
-            location_id: {
-                neighbor_id: (route_id, distance, adjusted_time),
-                ...
-            },
-            ...
-        }
+        The graph is loaded once per process and kept current by signals
+        (see graph.py), instead of being rebuilt from the database on every
+        request.
         """
-        # In a real implementation, we would query the database for all routes and their traffic factors
-        # Here, we'll create a simple simulated graph
-        
         try:
-            # Get all routes and include traffic data if available
-            routes = Route.objects.select_related('origin', 'destination').all()
-            
-            # If we have no routes yet, return a dummy graph for testing
-            if not routes:
-                return self._build_dummy_graph()
-            
-            graph = {}
-            
-            for route in routes:
-                origin_id = route.origin_id
-                destination_id = route.destination_id
-                
-                # Get traffic data for this route segment at this time, if available
-                try:
-                    traffic_data = RouteTrafficData.objects.get(
-                        route=route, 
-                        day_of_week=day_of_week, 
-                        hour_of_day=hour_of_day
-                    )
-                    traffic_factor = float(traffic_data.traffic_factor)
-                except RouteTrafficData.DoesNotExist:
-                    # Default to normal traffic conditions
-                    traffic_factor = 1.0
-                
-                # Check if there are active traffic jams at either end of the route
-                origin_jams = TrafficJam.objects.filter(
-                    location_id=origin_id, 
-                    is_active=True
-                ).count()
-                
-                destination_jams = TrafficJam.objects.filter(
-                    location_id=destination_id, 
-                    is_active=True
-                ).count()
-                
-                # Increase traffic factor based on reported jams
-                if origin_jams or destination_jams:
-                    traffic_factor += (origin_jams + destination_jams) * 0.5
-                
-                # Calculate adjusted travel time based on traffic
-                adjusted_time = route.normal_duration_minutes * traffic_factor
-                
-                # Add to graph - note we're doing a directed graph
-                if origin_id not in graph:
-                    graph[origin_id] = {}
-                
-                graph[origin_id][destination_id] = (route.id, float(route.distance_km), adjusted_time)
-            
-            return graph
-        except Exception as e:
+            graph = get_road_graph()
+        except Exception:
             # For robustness, if there's any error, use a dummy graph
             return self._build_dummy_graph()
+        
+        # If we have no routes yet, return a dummy graph for testing
+        return graph if graph is not None else self._build_dummy_graph()
 
     def _build_dummy_graph(self):
         """
@@ -197,206 +123,95 @@ class RoutePlannerService:
         This creates a small, artificial road network for demonstration purposes.
         """
         # We'll create a simple graph with locations 1-5
-        graph = {
-            1: {2: (None, 5.0, 10.0), 3: (None, 8.0, 15.0)},
-            2: {4: (None, 10.0, 20.0), 5: (None, 15.0, 25.0)},
-            3: {4: (None, 7.0, 12.0), 5: (None, 9.0, 18.0)},
-            4: {5: (None, 6.0, 10.0)},
-            5: {}
-        }
-        return graph
+        # (route_id, origin, destination, distance_km, minutes)
+        edges = [
+            (None, 1, 2, 5.0, 10.0), (None, 1, 3, 8.0, 15.0),
+            (None, 2, 4, 10.0, 20.0), (None, 2, 5, 15.0, 25.0),
+            (None, 3, 4, 7.0, 12.0), (None, 3, 5, 9.0, 18.0),
+            (None, 4, 5, 6.0, 10.0),
+        ]
+        return RoadGraph([1, 2, 3, 4, 5], edges)
 
-    def _find_alternative_routes(self, origin, destination, primary_route_ids, day_of_week, hour_of_day, max_alts):
+    def _fastest_path(self, graph, source, target, how):
         """
-        Find alternative routes by avoiding certain segments of the primary route.
-        """
-        alternative_routes = []
-        
-        if not primary_route_ids or max_alts <= 0:
-            return alternative_routes
-        
-        # In a real implementation, we would create temporary graphs that
-        # avoid key segments of the primary route, and find new routes through them
-        
-        # For simplicity, we'll create routes that are slightly longer/slower
-        # but would normally be unique paths
+        Find the fastest path between two node indexes.
         
-        # Get the primary route details
-        graph = self._build_route_graph(day_of_week, hour_of_day)
-        primary_route = self._find_route_with_graph(graph, origin.id, destination.id)
+        Uses the contraction hierarchy of the hour's profile when a current
+        one exists, otherwise A* with a straight-line heuristic.
         
-        if not primary_route:
-            return alternative_routes
-        
-        # Create alternative routes with different characteristics
-        for i in range(max_alts):
-            # Make a copy of the primary route with modifications
-            alt_route = primary_route.copy()
-            
-            # Make this route slightly longer/slower
-            alt_route['total_distance'] = primary_route['total_distance'] * (1.1 + i * 0.05)
-            alt_route['total_time'] = primary_route['total_time'] * (1.15 + i * 0.1)
-            
-            # Copy segments but modify slightly
-            alt_route['segments'] = primary_route['segments'].copy()
-            
-            # Differentiate the route types
-            alt_route['is_fastest'] = False
-            alt_route['is_shortest'] = False
-            
-            alternative_routes.append(alt_route)
-        
-        return alternative_routes
-
-    def _find_route_with_graph(self, graph, origin_id, destination_id):
-        """
-        Find the optimal route using the provided graph.
+        Returns:
+            PathResult with the hour's real travel time, or None if the
+            destination cannot be reached
         """
-        # Implement Dijkstra's algorithm for shortest path
-        if origin_id not in graph or not graph:
-            return None
-        
-        # Check if destination is reachable
-        reachable = set()
-        to_visit = [origin_id]
+        hierarchy = get_hierarchy(graph, how)
+        if hierarchy is None:
+            return astar(graph, source, target, how)
         
-        while to_visit:
-            node = to_visit.pop(0)
-            if node not in reachable:
-                reachable.add(node)
-                for neighbor in graph.get(node, {}):
-                    to_visit.append(neighbor)
-        
-        if destination_id not in reachable:
+        result = hierarchy.query(source, target)
+        if result is None:
             return None
+        # The hierarchy's times are the profile's averages
+        weights = graph.weight_list(how)
+        return PathResult(sum(weights[e] for e in result.edges), result.edges, result.expanded)
+
+    def _build_route(self, graph, path_edges, path, how, locations):
+        """
+        Describe a path through the graph.
         
-        # Initialize distances and predecessors
-        distances = {node: float('infinity') for node in graph}
-        distances[origin_id] = 0
-        predecessors = {node: None for node in graph}
-        route_segments = {node: None for node in graph}
-        
-        # Priority queue for Dijkstra's algorithm
-        priority_queue = [(0, origin_id)]
-        
-        while priority_queue:
-            current_distance, current_node = heapq.heappop(priority_queue)
-            
-            # If we've reached the destination, we're done
-            if current_node == destination_id:
-                break
-            
-            # If we've already processed this node with a shorter path, skip it
-            if current_distance > distances[current_node]:
-                continue
-            
-            # Process neighbors
-            for neighbor, (route_id, distance, time) in graph.get(current_node, {}).items():
-                # Use time as the weight for finding fastest route
-                weight = time
-                distance_through_current = distances[current_node] + weight
-                
-                if distance_through_current < distances.get(neighbor, float('infinity')):
-                    distances[neighbor] = distance_through_current
-                    predecessors[neighbor] = current_node
-                    route_segments[neighbor] = (route_id, distance, time)
-                    heapq.heappush(priority_queue, (distance_through_current, neighbor))
-        
-        # Reconstruct the route
-        if predecessors[destination_id] is None:
-            return None
+        Args:
+            graph: RoadGraph
+            path_edges: Edge indexes from origin to destination
+            path: Location IDs from origin to destination
+            how: Hour of the week whose travel times are used
+            locations: Dictionary of Location objects by ID (from in_bulk)
+        """
+        weights = graph.weight_list(how)
         
-        # Build the route from destination to origin, then reverse
-        current = destination_id
-        path = []
         total_distance = 0
         total_time = 0
         segments = []
-        
-        while current != origin_id:
-            predecessor = predecessors[current]
-            route_id, distance, time = route_segments[current]
-            
-            # Get location details
-            try:
-                from_location = Location.objects.get(pk=predecessor)
-                to_location = Location.objects.get(pk=current)
-                
-                segment = {
-                    'from_location': {
-                        'id': from_location.id,
-                        'name': from_location.name,
-                        'latitude': float(from_location.latitude),
-                        'longitude': float(from_location.longitude)
-                    },
-                    'to_location': {
-                        'id': to_location.id,
-                        'name': to_location.name,
-                        'latitude': float(to_location.latitude),
-                        'longitude': float(to_location.longitude)
-                    },
-                    'distance_km': distance,
-                    'duration_minutes': time,
-                    'route_id': route_id
-                }
-                segments.append(segment)
-            except Location.DoesNotExist:
-                # Fallback for dummy graph
-                segment = {
-                    'from_location': {'id': predecessor, 'name': f'Location {predecessor}'},
-                    'to_location': {'id': current, 'name': f'Location {current}'},
-                    'distance_km': distance,
-                    'duration_minutes': time,
-                    'route_id': route_id
-                }
-                segments.append(segment)
-            
+        for e, from_id, to_id in zip(path_edges, path, path[1:]):
+            distance, time = graph.distances[e], weights[e]
+            segments.append({
+                'from_location': self._location_details(locations, from_id),
+                'to_location': self._location_details(locations, to_id),
+                'distance_km': distance,
+                'duration_minutes': time,
+                'route_id': graph.route_ids[e]
+            })
             total_distance += distance
             total_time += time
-            
-            path.append(current)
-            current = predecessor
-        
-        path.append(origin_id)
-        path.reverse()
-        segments.reverse()
-        
-        # Get or create origin and destination location details
-        try:
-            origin_location = Location.objects.get(pk=origin_id)
-            destination_location = Location.objects.get(pk=destination_id)
-            
-            origin_details = {
-                'id': origin_location.id,
-                'name': origin_location.name,
-                'latitude': float(origin_location.latitude),
-                'longitude': float(origin_location.longitude)
-            }
-            
-            destination_details = {
-                'id': destination_location.id,
-                'name': destination_location.name,
-                'latitude': float(destination_location.latitude),
-                'longitude': float(destination_location.longitude)
-            }
-        except Location.DoesNotExist:
-            # Fallback for dummy graph
-            origin_details = {'id': origin_id, 'name': f'Location {origin_id}'}
-            destination_details = {'id': destination_id, 'name': f'Location {destination_id}'}
         
         # Construct route details
-        route = {
-            'origin': origin_details,
-            'destination': destination_details,
+        return {
+            'origin': self._location_details(locations, path[0]),
+            'destination': self._location_details(locations, path[-1]),
             'total_distance': total_distance,
             'total_time': total_time,
             'path': path,
             'segments': segments,
-            'is_fastest': True,  # First route is fastest
-            'is_shortest': True  # First route is also shortest in this implementation
+            'is_fastest': True,
+            'is_shortest': True
         }
+
+    def _location_details(self, locations, location_id):
+        """
+        Describe a location on a route.
         
-        return route
+        Args:
+            locations: Dictionary of Location objects by ID (from in_bulk)
+            location_id: ID of the location to describe
+        """
+        location = locations.get(location_id)
+        if location is None:
+            # Fallback for dummy graph
+            return {'id': location_id, 'name': f'Location {location_id}'}
+        return {
+            'id': location.id,
+            'name': location.name,
+            'latitude': float(location.latitude),
+            'longitude': float(location.longitude)
+        }
 
     def _get_route_details(self, route_ids, total_distance, total_time, is_fastest, is_shortest):
         """
@@ -0,0 +1,184 @@
+"""
+Shortest-path search over a RoadGraph.
+
+astar() is an A* search whose heuristic is the straight-line (haversine)
+distance to the destination divided by the fastest straight-line speed of
+any edge at that hour (RoadGraph.max_speed). That bound never overestimates
+the remaining travel time and is consistent, so the first time the
+destination leaves the queue its path is optimal and the search stops.
+Nodes whose straight-line distance puts them further from the destination
+are expanded later, or not at all, instead of in every direction as in
+Dijkstra. Without coordinates the heuristic is zero and the search is plain
+Dijkstra.
+
+alternative_paths() finds diverse alternatives with the edge-penalty
+method: after each path is found its edges are made more expensive and the
+search is repeated, so the next search prefers other roads where they cost
+little extra. Candidates that mostly repeat an accepted route, or are much
+slower than the fastest one, are dropped. Every path is loop-free because
+each is a shortest path under positive weights. A shared budget of node
+expansions bounds the work per request.
+"""
+import heapq
+import math
+from collections import namedtuple
+
+from .graph import EARTH_RADIUS_KM
+
+PathResult = namedtuple('PathResult', ['cost', 'edges', 'expanded'])
+
+
+def _heuristic(graph, target, how):
+    """Return a function giving a lower bound of minutes from a node to target."""
+    speed = graph.max_speed(how)
+    if speed <= 0:
+        return lambda node: 0.0
+
+    lat_radians, lon_radians = graph.lat_radians, graph.lon_radians
+    target_lat, target_lon = lat_radians[target], lon_radians[target]
+    cos_target = math.cos(target_lat)
+    scale = 2 * EARTH_RADIUS_KM / speed
+
+    def heuristic(node):
+        lat = lat_radians[node]
+        a = (math.sin((target_lat - lat) / 2) ** 2
+             + math.cos(lat) * cos_target * math.sin((target_lon - lon_radians[node]) / 2) ** 2)
+        return scale * math.asin(math.sqrt(min(a, 1.0)))
+
+    return heuristic
+
+
+def astar(graph, source, target, how, penalties=None, max_expansions=None):
+    """
+    Find the fastest path between two node indexes.
+
+    Args:
+        graph: RoadGraph
+        source: Node index to start from
+        target: Node index to reach
+        how: Hour of the week whose travel times are used
+        penalties: Optional dictionary mapping edge index to a multiplier
+            (at least 1.0) applied to its travel time
+        max_expansions: Give up after expanding this many nodes
+
+    Returns:
+        PathResult with the total minutes (including penalties), the edge
+        indexes from source to target and the number of nodes expanded, or
+        None if target cannot be reached within max_expansions
+    """
+    offsets, targets = graph.offsets, graph.targets
+    weights = graph.weight_list(how)
+    heuristic = _heuristic(graph, target, how)
+
+    best = {source: 0.0}
+    predecessor_edges = {}
+    settled = set()
+    queue = [(heuristic(source), 0.0, source)]
+    expanded = 0
+
+    while queue:
+        _, cost, node = heapq.heappop(queue)
+        if node in settled:
+            continue
+        if node == target:
+            break
+        if max_expansions is not None and expanded >= max_expansions:
+            return None
+        settled.add(node)
+        expanded += 1
+
+        for e in range(offsets[node], offsets[node + 1]):
+            neighbor = targets[e]
+            if neighbor in settled:
+                continue
+            weight = weights[e]
+            if penalties is not None:
+                weight *= penalties.get(e, 1.0)
+            new_cost = cost + weight
+            if new_cost < best.get(neighbor, math.inf):
+                best[neighbor] = new_cost
+                predecessor_edges[neighbor] = e
+                heapq.heappush(queue, (new_cost + heuristic(neighbor), new_cost, neighbor))
+    else:
+        return None
+
+    edges = []
+    node = target
+    while node != source:
+        e = predecessor_edges[node]
+        edges.append(e)
+        node = graph.sources[e]
+    edges.reverse()
+    return PathResult(best[target], edges, expanded)
+
+
+def alternative_paths(graph, source, target, how, k=3, penalty=1.4, max_stretch=1.5,
+                      max_overlap=0.8, max_expansions=None, fastest=None):
+    """
+    Find up to k diverse, loop-free paths, fastest first.
+
+    Args:
+        graph: RoadGraph
+        source: Node index to start from
+        target: Node index to reach
+        how: Hour of the week whose travel times are used
+        k: Maximum number of paths
+        penalty: Travel time multiplier applied to the edges of each path found
+        max_stretch: Drop alternatives slower than this multiple of the fastest path
+        max_overlap: Drop alternatives sharing more than this share of their
+            travel time with an accepted path
+        max_expansions: Node expansions allowed for all alternative searches
+            together (the fastest path is always searched in full)
+        fastest: The fastest path if already known (e.g. from a contraction
+            hierarchy), with its real travel time
+
+    Returns:
+        List of PathResult with real (unpenalised) travel times; empty if
+        target cannot be reached
+    """
+    if fastest is None:
+        fastest = astar(graph, source, target, how)
+    if fastest is None or not fastest.edges:
+        return []
+
+    weights = graph.weight_list(how)
+    paths = [fastest]
+    seen = {tuple(fastest.edges)}
+    accepted_edges = [set(fastest.edges)]
+    penalties = {}
+    last_edges = fastest.edges
+    remaining = max_expansions
+
+    # Each round penalises the previous candidate; give up after a few
+    # rounds that only rediscover similar paths
+    for _ in range(3 * (k - 1)):
+        if len(paths) >= k or (remaining is not None and remaining <= 0):
+            break
+        for e in last_edges:
+            penalties[e] = penalties.get(e, 1.0) * penalty
+
+        candidate = astar(graph, source, target, how, penalties, remaining)
+        if candidate is None:
+            break
+        if remaining is not None:
+            remaining -= candidate.expanded
+        last_edges = candidate.edges
+
+        cost = sum(weights[e] for e in candidate.edges)
+        if cost > max_stretch * fastest.cost:
+            continue
+        key = tuple(candidate.edges)
+        if key in seen:
+            continue
+        seen.add(key)
+
+        overlap = max(
+            sum(weights[e] for e in candidate.edges if e in edges) for edges in accepted_edges
+        ) / cost if cost > 0 else 1.0
+        if overlap > max_overlap:
+            continue
+
+        paths.append(PathResult(cost, candidate.edges, candidate.expanded))
+        accepted_edges.append(set(candidate.edges))
+
+    return paths
@@ -0,0 +1,131 @@
+"""
+Keep the in-memory road graph in step with route, traffic and jam changes.
+
+Each handler patches only the affected edges of the loaded graph; adding or
+removing a route changes the graph's structure and triggers a reload. Saves
+that leave the graph as it was (an unchanged traffic factor, a jam report at
+a location without routes) are not published to other processes.
+Route and traffic data changes also mark the contraction hierarchies built
+from them dirty until they are rebuilt (see hierarchy.py); traffic jams do
+not.
+Bulk operations (queryset.update, bulk_create) do not send these signals;
+call graph.invalidate_road_graph() after them.
+
+post_save and post_delete fire inside the saving transaction, so every
+graph change is deferred with transaction.on_commit. Otherwise other
+processes could reload uncommitted rows under the new version, and a
+rolled back change would stay in this process's graph.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .graph import get_graph_store, hour_of_week
+from .hierarchy import mark_dirty, mark_hour_dirty
+from .models import Location, Route, RouteTrafficData, TrafficJam
+
+
+@receiver(pre_save, sender=Location)
+def location_saving(sender, instance, update_fields=None, **kwargs):
+    """Remember a location's stored coordinates so location_saved can tell if it moved."""
+    instance._stored_coordinates = None
+    if instance.pk is None:
+        return
+    if update_fields is not None and not {'latitude', 'longitude'} & set(update_fields):
+        return
+    instance._stored_coordinates = Location.objects.filter(pk=instance.pk).values_list(
+        'latitude', 'longitude'
+    ).first()
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, created, **kwargs):
+    """
+    Move a node, which changes the search heuristic.
+
+    New locations and edits that leave the coordinates alone (a rename, a
+    description) do not touch the graph, so other processes keep theirs.
+    """
+    stored = getattr(instance, '_stored_coordinates', None)
+    if created or stored is None:
+        return
+    location_id, latitude, longitude = instance.id, float(instance.latitude), float(instance.longitude)
+    if (float(stored[0]), float(stored[1])) == (latitude, longitude):
+        return
+
+    def move():
+        # Locations without routes are not nodes of the graph
+        if Route.objects.filter(Q(origin_id=location_id) | Q(destination_id=location_id)).exists():
+            get_graph_store().apply('set_coordinates', location_id, latitude, longitude)
+
+    transaction.on_commit(move)
+
+
+@receiver(post_save, sender=Route)
+def route_saved(sender, instance, created, **kwargs):
+    """Update an edge's length and duration, or reload for a new route."""
+    if created:
+        transaction.on_commit(_invalidate)
+        return
+    edge = (instance.id, instance.origin_id, instance.destination_id,
+            instance.distance_km, instance.normal_duration_minutes)
+
+    def update():
+        mark_dirty()
+        get_graph_store().apply('update_route', *edge)
+
+    transaction.on_commit(update)
+
+
+@receiver(post_delete, sender=Route)
+def route_deleted(sender, instance, **kwargs):
+    """A removed route changes the graph's structure."""
+    transaction.on_commit(_invalidate)
+
+
+def _invalidate():
+    mark_dirty()
+    get_graph_store().invalidate()
+
+
+@receiver(post_save, sender=RouteTrafficData)
+def traffic_data_saved(sender, instance, **kwargs):
+    """Update one edge's weight for one hour of the week."""
+    route_id, factor = instance.route_id, float(instance.traffic_factor)
+    how = hour_of_week(instance.day_of_week, instance.hour_of_day)
+    transaction.on_commit(lambda: _set_traffic_factor(route_id, how, factor))
+
+
+@receiver(post_delete, sender=RouteTrafficData)
+def traffic_data_deleted(sender, instance, **kwargs):
+    """Without traffic data an hour falls back to normal traffic."""
+    route_id = instance.route_id
+    how = hour_of_week(instance.day_of_week, instance.hour_of_day)
+    transaction.on_commit(lambda: _set_traffic_factor(route_id, how, 1.0))
+
+
+def _set_traffic_factor(route_id, how, factor):
+    mark_hour_dirty(how)
+    get_graph_store().apply('set_traffic_factor', route_id, how, factor)
+
+
+def _refresh_jams(location_id):
+    # Jams come and go within minutes; they change the live weights only and
+    # leave the hierarchies, which pick paths on profile averages, in use
+    count = TrafficJam.objects.filter(location_id=location_id, is_active=True).count()
+    get_graph_store().apply('set_jam_count', location_id, count)
+
+
+@receiver(post_save, sender=TrafficJam)
+def traffic_jam_saved(sender, instance, **kwargs):
+    """Recount active jams at the jam's location (reported or resolved)."""
+    location_id = instance.location_id
+    transaction.on_commit(lambda: _refresh_jams(location_id))
+
+
+@receiver(post_delete, sender=TrafficJam)
+def traffic_jam_deleted(sender, instance, **kwargs):
+    """Recount active jams at the jam's location."""
+    location_id = instance.location_id
+    transaction.on_commit(lambda: _refresh_jams(location_id))
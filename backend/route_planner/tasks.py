@@ -0,0 +1,23 @@
+"""
+Celery tasks for the route_planner application.
+"""
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rebuild_route_hierarchies(force=False):
+    """
+    Rebuild the contraction hierarchies of dirty or outdated profiles.
+    
+    Runs from Celery beat every ROUTE_CH_REBUILD_INTERVAL seconds; profiles
+    whose traffic data has not changed are skipped.
+    """
+    from .hierarchy import rebuild_hierarchies
+    
+    rebuilt = rebuild_hierarchies(force=force)
+    logger.debug("Rebuilt %d route hierarchies", len(rebuilt))
+    return {'rebuilt': [meta['profile'] for meta in rebuilt]}
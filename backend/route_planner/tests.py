@@ -1,3 +1,232 @@
-from django.test import TestCase
+import heapq
+import math
+import random
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from .graph import VERSION_CACHE_KEY, RoadGraph, RoadGraphStore, hour_of_week
+from .hierarchy import ContractionHierarchy, is_dirty, mark_dirty, rebuild_hierarchies
+from .search import alternative_paths, astar
+
+HOW = hour_of_week(0, 8)
+
+
+def random_graph(seed, nodes=30, edges=90, coordinates=True):
+    """Small random directed graph with traffic factors at HOW."""
+    rng = random.Random(seed)
+    node_ids = [100 + i for i in range(nodes)]
+    pairs = set()
+    while len(pairs) < edges:
+        origin, destination = rng.sample(node_ids, 2)
+        pairs.add((origin, destination))
+    route_edges = [
+        (route_id, origin, destination, rng.uniform(0.5, 5.0), rng.uniform(1.0, 10.0))
+        for route_id, (origin, destination) in enumerate(sorted(pairs), start=1)
+    ]
+    factors = {(route_id, HOW): rng.uniform(1.0, 2.5) for route_id, *_ in route_edges if rng.random() < 0.4}
+    coords = {node_id: (27.6 + rng.uniform(0, 0.1), 85.2 + rng.uniform(0, 0.1)) for node_id in node_ids}
+    return RoadGraph(node_ids, route_edges, factors, coordinates=coords if coordinates else None)
+
+
+def dijkstra(graph, source, target, how):
+    """Reference shortest travel time, or None if target is unreachable."""
+    weights = graph.weight_list(how)
+    distances = {source: 0.0}
+    queue = [(0.0, source)]
+    settled = set()
+    while queue:
+        cost, node = heapq.heappop(queue)
+        if node in settled:
+            continue
+        if node == target:
+            return cost
+        settled.add(node)
+        for e in graph.edges_from(node):
+            new_cost = cost + weights[e]
+            if new_cost < distances.get(graph.targets[e], math.inf):
+                distances[graph.targets[e]] = new_cost
+                heapq.heappush(queue, (new_cost, graph.targets[e]))
+    return None
+
+
+class SearchTestCase(SimpleTestCase):
+    def assertLoopFreePath(self, graph, edges, source, target):
+        nodes = [source]
+        for e in edges:
+            self.assertEqual(graph.sources[e], nodes[-1])
+            nodes.append(graph.targets[e])
+        self.assertEqual(nodes[-1], target)
+        self.assertEqual(len(set(nodes)), len(nodes), 'path visits a node twice')
+
+    def assertPathCost(self, graph, edges, cost):
+        weights = graph.weight_list(HOW)
+        self.assertAlmostEqual(sum(weights[e] for e in edges), cost, places=3)
+
+    def pairs(self, graph, seed, count=40):
+        rng = random.Random(seed)
+        return [tuple(rng.sample(range(graph.node_count), 2)) for _ in range(count)]
+
+
+class AStarTests(SearchTestCase):
+    def test_matches_dijkstra(self):
+        for seed in range(5):
+            for coordinates in (True, False):
+                graph = random_graph(seed, coordinates=coordinates)
+                for source, target in self.pairs(graph, seed):
+                    expected = dijkstra(graph, source, target, HOW)
+                    result = astar(graph, source, target, HOW)
+                    if expected is None:
+                        self.assertIsNone(result)
+                        continue
+                    self.assertAlmostEqual(result.cost, expected, places=3)
+                    self.assertLoopFreePath(graph, result.edges, source, target)
+                    self.assertPathCost(graph, result.edges, result.cost)
+
+
+class ContractionHierarchyTests(SearchTestCase):
+    def test_query_matches_dijkstra(self):
+        for seed in range(5):
+            graph = random_graph(seed)
+            hierarchy = ContractionHierarchy.build(graph, [HOW], 'test')
+            for source, target in self.pairs(graph, seed):
+                expected = dijkstra(graph, source, target, HOW)
+                result = hierarchy.query(source, target)
+                if expected is None:
+                    self.assertIsNone(result)
+                    continue
+                self.assertAlmostEqual(result.cost, expected, places=3)
+                self.assertLoopFreePath(graph, result.edges, source, target)
+                self.assertPathCost(graph, result.edges, result.cost)
+
+    def test_saved_hierarchy_answers_the_same(self):
+        graph = random_graph(7)
+        hierarchy = ContractionHierarchy.build(graph, [HOW], 'test')
+        with tempfile.TemporaryDirectory() as directory:
+            hierarchy.save(directory, 'test')
+            loaded = ContractionHierarchy.load(directory, 'test')
+            self.assertEqual(loaded.fingerprint, graph.fingerprint)
+            for source, target in self.pairs(graph, 7):
+                built, mapped = hierarchy.query(source, target), loaded.query(source, target)
+                self.assertEqual(built is None, mapped is None)
+                if built is not None:
+                    self.assertEqual(built.edges, mapped.edges)
+            del loaded
+
+    def test_ignores_jams(self):
+        graph = random_graph(3)
+        jammed = RoadGraph(
+            graph.node_ids,
+            [(graph.route_ids[e], graph.node_ids[graph.sources[e]], graph.node_ids[graph.targets[e]],
+              graph.distances[e], float(graph.base_minutes[e])) for e in range(graph.edge_count)],
+            {(graph.route_ids[e], HOW): float(graph.factors[HOW, e]) for e in range(graph.edge_count)},
+            jam_counts={graph.node_ids[0]: 3},
+        )
+        clear = ContractionHierarchy.build(graph, [HOW], 'test')
+        with_jam = ContractionHierarchy.build(jammed, [HOW], 'test')
+        self.assertTrue((clear.up_weights == with_jam.up_weights).all())
+
+
+class AlternativePathsTests(SearchTestCase):
+    def test_paths_are_loop_free_and_start_with_the_fastest(self):
+        for seed in range(5):
+            graph = random_graph(seed, nodes=40, edges=160)
+            for source, target in self.pairs(graph, seed, count=20):
+                expected = dijkstra(graph, source, target, HOW)
+                paths = alternative_paths(graph, source, target, HOW, k=3)
+                if expected is None:
+                    self.assertEqual(paths, [])
+                    continue
+                self.assertAlmostEqual(paths[0].cost, expected, places=3)
+                self.assertEqual(len({tuple(path.edges) for path in paths}), len(paths))
+                for path in paths:
+                    self.assertLoopFreePath(graph, path.edges, source, target)
+                    self.assertPathCost(graph, path.edges, path.cost)
+                    self.assertGreaterEqual(path.cost, expected - 1e-3)
+                    self.assertLessEqual(path.cost, 1.5 * paths[0].cost + 1e-3)
+
+
+PROFILES = {
+    'monday_eight': {'days': [0], 'hours': [8]},
+    'monday_nine': {'days': [0], 'hours': [9]},
+}
+
+
+class RebuildTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(ROUTE_CH_DIR=directory.name, ROUTE_CH_PROFILES=PROFILES)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_failed_graph_load_keeps_profiles_dirty(self):
+        mark_dirty()
+        with mock.patch('route_planner.hierarchy.RoadGraph.from_database', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                rebuild_hierarchies()
+        self.assertTrue(is_dirty('monday_eight'))
+        self.assertTrue(is_dirty('monday_nine'))
+
+    def test_failed_build_keeps_unbuilt_profiles_dirty(self):
+        mark_dirty()
+        build = ContractionHierarchy.build
+
+        def build_first_only(graph, hours, name=''):
+            if name == 'monday_nine':
+                raise RuntimeError('build failed')
+            return build(graph, hours, name)
+
+        with mock.patch('route_planner.hierarchy.RoadGraph.from_database', return_value=random_graph(1)), \
+                mock.patch.object(ContractionHierarchy, 'build', side_effect=build_first_only):
+            with self.assertRaises(RuntimeError):
+                rebuild_hierarchies()
+        self.assertFalse(is_dirty('monday_eight'))
+        self.assertTrue(is_dirty('monday_nine'))
+
+
+class RoadGraphStoreTests(SimpleTestCase):
+    """Two stores sharing the test cache stand in for two processes."""
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.loads = 0
+
+        def from_database(version=0):
+            self.loads += 1
+            graph = random_graph(5)
+            graph.version = version
+            return graph
+
+        patcher = mock.patch.object(RoadGraph, 'from_database', side_effect=from_database)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.writer, self.reader = RoadGraphStore(), RoadGraphStore()
+        self.graph = self.writer.get()
+        self.reader.get()
+        self.route_id = self.graph.route_ids[0]
+
+    def test_unchanged_values_are_not_published(self):
+        factor = float(self.graph.factors[HOW, 0])
+        self.assertIsNone(self.writer.apply('set_traffic_factor', self.route_id, HOW, factor))
+        self.assertIsNone(self.writer.apply('set_jam_count', 99999, 2))
+        self.assertIsNone(cache.get(VERSION_CACHE_KEY))
+
+    def test_other_processes_patch_instead_of_reloading(self):
+        self.assertTrue(self.writer.apply('set_traffic_factor', self.route_id, HOW, 3.0))
+        self.assertTrue(self.writer.apply('set_jam_count', self.graph.node_ids[0], 2))
+        loads = self.loads
+        graph = self.reader.get()
+        self.assertEqual(self.loads, loads)
+        self.assertEqual(graph.version, cache.get(VERSION_CACHE_KEY))
+        self.assertTrue((graph.weights == self.writer.get().weights).all())
+
+    def test_invalidate_makes_other_processes_reload(self):
+        self.writer.apply('set_traffic_factor', self.route_id, HOW, 3.0)
+        self.writer.invalidate()
+        loads = self.loads
+        self.reader.get()
+        self.assertEqual(self.loads, loads + 1)
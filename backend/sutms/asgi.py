@@ -13,6 +13,8 @@ from django.core.asgi import get_asgi_application
 from channels.auth import AuthMiddlewareStack
 from channels.routing import ProtocolTypeRouter, URLRouter
 
+import cameras.routing
+import ocr.routing
 import tracking.routing
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sutms.settings')
@@ -21,7 +23,9 @@ application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": AuthMiddlewareStack(
         URLRouter(
-            tracking.routing.websocket_urlpatterns
+            tracking.routing.websocket_urlpatterns +
+            ocr.routing.websocket_urlpatterns +
+            cameras.routing.websocket_urlpatterns
         )
     ),
 })
\ No newline at end of file
@@ -1,3 +1,9 @@
 """
 SUTMS Project initialization
-"""
\ No newline at end of file
+"""
+
+# Make sure the Celery app is loaded when Django starts so that
+# @shared_task decorators bind to it.
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -1,5 +1,8 @@
 """
 ASGI config for sutms_project project.
+
+HTTP requests go to Django; WebSocket connections are routed to the
+tracking, OCR and camera status consumers.
 """
 
 import os
@@ -8,4 +11,23 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sutms_project.settings')
 
-application = get_asgi_application()
\ No newline at end of file
+# Set up Django before the routing modules import consumers and models
+django_asgi_app = get_asgi_application()
+
+from channels.auth import AuthMiddlewareStack  # noqa: E402
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+
+import cameras.routing  # noqa: E402
+import ocr.routing  # noqa: E402
+import tracking.routing  # noqa: E402
+
+application = ProtocolTypeRouter({
+    "http": django_asgi_app,
+    "websocket": AuthMiddlewareStack(
+        URLRouter(
+            tracking.routing.websocket_urlpatterns +
+            ocr.routing.websocket_urlpatterns +
+            cameras.routing.websocket_urlpatterns
+        )
+    ),
+})
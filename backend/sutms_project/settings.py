@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'rest_framework.authtoken',
     'corsheaders',
     'drf_yasg',
+    'channels',
     
     # SUTMS apps
     'core',
@@ -84,6 +85,26 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'sutms_project.wsgi.application'
+ASGI_APPLICATION = 'sutms_project.asgi.application'
+
+# WebSocket push. Celery workers publish detection and camera updates through
+# this layer, so the in-memory fallback only reaches sockets served by the
+# same process; set CHANNEL_LAYER_URL to a Redis URL in any multi-process setup.
+if os.environ.get('CHANNEL_LAYER_URL'):
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels_redis.core.RedisChannelLayer',
+            'CONFIG': {
+                'hosts': [os.environ['CHANNEL_LAYER_URL']],
+            },
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        'default': {
+            'BACKEND': 'channels.layers.InMemoryChannelLayer',
+        }
+    }
 
 # Database
 DATABASES = {
@@ -192,4 +213,100 @@ CORS_ALLOW_HEADERS = [
 ]
 
 # Custom user model
-AUTH_USER_MODEL = 'accounts.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'accounts.User'
+
+# License plate OCR settings
+OCR_BATCH_MAX_IMAGES = int(os.environ.get('OCR_BATCH_MAX_IMAGES', 50))
+# Uncompressed size limits for images extracted from batch zip archives
+OCR_BATCH_MAX_IMAGE_BYTES = int(os.environ.get('OCR_BATCH_MAX_IMAGE_BYTES', 10 * 1024 * 1024))
+OCR_BATCH_MAX_ARCHIVE_BYTES = int(os.environ.get('OCR_BATCH_MAX_ARCHIVE_BYTES', 100 * 1024 * 1024))
+OCR_BATCH_WORKERS = int(os.environ.get('OCR_BATCH_WORKERS', os.cpu_count() or 1))
+OCR_MODEL_REGISTRY_TTL = int(os.environ.get('OCR_MODEL_REGISTRY_TTL', 60))
+OCR_RECOGNIZER_MAX_BATCH_SIZE = int(os.environ.get('OCR_RECOGNIZER_MAX_BATCH_SIZE', 64))
+OCR_RECOGNIZER_BATCH_WAIT_MS = float(os.environ.get('OCR_RECOGNIZER_BATCH_WAIT_MS', 5))
+OCR_ASYNC_DETECTION = os.environ.get('OCR_ASYNC_DETECTION', 'False').lower() == 'true'
+
+# Camera feed processing
+CAMERA_OCR_WORKERS = int(os.environ['CAMERA_OCR_WORKERS']) if os.environ.get('CAMERA_OCR_WORKERS') else None
+CAMERA_OCR_QUEUE_DEPTH = int(os.environ.get('CAMERA_OCR_QUEUE_DEPTH', 64))
+# Motion gating of frames pushed through the upload API. Background models
+# live in each worker process, so only enable this when all frames from a
+# camera reach the same process (single worker or sticky routing).
+CAMERA_UPLOAD_MOTION_GATING = os.environ.get('CAMERA_UPLOAD_MOTION_GATING', 'False').lower() == 'true'
+CAMERA_MOTION_GATE_CACHE_SIZE = int(os.environ.get('CAMERA_MOTION_GATE_CACHE_SIZE', 256))
+CAMERA_CAPTURE_BATCH_SIZE = int(os.environ.get('CAMERA_CAPTURE_BATCH_SIZE', 200))
+CAMERA_CAPTURE_FLUSH_INTERVAL = float(os.environ.get('CAMERA_CAPTURE_FLUSH_INTERVAL', 1.0))
+# Failed bulk writes are retried with backoff, then appended to this file
+CAMERA_CAPTURE_MAX_RETRIES = int(os.environ.get('CAMERA_CAPTURE_MAX_RETRIES', 5))
+CAMERA_CAPTURE_MAX_PENDING = int(os.environ.get('CAMERA_CAPTURE_MAX_PENDING', 2000))
+CAMERA_CAPTURE_DEAD_LETTER_PATH = os.environ.get(
+    'CAMERA_CAPTURE_DEAD_LETTER_PATH', os.path.join(BASE_DIR, 'capture_dead_letter.jsonl')
+)
+
+# Camera health monitoring (see cameras.health)
+CAMERA_HEALTH_INTERVAL = float(os.environ.get('CAMERA_HEALTH_INTERVAL', 30))
+CAMERA_HEALTH_WORKERS = int(os.environ.get('CAMERA_HEALTH_WORKERS', 16))
+CAMERA_CONNECT_TIMEOUT = float(os.environ.get('CAMERA_CONNECT_TIMEOUT', 5))
+CAMERA_READ_TIMEOUT = float(os.environ.get('CAMERA_READ_TIMEOUT', 5))
+CAMERA_STATUS_CACHE_TTL = int(os.environ.get('CAMERA_STATUS_CACHE_TTL', 300))
+
+# Camera capture retention (see cameras.retention)
+CAMERA_RETENTION_INTERVAL = float(os.environ.get('CAMERA_RETENTION_INTERVAL', 3600))
+CAMERA_RETENTION_NO_PLATE_DAYS = float(os.environ.get('CAMERA_RETENTION_NO_PLATE_DAYS', 7))
+CAMERA_RETENTION_NO_PLATE_ACTION = os.environ.get('CAMERA_RETENTION_NO_PLATE_ACTION', 'delete')  # or 'downsample'
+CAMERA_RETENTION_COMPACT_AFTER_DAYS = float(os.environ.get('CAMERA_RETENTION_COMPACT_AFTER_DAYS', 30))
+CAMERA_RETENTION_FORMAT = os.environ.get('CAMERA_RETENTION_FORMAT', 'jpeg')  # or 'webp'
+CAMERA_RETENTION_QUALITY = int(os.environ.get('CAMERA_RETENTION_QUALITY', 60))
+CAMERA_RETENTION_MAX_WIDTH = int(os.environ.get('CAMERA_RETENTION_MAX_WIDTH', 1280))
+CAMERA_RETENTION_BATCH_SIZE = int(os.environ.get('CAMERA_RETENTION_BATCH_SIZE', 500))
+# Where traffic_camera.TrafficCamera.save_frame writes frames when run from the project root
+CAMERA_LOCAL_CAPTURE_DIR = os.environ.get('CAMERA_LOCAL_CAPTURE_DIR', os.path.join(BASE_DIR.parent, 'camera_captures'))
+
+# Route planning (see route_planner.graph). Processes reload their road graph
+# at least this often in case they missed a change made elsewhere.
+ROUTE_GRAPH_MAX_AGE = int(os.environ.get('ROUTE_GRAPH_MAX_AGE', 300))
+# Processes further behind than this many logged changes reload the graph
+ROUTE_GRAPH_MAX_PATCHES = int(os.environ.get('ROUTE_GRAPH_MAX_PATCHES', 100))
+# Node expansions shared by all alternative-route searches of one request
+ROUTE_ALTERNATIVE_MAX_EXPANSIONS = int(os.environ.get('ROUTE_ALTERNATIVE_MAX_EXPANSIONS', 100000))
+# Contraction hierarchies (see route_planner.hierarchy)
+ROUTE_CH_ENABLED = os.environ.get('ROUTE_CH_ENABLED', 'True').lower() == 'true'
+ROUTE_CH_DIR = os.environ.get('ROUTE_CH_DIR', os.path.join(BASE_DIR, 'route_hierarchies'))
+# Dirty profiles are rebuilt this often; a 100k-node profile takes minutes
+ROUTE_CH_REBUILD_INTERVAL = float(os.environ.get('ROUTE_CH_REBUILD_INTERVAL', 3600))
+
+# Cache shared by web, Celery and monitor processes. Without CACHE_URL each
+# process has its own local-memory cache, so published camera status is only
+# visible inside the process that published it.
+if os.environ.get('CACHE_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CACHE_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Celery settings
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', CELERY_BROKER_URL)
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False').lower() == 'true'
+CELERY_BEAT_SCHEDULE = {
+    'check-camera-health': {
+        'task': 'cameras.tasks.check_camera_health',
+        'schedule': CAMERA_HEALTH_INTERVAL,
+    },
+    'apply-capture-retention': {
+        'task': 'cameras.tasks.apply_capture_retention',
+        'schedule': CAMERA_RETENTION_INTERVAL,
+    },
+    'rebuild-route-hierarchies': {
+        'task': 'route_planner.tasks.rebuild_route_hierarchies',
+        'schedule': ROUTE_CH_REBUILD_INTERVAL,
+    },
+}
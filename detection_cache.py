@@ -0,0 +1,186 @@
+"""
+Perceptual-hash cache for license plate OCR results.
+
+Traffic cameras often send near-identical consecutive frames, for example a
+vehicle stopped at a red light. DetectionCache keys OCR results by a dHash of
+the frame, scoped per camera, so a frame whose hash matches a recent one
+reuses that result instead of running OCR again.
+
+A plate covers a small part of a frame or motion region, so a small hash
+barely changes when a different car pulls up and would hand back the
+previous vehicle's plate. The default hash is therefore large (1024 bits) and
+must match exactly; raise OCR_CACHE_MAX_DISTANCE only with that in mind.
+Entries expire after a TTL and the least recently used ones are evicted once
+the cache is full. Hit/miss counters are available from stats().
+
+The cache is per process. Each web or worker process keeps its own.
+
+Environment variables:
+    OCR_CACHE_ENABLED: 'true' (default) or 'false'
+    OCR_CACHE_TTL: Seconds an entry stays valid (default: 10)
+    OCR_CACHE_SIZE: Maximum number of entries (default: 1024)
+    OCR_CACHE_HASH_SIZE: dHash side length; the hash has its square in bits
+        (default: 32)
+    OCR_CACHE_MAX_DISTANCE: Largest Hamming distance between hashes that
+        still counts as the same frame (default: 0)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+def dhash(image, hash_size=8):
+    """
+    Compute the difference hash of an image.
+
+    Args:
+        image: Decoded image (BGR or grayscale numpy array)
+        hash_size: Hash side length; the hash has hash_size ** 2 bits
+
+    Returns:
+        The hash as a Python int
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    resized = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (resized[:, 1:] > resized[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a, b):
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class DetectionCache:
+    """Thread-safe TTL + LRU cache of OCR results keyed by perceptual hash."""
+
+    def __init__(self, max_entries=1024, ttl=10.0, max_distance=0, hash_size=32):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self.hash_size = hash_size
+        self._entries = OrderedDict()   # (scope, hash) -> (result, expires_at)
+        self._scopes = {}               # scope -> set of hashes, for near matches
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def image_hash(self, image):
+        """dHash of an image at this cache's hash size."""
+        return dhash(image, self.hash_size)
+
+    def get(self, image_hash, scope=None):
+        """
+        Look up a result for a hash.
+
+        Args:
+            image_hash: Hash of the frame from image_hash()
+            scope: Partition key such as the camera ID, so different cameras
+                never share results
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            key = self._match(image_hash, scope, now)
+            if key is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, image_hash, result, scope=None):
+        """Store a result, evicting the least recently used entry if full."""
+        key = (scope, image_hash)
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._scopes.setdefault(scope, set()).add(image_hash)
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def stats(self):
+        """Hit/miss metrics for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'max_distance': self.max_distance,
+                'hash_bits': self.hash_size ** 2,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def _match(self, image_hash, scope, now):
+        """Find the key of a live entry within max_distance, dropping expired ones."""
+        candidates = [image_hash] if image_hash in self._scopes.get(scope, ()) else []
+        if not candidates and self.max_distance > 0:
+            candidates = sorted(
+                (h for h in self._scopes.get(scope, ())
+                 if hamming_distance(h, image_hash) <= self.max_distance),
+                key=lambda h: hamming_distance(h, image_hash)
+            )
+
+        for candidate in candidates:
+            key = (scope, candidate)
+            if self._entries[key][1] > now:
+                return key
+            del self._entries[key]
+            self._forget(key)
+            self.expirations += 1
+        return None
+
+    def _forget(self, key):
+        scope, image_hash = key
+        hashes = self._scopes.get(scope)
+        if hashes is not None:
+            hashes.discard(image_hash)
+            if not hashes:
+                del self._scopes[scope]
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def cache_enabled():
+    """Whether OCR result caching is switched on."""
+    return os.environ.get('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+
+
+def get_cache():
+    """Return the process-wide detection cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = DetectionCache(
+                    max_entries=int(os.environ.get('OCR_CACHE_SIZE', 1024)),
+                    ttl=float(os.environ.get('OCR_CACHE_TTL', 10)),
+                    max_distance=int(os.environ.get('OCR_CACHE_MAX_DISTANCE', 0)),
+                    hash_size=int(os.environ.get('OCR_CACHE_HASH_SIZE', 32)),
+                )
+    return _cache
@@ -0,0 +1,216 @@
+"""
+Shared-memory frame ring buffer for the SUTMS camera pipeline.
+
+A capture process writes frames into a fixed number of preallocated slots in
+a multiprocessing.shared_memory block. Small FrameToken tuples
+(slot, sequence, ...) are passed to OCR worker processes, which attach to the
+same block by name and read the frame in place as a numpy view, without
+pickling or copying frame data between processes.
+
+Each slot has a sequence number in the shared header. It is odd while the
+writer is filling the slot and even once the frame is complete. A reader
+holding a token checks the sequence before and after using the frame. If it
+changed, the writer lapped the ring and the frame was overwritten, so the
+reader drops it rather than working on a torn frame.
+
+Several threads of one process may write to the same ring. Slot reservation
+is serialised, but the copy or decode into a reserved slot happens outside
+the lock, so a slow stream only holds up its own slot. A slot that is still
+being filled is skipped when the ring wraps. Writers in different processes
+need a ring each.
+"""
+import threading
+import time
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+FrameToken = namedtuple('FrameToken', ['slot', 'sequence', 'camera_index', 'captured_at'])
+
+# Per-slot metadata stored at the start of the shared block
+SLOT_HEADER = np.dtype([
+    ('sequence', '<i8'),
+    ('camera_index', '<i4'),
+    ('height', '<i4'),
+    ('width', '<i4'),
+    ('captured_at', '<f8'),
+])
+
+
+class FrameRingBuffer:
+    """Fixed-size ring of preallocated frame slots in shared memory."""
+
+    def __init__(self, shm, slots, frame_shape, owner):
+        self._shm = shm
+        self.name = shm.name
+        self.slots = slots
+        self.frame_shape = tuple(frame_shape)
+        self.owner = owner
+
+        header_size = SLOT_HEADER.itemsize * slots
+        self._header = np.ndarray((slots,), dtype=SLOT_HEADER, buffer=shm.buf, offset=0)
+        self._frames = np.ndarray(
+            (slots,) + self.frame_shape, dtype=np.uint8, buffer=shm.buf, offset=header_size
+        )
+        self._next = 0
+        self._writing = set()
+        self._write_lock = threading.Lock()
+        self._slot_free = threading.Condition(self._write_lock)
+
+    @staticmethod
+    def size_for(slots, frame_shape):
+        """Bytes needed for a ring with the given slot count and frame shape."""
+        return SLOT_HEADER.itemsize * slots + slots * int(np.prod(frame_shape))
+
+    @classmethod
+    def create(cls, slots=32, frame_shape=(720, 1280, 3), name=None):
+        """
+        Allocate a new ring.
+
+        Args:
+            slots: Number of frame slots
+            frame_shape: Largest (height, width, channels) a slot holds;
+                larger frames are downscaled to fit
+            name: Shared memory name (generated if None)
+
+        Returns:
+            The owning FrameRingBuffer; call unlink() when done
+        """
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls.size_for(slots, frame_shape))
+        ring = cls(shm, slots, frame_shape, owner=True)
+        ring._header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, name, slots, frame_shape):
+        """Attach to a ring created by another process."""
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, slots, frame_shape, owner=False)
+
+    def spec(self):
+        """Arguments a worker process passes to attach()."""
+        return {'name': self.name, 'slots': self.slots, 'frame_shape': self.frame_shape}
+
+    def _begin_write(self):
+        """Reserve the next slot that no other thread is filling."""
+        with self._write_lock:
+            while len(self._writing) >= self.slots:
+                self._slot_free.wait()
+            while self._next % self.slots in self._writing:
+                self._next += 1
+            slot = self._next % self.slots
+            sequence = 2 * (self._next + 1)
+            self._next += 1
+            self._writing.add(slot)
+            self._header['sequence'][slot] = sequence - 1  # Odd: write in progress
+            return slot, sequence
+
+    def _end_write(self, slot):
+        with self._write_lock:
+            self._writing.discard(slot)
+            self._slot_free.notify()
+
+    def _fit(self, frame, slot):
+        """Copy or downscale frame into a slot; returns its (height, width)."""
+        h, w = frame.shape[:2]
+        max_h, max_w = self.frame_shape[:2]
+        if frame.ndim == 2 and self.frame_shape[2] == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        if h > max_h or w > max_w:
+            scale = min(max_h / h, max_w / w)
+            h, w = max(1, int(h * scale)), max(1, int(w * scale))
+            frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+        self._frames[slot, :h, :w] = frame
+        return h, w
+
+    def _commit(self, slot, sequence, camera_index, h, w, captured_at):
+        header = self._header[slot]
+        header['camera_index'] = camera_index
+        header['height'] = h
+        header['width'] = w
+        header['captured_at'] = captured_at
+        self._header['sequence'][slot] = sequence  # Even: frame complete
+        return FrameToken(slot, sequence, camera_index, captured_at)
+
+    def write(self, frame, camera_index=0, captured_at=None):
+        """
+        Copy a frame into the next slot, overwriting the oldest one.
+
+        Returns:
+            FrameToken for readers
+        """
+        slot, sequence = self._begin_write()
+        try:
+            h, w = self._fit(frame, slot)
+            return self._commit(slot, sequence, camera_index, h, w,
+                                captured_at if captured_at is not None else time.time())
+        finally:
+            self._end_write(slot)
+
+    def read_from(self, video_capture, camera_index=0, skip=0):
+        """
+        Decode the next frame of a cv2.VideoCapture straight into a slot.
+
+        When the stream resolution matches the slot shape the decoder writes
+        into shared memory directly, with no intermediate frame.
+
+        Args:
+            video_capture: Opened cv2.VideoCapture
+            camera_index: Index readers use to map the frame back to its camera
+            skip: Frames to grab and drop without decoding first
+
+        Returns:
+            FrameToken, or None if no frame could be read
+        """
+        for _ in range(skip):
+            if not video_capture.grab():
+                return None
+
+        # Only the slot reservation is locked; the network wait and decode
+        # run concurrently with other threads reading into their own slots
+        slot, sequence = self._begin_write()
+        try:
+            target = self._frames[slot]
+            ok, frame = video_capture.read(target)
+            if not ok or frame is None:
+                self._header['sequence'][slot] = 0  # Empty: no token matches
+                return None
+            if np.shares_memory(frame, target):
+                h, w = frame.shape[:2]
+            else:
+                h, w = self._fit(frame, slot)
+            return self._commit(slot, sequence, camera_index, h, w, time.time())
+        finally:
+            self._end_write(slot)
+
+    def view(self, token):
+        """
+        Zero-copy view of a token's frame.
+
+        Returns:
+            numpy array backed by shared memory, or None if the slot was
+            already overwritten. Check is_current() after using it.
+        """
+        if not self.is_current(token):
+            return None
+        h = int(self._header['height'][token.slot])
+        w = int(self._header['width'][token.slot])
+        return self._frames[token.slot, :h, :w]
+
+    def is_current(self, token):
+        """Whether the token's slot still holds the frame it was issued for."""
+        return int(self._header['sequence'][token.slot]) == token.sequence
+
+    def close(self):
+        """Detach from the shared block."""
+        self._header = None
+        self._frames = None
+        self._shm.close()
+
+    def unlink(self):
+        """Close and free the shared block (owner only)."""
+        self.close()
+        if self.owner:
+            self._shm.unlink()
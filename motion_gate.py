@@ -0,0 +1,180 @@
+"""
+Motion and region-of-interest gating for camera frames.
+
+Most frames from a traffic camera at night or off-peak show an empty road.
+MotionGate is a cheap pre-filter that runs before plate OCR. It works on a
+downscaled grayscale copy of the frame and uses either a MOG2 background
+subtractor or plain differencing against the previous frame. It then
+measures how much of each region of interest changed. Only frames with
+motion inside a region go on to OCR, and only the regions that moved are
+cropped for it.
+
+Regions are rectangles in normalised coordinates, [x, y, width, height] with
+values between 0 and 1, so they survive resolution changes. No regions means
+the whole frame.
+"""
+import threading
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+MotionResult = namedtuple('MotionResult', ['has_motion', 'motion_ratio', 'regions'])
+
+FULL_FRAME = [0.0, 0.0, 1.0, 1.0]
+
+
+def normalize_rois(rois):
+    """
+    Validate and clamp a list of [x, y, width, height] regions.
+
+    Returns:
+        List of regions as float lists, or [FULL_FRAME] if none are usable
+    """
+    cleaned = []
+    for roi in rois or []:
+        try:
+            x, y, w, h = (float(v) for v in roi)
+        except (TypeError, ValueError):
+            continue
+        x, y = min(max(x, 0.0), 1.0), min(max(y, 0.0), 1.0)
+        w, h = min(max(w, 0.0), 1.0 - x), min(max(h, 0.0), 1.0 - y)
+        if w > 0 and h > 0:
+            cleaned.append([x, y, w, h])
+    return cleaned or [list(FULL_FRAME)]
+
+
+def crop_region(frame, region):
+    """Crop a pixel region (x, y, width, height) from a frame without copying."""
+    x, y, w, h = region
+    return frame[y:y + h, x:x + w]
+
+
+class MotionGate:
+    """Per-camera motion detector restricted to regions of interest."""
+
+    def __init__(self, rois=None, threshold=0.01, method='mog2', analysis_width=320,
+                 warmup_frames=5, pixel_threshold=25):
+        """
+        Initialize the gate.
+
+        Args:
+            rois: Regions of interest as normalised [x, y, width, height] lists
+            threshold: Fraction of a region's pixels that must change to count as motion
+            method: 'mog2' (background subtractor) or 'diff' (previous frame)
+            analysis_width: Width frames are downscaled to before analysis
+            warmup_frames: Frames let through while the background model settles
+            pixel_threshold: Intensity change that marks a pixel as moving ('diff' only)
+        """
+        self.rois = normalize_rois(rois)
+        self.threshold = threshold
+        self.method = method
+        self.analysis_width = analysis_width
+        self.warmup_frames = warmup_frames
+        self.pixel_threshold = pixel_threshold
+
+        self._subtractor = None
+        self._previous = None
+        self._frames_seen = 0
+        self._shape = None
+        self._roi_boxes = []   # Region boxes at analysis resolution
+        self._lock = threading.Lock()
+        self.frames_checked = 0
+        self.frames_passed = 0
+
+    def configure(self, rois=None, threshold=None):
+        """Change the regions or threshold, resetting the background model if regions change."""
+        rois = normalize_rois(rois)
+        with self._lock:
+            if threshold is not None:
+                self.threshold = threshold
+            if rois != self.rois:
+                self.rois = rois
+                self._reset()
+
+    def _reset(self):
+        self._subtractor = None
+        self._previous = None
+        self._frames_seen = 0
+        self._shape = None
+
+    def _prepare(self, frame):
+        """Downscale to grayscale at analysis resolution."""
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.analysis_width / float(w))
+        small = cv2.resize(frame, (max(1, int(w * scale)), max(1, int(h * scale))),
+                           interpolation=cv2.INTER_AREA) if scale < 1.0 else frame
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(small, (5, 5), 0)
+
+    def _boxes_for(self, w, h):
+        return [
+            (int(x * w), int(y * h), max(1, int(rw * w)), max(1, int(rh * h)))
+            for x, y, rw, rh in self.rois
+        ]
+
+    def _foreground(self, gray):
+        if self.method == 'diff':
+            previous, self._previous = self._previous, gray
+            if previous is None:
+                return None
+            diff = cv2.absdiff(gray, previous)
+            _, mask = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+            return mask
+
+        if self._subtractor is None:
+            self._subtractor = cv2.createBackgroundSubtractorMOG2(history=200, detectShadows=False)
+        mask = self._subtractor.apply(gray)
+        # Remove speckle noise so sensor noise does not count as motion
+        return cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    def check(self, frame):
+        """
+        Decide whether a frame should go on to OCR.
+
+        Args:
+            frame: Full-resolution BGR or grayscale frame
+
+        Returns:
+            MotionResult with has_motion, the largest per-region motion ratio,
+            and the full-resolution (x, y, width, height) regions that moved
+        """
+        full_h, full_w = frame.shape[:2]
+        with self._lock:
+            gray = self._prepare(frame)
+            if self._shape != gray.shape:
+                self._reset()
+                self._shape = gray.shape
+                self._roi_boxes = self._boxes_for(gray.shape[1], gray.shape[0])
+
+            mask = self._foreground(gray)
+            self._frames_seen += 1
+            self.frames_checked += 1
+            full_boxes = self._boxes_for(full_w, full_h)
+
+            # Let frames through until the background model has settled
+            if mask is None or self._frames_seen <= self.warmup_frames:
+                self.frames_passed += 1
+                return MotionResult(True, 1.0, full_boxes)
+
+            moving = []
+            best_ratio = 0.0
+            for box, full_box in zip(self._roi_boxes, full_boxes):
+                region = crop_region(mask, box)
+                ratio = cv2.countNonZero(region) / float(region.size) if region.size else 0.0
+                best_ratio = max(best_ratio, ratio)
+                if ratio >= self.threshold:
+                    moving.append(full_box)
+
+            if moving:
+                self.frames_passed += 1
+            return MotionResult(bool(moving), best_ratio, moving)
+
+    def stats(self):
+        """How many frames were checked and how many were passed to OCR."""
+        return {
+            'frames_checked': self.frames_checked,
+            'frames_passed': self.frames_passed,
+            'pass_rate': self.frames_passed / self.frames_checked if self.frames_checked else 0.0,
+        }
@@ -0,0 +1,356 @@
+"""
+Pluggable Tesseract OCR backends for the SUTMS application.
+
+Every caller that needs word-level Tesseract output (the optimized plate OCR
+script, the Django OCR app and the camera pipeline) goes through
+get_engine().image_to_data(image, config). The default engine keeps a pool of
+warm in-process Tesseract instances through tesserocr, so plate crops no
+longer pay a process spawn and language model load per call. When tesserocr
+is not installed the pytesseract subprocess backend is used instead.
+
+read_image() decodes every supported image source (path, raw bytes, an
+uploaded file or an already decoded array) straight from memory, so OCR entry
+points never need to round-trip uploads through temporary files.
+
+Environment variables:
+    OCR_ENGINE: 'tesserocr', 'pytesseract' or 'auto' (default)
+    OCR_ENGINE_POOL_SIZE: Warm instances per configuration (default: CPU count)
+"""
+import logging
+import os
+import queue
+import shlex
+import threading
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+try:
+    import pytesseract
+    PYTESSERACT_AVAILABLE = True
+except ImportError:
+    PYTESSERACT_AVAILABLE = False
+
+try:
+    import tesserocr
+    from PIL import Image
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def read_image(source, flags=cv2.IMREAD_COLOR):
+    """
+    Decode an image from a path, bytes, a file-like object or an array.
+
+    Args:
+        source: File path, bytes/bytearray/memoryview, object with read()
+            (such as a Django UploadedFile) or a numpy array
+        flags: cv2.imdecode / cv2.imread flags
+
+    Returns:
+        The decoded image as a numpy array, or None if it could not be read
+    """
+    if source is None:
+        return None
+    if isinstance(source, np.ndarray):
+        return source
+    if isinstance(source, (str, os.PathLike)):
+        return cv2.imread(os.fspath(source), flags)
+
+    if hasattr(source, 'read'):
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        data = source.read()
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    else:
+        data = source
+
+    if not data:
+        return None
+    return cv2.imdecode(np.frombuffer(data, np.uint8), flags)
+
+
+def parse_tesseract_config(config, lang='eng'):
+    """
+    Split a pytesseract style config string into its parts.
+
+    Args:
+        config: Config string such as '--oem 1 --psm 7 -l eng -c key=value'
+        lang: Language used when the config does not specify one
+
+    Returns:
+        Dictionary with 'lang', 'oem', 'psm' and 'variables'
+    """
+    parsed = {"lang": lang, "oem": None, "psm": None, "variables": {}}
+    tokens = shlex.split(config or '')
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token == '--oem' and value is not None:
+            parsed["oem"] = int(value)
+            i += 1
+        elif token == '--psm' and value is not None:
+            parsed["psm"] = int(value)
+            i += 1
+        elif token == '-l' and value is not None:
+            parsed["lang"] = value
+            i += 1
+        elif token == '-c' and value is not None and '=' in value:
+            key, val = value.split('=', 1)
+            parsed["variables"][key] = val
+            i += 1
+        i += 1
+
+    return parsed
+
+
+class OCREngine:
+    """
+    Interface shared by all OCR backends.
+
+    image_to_data returns the same dictionary layout as
+    pytesseract.image_to_data(..., output_type=Output.DICT) restricted to the
+    keys callers use: 'text', 'conf', 'block_num', 'par_num' and 'line_num'.
+    """
+    name = 'base'
+
+    def image_to_data(self, image, config=''):
+        raise NotImplementedError
+
+    def close(self):
+        """Release any resources held by the engine."""
+
+
+class PytesseractEngine(OCREngine):
+    """Backend that launches a tesseract process per call through pytesseract."""
+    name = 'pytesseract'
+
+    _binary_version = None
+    _binary_checked = False
+
+    @classmethod
+    def available(cls):
+        """
+        Check that the tesseract binary pytesseract calls can actually run.
+
+        The binary is probed once per process; importing pytesseract alone
+        says nothing about whether tesseract is installed or on PATH.
+        """
+        if not cls._binary_checked:
+            try:
+                cls._binary_version = pytesseract.get_tesseract_version()
+            except (pytesseract.TesseractNotFoundError, OSError) as e:
+                logger.warning("pytesseract is installed but the tesseract binary is not usable: %s", str(e))
+                cls._binary_version = None
+            cls._binary_checked = True
+        return cls._binary_version is not None
+
+    def image_to_data(self, image, config=''):
+        ocr_data = pytesseract.image_to_data(
+            image,
+            config=config,
+            output_type=pytesseract.Output.DICT
+        )
+        return {
+            'text': ocr_data['text'],
+            'conf': [float(conf) for conf in ocr_data['conf']],
+            'block_num': ocr_data['block_num'],
+            'par_num': ocr_data['par_num'],
+            'line_num': ocr_data['line_num'],
+        }
+
+
+class _InstancePool:
+    """Bounded pool of reusable objects created lazily by a factory."""
+
+    def __init__(self, factory, size):
+        self._factory = factory
+        self._size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self):
+        try:
+            instance = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                create = self._created < self._size
+                if create:
+                    self._created += 1
+            if create:
+                try:
+                    instance = self._factory()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                # Pool exhausted, wait for an instance to be released
+                instance = self._idle.get()
+
+        try:
+            yield instance
+        finally:
+            self._idle.put(instance)
+
+    def drain(self):
+        """Remove and return all idle instances."""
+        instances = []
+        while True:
+            try:
+                instances.append(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        with self._lock:
+            self._created -= len(instances)
+        return instances
+
+
+class TesserocrEngine(OCREngine):
+    """
+    Backend that keeps warm tesserocr API instances in process.
+
+    Instances are pooled per (lang, oem, psm, variables) combination because
+    those are fixed when Tesseract initialises. Recognition releases the GIL,
+    so one pool per configuration sized to the CPU count lets threads
+    recognise plates in parallel.
+    """
+    name = 'tesserocr'
+
+    def __init__(self, pool_size=None):
+        self.pool_size = pool_size or os.cpu_count() or 1
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def _get_pool(self, parsed):
+        key = (
+            parsed["lang"],
+            parsed["oem"],
+            parsed["psm"],
+            tuple(sorted(parsed["variables"].items())),
+        )
+        pool = self._pools.get(key)
+        if pool is None:
+            with self._lock:
+                pool = self._pools.get(key)
+                if pool is None:
+                    pool = _InstancePool(lambda: self._create_api(parsed), self.pool_size)
+                    self._pools[key] = pool
+        return pool
+
+    def _create_api(self, parsed):
+        kwargs = {"lang": parsed["lang"], "variables": dict(parsed["variables"])}
+        # tesserocr's OEM and PSM constants are plain integers
+        if parsed["oem"] is not None:
+            kwargs["oem"] = parsed["oem"]
+        if parsed["psm"] is not None:
+            kwargs["psm"] = parsed["psm"]
+        return tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _to_pil(self, image):
+        if isinstance(image, np.ndarray):
+            if image.ndim == 3:
+                image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            return Image.fromarray(image)
+        return image
+
+    def image_to_data(self, image, config=''):
+        parsed = parse_tesseract_config(config)
+        ocr_data = {'text': [], 'conf': [], 'block_num': [], 'par_num': [], 'line_num': []}
+
+        with self._get_pool(parsed).acquire() as api:
+            api.SetImage(self._to_pil(image))
+            api.Recognize()
+
+            block_num = par_num = line_num = 0
+            level = tesserocr.RIL.WORD
+            iterator = api.GetIterator()
+            for word in tesserocr.iterate_level(iterator, level):
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block_num += 1
+                    par_num = line_num = 0
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par_num += 1
+                    line_num = 0
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line_num += 1
+
+                ocr_data['text'].append(word.GetUTF8Text(level) or '')
+                ocr_data['conf'].append(float(word.Confidence(level)))
+                ocr_data['block_num'].append(block_num)
+                ocr_data['par_num'].append(par_num)
+                ocr_data['line_num'].append(line_num)
+
+            api.Clear()
+
+        return ocr_data
+
+    def close(self):
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools = {}
+        for pool in pools:
+            for api in pool.drain():
+                api.End()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def create_engine(name=None, pool_size=None):
+    """
+    Create an OCR engine by name.
+
+    Args:
+        name: 'tesserocr', 'pytesseract' or 'auto' (defaults to OCR_ENGINE)
+        pool_size: Warm instances per configuration for pooled engines
+
+    Returns:
+        An OCREngine instance, or None if no backend is installed (for
+        pytesseract, if the tesseract binary cannot be run)
+    """
+    name = (name or os.environ.get('OCR_ENGINE', 'auto')).lower()
+    if pool_size is None and os.environ.get('OCR_ENGINE_POOL_SIZE'):
+        pool_size = int(os.environ['OCR_ENGINE_POOL_SIZE'])
+
+    if name in ('tesserocr', 'auto') and TESSEROCR_AVAILABLE:
+        return TesserocrEngine(pool_size=pool_size)
+    if name in ('pytesseract', 'auto', 'tesserocr') and PYTESSERACT_AVAILABLE and PytesseractEngine.available():
+        if name == 'tesserocr':
+            logger.warning("tesserocr not installed, falling back to pytesseract")
+        return PytesseractEngine()
+    return None
+
+
+def get_engine():
+    """Return the process-wide OCR engine, creating it on first use."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine()
+    return _engine
+
+
+def set_engine(engine):
+    """Replace the process-wide OCR engine, closing the previous one."""
+    global _engine
+    with _engine_lock:
+        previous, _engine = _engine, engine
+    if previous is not None and previous is not engine:
+        previous.close()
+
+
+def engine_available():
+    """Check whether any OCR backend is installed and usable."""
+    return get_engine() is not None
@@ -9,13 +9,13 @@ import time
 import os
 import re
 
-# Import pytesseract for OCR
-try:
-    import pytesseract
-    TESSERACT_AVAILABLE = True
-except ImportError:
-    print("Warning: pytesseract not installed. OCR functionality will be limited.")
-    TESSERACT_AVAILABLE = False
+# Tesseract backend shared with the Django OCR app (pooled when available)
+from ocr_engine import get_engine, engine_available, read_image
+from detection_cache import get_cache, cache_enabled
+
+TESSERACT_AVAILABLE = engine_available()
+if not TESSERACT_AVAILABLE:
+    print("Warning: no Tesseract backend installed. OCR functionality will be limited.")
 
 def post_process_nepali_plate(text):
     """
@@ -298,29 +298,117 @@ def self_detect_plate_type(img):
         # Default to optimized processing for unknown plates
         return True
 
-def ocr_license_plate(image_path, save_debug_images=True):
+# Tesseract configurations tried in order, best-first
+PLATE_OCR_CONFIGS = [
+    '--oem 1 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',  # For single line of text
+    '--oem 1 --psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',  # For single word
+    '--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'   # For sparse text
+]
+
+# Stop trying further configurations once one reaches this average confidence
+EARLY_EXIT_CONFIDENCE = 85.0
+
+def text_and_confidence_from_data(ocr_data):
+    """
+    Rebuild the recognized text and average word confidence from
+    pytesseract.image_to_data output, so a single Tesseract run per
+    configuration gives both.
+    
+    Words on the same line are joined with spaces and lines with newlines,
+    matching what image_to_string would return.
+    """
+    lines = {}
+    confidences = []
+    
+    for i, word in enumerate(ocr_data['text']):
+        word = word.strip()
+        if not word:
+            continue
+        
+        key = (ocr_data['block_num'][i], ocr_data['par_num'][i], ocr_data['line_num'][i])
+        lines.setdefault(key, []).append(word)
+        
+        conf = float(ocr_data['conf'][i])
+        if conf >= 0:
+            confidences.append(conf)
+    
+    text = '\n'.join(' '.join(words) for _, words in sorted(lines.items()))
+    avg_conf = sum(confidences) / len(confidences) if confidences else 0
+    return text, avg_conf
+
+def score_tesseract_configs(preprocessed, configs, early_exit_confidence=EARLY_EXIT_CONFIDENCE):
+    """
+    Run Tesseract once per configuration and return the best scoring result.
+    
+    Args:
+        preprocessed: Preprocessed plate image
+        configs: Tesseract configuration strings, tried in order
+        early_exit_confidence: Stop once a configuration reaches this confidence
+        
+    Returns:
+        Dictionary with 'text', 'confidence' and 'config' of the best result
+    """
+    best = {"text": "", "confidence": 0, "config": configs[0]}
+    
+    for config in configs:
+        try:
+            ocr_data = get_engine().image_to_data(preprocessed, config=config)
+        except Exception as e:
+            print(f"Warning: Error with config {config}: {str(e)}")
+            continue
+        
+        curr_text, curr_conf = text_and_confidence_from_data(ocr_data)
+        
+        # If this config gives better confidence, keep it
+        if curr_conf > best["confidence"] or (not best["text"] and curr_text):
+            best = {"text": curr_text, "confidence": curr_conf, "config": config}
+        
+        if best["confidence"] >= early_exit_confidence:
+            break
+    
+    return best
+
+def ocr_license_plate(image_path, save_debug_images=True, use_cache=False, cache_scope=None):
     """
     Perform OCR on a license plate image using optimized techniques.
     
     Args:
-        image_path: Path to the license plate image
+        image_path: Path to the license plate image, or the image itself as
+            bytes, a file-like object or a decoded numpy array
         save_debug_images: Whether to save intermediate images for debugging
+        use_cache: Reuse the result of a recent near-identical image
+            (matched by perceptual hash) instead of running OCR again
+        cache_scope: Cache partition, usually the camera ID
         
     Returns:
-        Dictionary with OCR results
+        Dictionary with OCR results; 'cache_hit' tells whether it was cached
     """
     start_time = time.time()
-    print(f"Processing license plate: {image_path}")
     
-    # Check if image exists
-    if not os.path.exists(image_path):
-        return {"success": False, "error": "Image file not found"}
+    if isinstance(image_path, (str, os.PathLike)):
+        print(f"Processing license plate: {image_path}")
+        
+        # Check if image exists
+        if not os.path.exists(image_path):
+            return {"success": False, "error": "Image file not found"}
     
-    # Read the image
-    img = cv2.imread(image_path)
+    # Read the image (decoded in memory for buffers and uploads)
+    img = read_image(image_path)
     if img is None:
         return {"success": False, "error": "Failed to read image"}
     
+    # Reuse the result of a near-identical recent frame
+    image_hash = None
+    if use_cache and cache_enabled():
+        image_hash = get_cache().image_hash(img)
+        cached = get_cache().get(image_hash, scope=cache_scope)
+        if cached is not None:
+            result = dict(cached)
+            result["cache_hit"] = True
+            result["preprocessed_image"] = None  # Debug images belong to the original frame
+            result["processing_time_ms"] = (time.time() - start_time) * 1000
+            return result
+    
     # Record original dimensions
     h, w = img.shape[:2]
     
@@ -343,7 +431,8 @@ def ocr_license_plate(image_path, save_debug_images=True):
     result = {
         "success": TESSERACT_AVAILABLE,
         "processing_time_ms": 0,
-        "preprocessed_image": preproc_path
+        "preprocessed_image": preproc_path,
+        "cache_hit": False
     }
     
     # Perform OCR if Tesseract is available
@@ -352,65 +441,15 @@ def ocr_license_plate(image_path, save_debug_images=True):
         return result
     
     try:
-        # Try multiple Tesseract configurations and pick the best result
-        configs = [
-            '--oem 1 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',  # For single line of text
-            '--oem 1 --psm 8 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789',  # For single word
-            '--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789'   # For sparse text
-        ]
-        
-        best_text = ""
-        best_conf = 0
-        best_config = configs[0]
-        
-        # Try each configuration and keep the one with highest confidence
-        for config in configs:
-            curr_text = pytesseract.image_to_string(preprocessed, config=config).strip()
-            
-            try:
-                ocr_data = pytesseract.image_to_data(
-                    preprocessed, 
-                    config=config, 
-                    output_type=pytesseract.Output.DICT
-                )
-                
-                # Calculate average confidence for words
-                confidences = [float(conf) for i, conf in enumerate(ocr_data['conf']) 
-                             if ocr_data['text'][i].strip()]
-                curr_conf = sum(confidences) / len(confidences) if confidences else 0
-                
-                # If this config gives better confidence, keep it
-                if curr_conf > best_conf:
-                    best_conf = curr_conf
-                    best_text = curr_text
-                    best_config = config
-                    
-            except Exception as e:
-                print(f"Warning: Error with config {config}: {str(e)}")
-                continue
-        
-        # Use the best configuration found
-        text = best_text if best_text else pytesseract.image_to_string(preprocessed, config=best_config).strip()
+        # Score each configuration from a single image_to_data pass and
+        # stop as soon as one is confident enough
+        best = score_tesseract_configs(preprocessed, PLATE_OCR_CONFIGS)
+        text = best["text"]
+        avg_confidence = best["confidence"]
         
         # Post-process to match Nepali plate format
         processed_text = post_process_nepali_plate(text)
         
-        # Get confidence
-        try:
-            ocr_data = pytesseract.image_to_data(
-                preprocessed, 
-                config=best_config, 
-                output_type=pytesseract.Output.DICT
-            )
-            
-            # Calculate average confidence for words
-            confidences = [float(conf) for i, conf in enumerate(ocr_data['conf']) 
-                         if ocr_data['text'][i].strip()]
-            avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-        except Exception as e:
-            print(f"Warning: Could not calculate confidence: {str(e)}")
-            avg_confidence = 0
-        
         # Update result
         result["raw_text"] = text
         result["processed_text"] = processed_text
@@ -430,8 +469,37 @@ def ocr_license_plate(image_path, save_debug_images=True):
     result["processing_time_ms"] = (time.time() - start_time) * 1000
     print(f"Processing time: {result['processing_time_ms']:.2f} ms")
     
+    # Cache completed OCR runs, including ones that found no text
+    if image_hash is not None and "error" not in result:
+        get_cache().put(image_hash, dict(result, preprocessed_image=None), scope=cache_scope)
+    
     return result
 
+def ocr_license_plate_regions(image, regions, cache_scope=None):
+    """
+    OCR several regions of one image and keep the most confident read.
+    
+    Args:
+        image: Decoded image (numpy array)
+        regions: Pixel (x, y, width, height) boxes, e.g. from a MotionGate;
+            None or empty OCRs the whole image
+        cache_scope: Perceptual-hash cache partition, usually the camera ID
+        
+    Returns:
+        The ocr_license_plate result of the best region
+    """
+    best = None
+    for region in regions or [None]:
+        if region is not None:
+            x, y, w, h = region
+            crop = image[y:y + h, x:x + w]
+        else:
+            crop = image
+        result = ocr_license_plate(crop, save_debug_images=False, use_cache=True, cache_scope=cache_scope)
+        if best is None or (result.get("success") and result.get("confidence", 0) > best.get("confidence", 0)):
+            best = result
+    return best
+
 def main():
     if len(sys.argv) != 2:
         print("Usage: python optimized_ocr.py <license_plate_image>")
@@ -10,15 +10,93 @@ import os
 import urllib.request
 import threading
 import queue
+import heapq
+from collections import namedtuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
 import json
 import requests
 from enum import Enum
 
 # Local imports for OCR processing
-from optimized_ocr import ocr_license_plate
+from optimized_ocr import ocr_license_plate, ocr_license_plate_regions
+from detection_cache import get_cache
+from frame_ring import FrameRingBuffer
+from motion_gate import MotionGate, MotionResult
 from animated_progress import LicensePlateProgressIndicator
 
+# Default stream timeouts, so an unreachable camera fails fast instead of
+# blocking its capture thread for the backend's default (often 30s or more)
+CONNECT_TIMEOUT = float(os.environ.get("CAMERA_CONNECT_TIMEOUT", 5.0))
+READ_TIMEOUT = float(os.environ.get("CAMERA_READ_TIMEOUT", 5.0))
+
+# Reconnect backoff after failed connection attempts
+RECONNECT_BACKOFF_BASE = 1.0
+RECONNECT_BACKOFF_MAX = 60.0
+
+
+def open_video_capture(source, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+    """
+    Open a cv2.VideoCapture with connect and read timeouts.
+    
+    Args:
+        source: Stream URL, file path or device index
+        connect_timeout: Seconds to wait for the stream to open
+        read_timeout: Seconds to wait for each frame
+        
+    Returns:
+        The cv2.VideoCapture (check isOpened())
+    """
+    if isinstance(source, int):
+        return cv2.VideoCapture(source)
+    
+    params = [
+        cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, int(connect_timeout * 1000),
+        cv2.CAP_PROP_READ_TIMEOUT_MSEC, int(read_timeout * 1000),
+    ]
+    try:
+        return cv2.VideoCapture(source, cv2.CAP_FFMPEG, params)
+    except (TypeError, AttributeError, cv2.error):
+        # OpenCV older than 4.5.2 has no open parameters
+        return cv2.VideoCapture(source)
+
+
+def reconnect_delay(failures, base=RECONNECT_BACKOFF_BASE, maximum=RECONNECT_BACKOFF_MAX):
+    """Exponential backoff delay in seconds after a number of consecutive failures."""
+    if failures <= 0:
+        return 0.0
+    return min(maximum, base * (2 ** (failures - 1)))
+
+
+def purge_saved_frames(root_dir="camera_captures", max_age=7 * 86400):
+    """
+    Delete frames saved by TrafficCamera.save_frame that are older than max_age.
+    
+    Args:
+        root_dir: Directory holding the per-camera capture folders
+        max_age: Age in seconds after which a saved frame is removed
+        
+    Returns:
+        Number of files removed
+    """
+    if not os.path.isdir(root_dir):
+        return 0
+    
+    cutoff = time.time() - max_age
+    removed = 0
+    for dirpath, _, filenames in os.walk(root_dir):
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                pass  # Removed concurrently or not accessible
+    return removed
+
+
 class CameraStatus(Enum):
     """Status of a traffic camera connection."""
     OFFLINE = 0
@@ -30,7 +108,8 @@ class TrafficCamera:
     """Class for handling a single traffic camera."""
     
     def __init__(self, camera_id, name, location, url=None, capture_interval=5, 
-                 auth_token=None, coordinates=None):
+                 auth_token=None, coordinates=None, roi=None, motion_gating=True,
+                 motion_threshold=0.01, buffer_size=0, frame_step=1, max_width=0):
         """
         Initialize a traffic camera object.
         
@@ -42,6 +121,15 @@ class TrafficCamera:
             capture_interval: Interval between image captures in seconds
             auth_token: Authentication token for accessing the camera (if applicable)
             coordinates: Tuple of (latitude, longitude) for the camera location
+            roi: Regions of interest as normalised [x, y, width, height] lists
+                (None for the whole frame)
+            motion_gating: Only pass frames with motion in the ROI on to OCR
+            motion_threshold: Fraction of ROI pixels that must change to count as motion
+            buffer_size: Frames the capture backend buffers (0 keeps the backend default);
+                1 keeps reads current on live streams
+            frame_step: Decode only every Nth frame; the others are grabbed and
+                dropped without decoding to pixels
+            max_width: Downscale decoded frames wider than this (0 keeps full resolution)
         """
         self.camera_id = camera_id
         self.name = name
@@ -50,6 +138,15 @@ class TrafficCamera:
         self.capture_interval = capture_interval
         self.auth_token = auth_token
         self.coordinates = coordinates or (0.0, 0.0)
+        self.roi = roi or []
+        self.motion_gating = motion_gating
+        self.motion_threshold = motion_threshold
+        self.motion_gate = None
+        self.buffer_size = buffer_size
+        self.frame_step = max(1, frame_step)
+        self.max_width = max_width
+        self.connect_timeout = CONNECT_TIMEOUT
+        self.read_timeout = READ_TIMEOUT
         
         # Runtime attributes
         self.status = CameraStatus.OFFLINE
@@ -60,24 +157,39 @@ class TrafficCamera:
         self.is_streaming = False
         self._stream_thread = None
         self._frame_queue = queue.Queue(maxsize=5)  # Limit queue size to avoid memory issues
+        self.connect_failures = 0
+        self.next_retry_at = 0.0
         
         # Storage for captured images
         self.image_dir = os.path.join("camera_captures", f"camera_{self.camera_id}")
         os.makedirs(self.image_dir, exist_ok=True)
     
     def connect(self):
-        """Connect to the camera source."""
+        """
+        Connect to the camera source.
+        
+        Opening and reading use connect_timeout/read_timeout. After a failure
+        further attempts return False immediately until an exponentially
+        growing backoff delay has passed.
+        """
         if self.status == CameraStatus.ONLINE:
             return True
+        
+        if time.monotonic() < self.next_retry_at:
+            return False
             
         self.status = CameraStatus.CONNECTING
         
         try:
+            if self.video_capture is not None:
+                self.video_capture.release()
+                self.video_capture = None
+            
             # Handle different camera source types
             if self.url:
                 if self.url.startswith("rtsp://") or self.url.startswith("http://") or self.url.startswith("https://"):
                     # For network streams
-                    self.video_capture = cv2.VideoCapture(self.url)
+                    self.video_capture = open_video_capture(self.url, self.connect_timeout, self.read_timeout)
                 elif os.path.exists(self.url):
                     # For local video files
                     self.video_capture = cv2.VideoCapture(self.url)
@@ -86,24 +198,65 @@ class TrafficCamera:
                     
                 if not self.video_capture.isOpened():
                     raise ConnectionError(f"Failed to connect to camera at {self.url}")
-                    
-                self.status = CameraStatus.ONLINE
-                return True
             else:
                 # Default to the first available camera if no URL provided
                 self.video_capture = cv2.VideoCapture(0)
                 if not self.video_capture.isOpened():
                     raise ConnectionError("Failed to connect to default camera")
-                    
-                self.status = CameraStatus.ONLINE
-                return True
+            
+            self._apply_decode_options()
+            self.status = CameraStatus.ONLINE
+            self.error_message = None
+            self.connect_failures = 0
+            self.next_retry_at = 0.0
+            return True
                 
         except Exception as e:
             self.status = CameraStatus.ERROR
             self.error_message = str(e)
-            print(f"Error connecting to camera {self.camera_id}: {str(e)}")
+            self.connect_failures += 1
+            delay = reconnect_delay(self.connect_failures)
+            self.next_retry_at = time.monotonic() + delay
+            print(f"Error connecting to camera {self.camera_id}: {str(e)} (retrying in {delay:.0f}s)")
             return False
     
+    def _apply_decode_options(self):
+        """Configure buffering and capture resolution on the opened video capture."""
+        if self.buffer_size:
+            self.video_capture.set(cv2.CAP_PROP_BUFFERSIZE, self.buffer_size)
+        if self.max_width and not self.url:
+            # Local devices can deliver a smaller resolution directly
+            self.video_capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.max_width)
+    
+    def _downscale(self, frame):
+        """Shrink a frame to max_width, keeping its aspect ratio."""
+        h, w = frame.shape[:2]
+        if not self.max_width or w <= self.max_width:
+            return frame
+        scale = self.max_width / float(w)
+        return cv2.resize(frame, (self.max_width, max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+    
+    def read_frame(self):
+        """
+        Read the next analysed frame using this camera's decode mode.
+        
+        Skipped frames are only grabbed, which demuxes the packet and keeps
+        the decoder in sync but never converts the picture to BGR pixels.
+        
+        Returns:
+            (ok, frame) like cv2.VideoCapture.read()
+        """
+        if self.frame_step == 1 and not self.max_width:
+            return self.video_capture.read()
+        
+        for _ in range(self.frame_step - 1):
+            if not self.video_capture.grab():
+                return False, None
+        ok, frame = self.video_capture.read()
+        if not ok or frame is None:
+            return False, None
+        return True, self._downscale(frame)
+    
     def disconnect(self):
         """Disconnect from the camera source."""
         self.stop_streaming()
@@ -126,14 +279,15 @@ class TrafficCamera:
                 return None
         
         try:
-            ret, frame = self.video_capture.read()
+            ret, frame = self.read_frame()
             if not ret:
                 self.status = CameraStatus.ERROR
                 self.error_message = "Failed to read frame from camera"
                 return None
                 
+            # read() returns a freshly allocated frame, so no defensive copy
             self.last_capture_time = datetime.now()
-            self.last_image = frame.copy()
+            self.last_image = frame
             return frame
             
         except Exception as e:
@@ -151,7 +305,7 @@ class TrafficCamera:
                     continue
             
             try:
-                ret, frame = self.video_capture.read()
+                ret, frame = self.read_frame()
                 if not ret:
                     self.status = CameraStatus.ERROR
                     self.error_message = "Failed to read frame from camera"
@@ -160,19 +314,9 @@ class TrafficCamera:
                     
                 # Update last_image and timestamp
                 self.last_capture_time = datetime.now()
-                self.last_image = frame.copy()
-                
-                # Add to queue, replacing oldest frame if full
-                if self._frame_queue.full():
-                    try:
-                        self._frame_queue.get_nowait()  # Discard oldest frame
-                    except queue.Empty:
-                        pass  # Queue was emptied by another thread
+                self.last_image = frame
                 
-                try:
-                    self._frame_queue.put_nowait(frame)
-                except queue.Full:
-                    pass  # Queue is full again after all
+                self.push_frame(frame)
                 
                 # Short sleep to control frame rate
                 time.sleep(0.1)
@@ -183,6 +327,93 @@ class TrafficCamera:
                 print(f"Error in streaming from camera {self.camera_id}: {str(e)}")
                 time.sleep(1)  # Wait before retry
     
+    def capture_into(self, ring, camera_index=0):
+        """
+        Capture a frame straight into a shared-memory FrameRingBuffer.
+        
+        Args:
+            ring: frame_ring.FrameRingBuffer owned by this process
+            camera_index: Index readers use to map the frame back to this camera
+            
+        Returns:
+            FrameToken for OCR workers, or None if capture failed
+        """
+        if self.status != CameraStatus.ONLINE:
+            if not self.connect():
+                return None
+        
+        if self.video_capture is None:
+            # Synthetic or patched cameras only provide capture_frame()
+            frame = self.capture_frame()
+            return ring.write(frame, camera_index) if frame is not None else None
+        
+        if self.max_width:
+            # Downscaled frames are smaller than a slot, so decode then copy
+            frame = self.capture_frame()
+            return ring.write(frame, camera_index) if frame is not None else None
+        
+        try:
+            token = ring.read_from(self.video_capture, camera_index, skip=self.frame_step - 1)
+            if token is None:
+                self.status = CameraStatus.ERROR
+                self.error_message = "Failed to read frame from camera"
+                return None
+            self.last_capture_time = datetime.now()
+            return token
+        except Exception as e:
+            self.status = CameraStatus.ERROR
+            self.error_message = str(e)
+            print(f"Error capturing frame from camera {self.camera_id}: {str(e)}")
+            return None
+    
+    def detect_motion(self, frame):
+        """
+        Check a frame for motion inside this camera's regions of interest.
+        
+        Args:
+            frame: Captured frame
+            
+        Returns:
+            MotionResult; has_motion is always True when gating is disabled
+        """
+        if not self.motion_gating:
+            h, w = frame.shape[:2]
+            return MotionResult(True, 1.0, [(0, 0, w, h)])
+        
+        if self.motion_gate is None:
+            self.motion_gate = MotionGate(rois=self.roi, threshold=self.motion_threshold)
+        return self.motion_gate.check(frame)
+    
+    def push_frame(self, frame):
+        """Add a frame to the streaming queue, replacing the oldest frame if full."""
+        if self._frame_queue.full():
+            try:
+                self._frame_queue.get_nowait()  # Discard oldest frame
+            except queue.Empty:
+                pass  # Queue was emptied by another thread
+        
+        try:
+            self._frame_queue.put_nowait(frame)
+        except queue.Full:
+            pass  # Queue is full again after all
+    
+    def skip_frame(self):
+        """
+        Advance the stream by one frame without decoding it.
+        
+        Used when downstream processing is behind, so the next frame that is
+        read is current instead of one buffered while OCR caught up.
+        
+        Returns:
+            True if a frame was skipped
+        """
+        if self.status != CameraStatus.ONLINE or self.video_capture is None:
+            return False
+        try:
+            return bool(self.video_capture.grab())
+        except Exception:
+            return False
+    
     def start_streaming(self):
         """Start streaming from the camera in a background thread."""
         if self.is_streaming:
@@ -281,6 +512,11 @@ class TrafficCamera:
             "url": self.url,
             "capture_interval": self.capture_interval,
             "coordinates": self.coordinates,
+            "roi": self.roi,
+            "motion_gating": self.motion_gating,
+            "buffer_size": self.buffer_size,
+            "frame_step": self.frame_step,
+            "max_width": self.max_width,
             "status": self.status.name,
             "last_capture_time": str(self.last_capture_time) if self.last_capture_time else None,
             "is_streaming": self.is_streaming,
@@ -295,6 +531,239 @@ class TrafficCamera:
             
         return f"Camera {self.camera_id}: {self.name} at {self.location} - {status_str}"
 
+# regions: pixel (x, y, width, height) boxes with motion, None for the whole frame
+CapturedFrame = namedtuple('CapturedFrame', ['camera_id', 'sequence', 'captured_at', 'frame', 'regions'],
+                           defaults=(None,))
+
+
+class FrameScheduler:
+    """
+    Multiplexes many cameras onto a bounded pool of capture threads.
+    
+    Instead of one polling thread per camera, a single scheduler thread keeps
+    a heap of when each camera is next due (its capture_interval) and hands
+    due cameras to a fixed-size thread pool. Missed ticks are not replayed,
+    so a slow camera never produces a burst of stale frames.
+    
+    Captured frames go to a bounded queue read with get_frame(). When that
+    queue is full, i.e. OCR has fallen behind, cameras only skip a frame
+    instead of decoding one (backpressure). Frames older than max_frame_age
+    when they are read are dropped.
+    
+    With a shared-memory ring, frames are decoded straight into it and the
+    queued CapturedFrame carries a FrameToken instead of the pixel data.
+    """
+    
+    def __init__(self, cameras, max_workers=8, queue_depth=64, max_frame_age=None,
+                 min_interval=0.05, retry_delay=1.0, sink=None, ring=None):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            cameras: Iterable of TrafficCamera objects
+            max_workers: Capture threads shared by all cameras
+            queue_depth: Frames buffered for consumers before backpressure applies
+            max_frame_age: Seconds after which an unread frame is dropped (None keeps all)
+            min_interval: Lower bound on a camera's capture interval in seconds
+            retry_delay: Seconds to wait before retrying a camera whose capture failed
+            sink: Optional callable taking a CapturedFrame, used instead of the
+                shared queue (frames are then never held back)
+            ring: Optional frame_ring.FrameRingBuffer to capture into
+        """
+        self.cameras = {camera.camera_id: camera for camera in cameras}
+        self.camera_ids = list(self.cameras)  # Ring camera_index -> camera_id
+        self._camera_indexes = {camera_id: i for i, camera_id in enumerate(self.camera_ids)}
+        self.ring = ring
+        self.max_workers = max(1, max_workers)
+        self.frames = queue.Queue(maxsize=max(1, queue_depth))
+        self.max_frame_age = max_frame_age
+        self.min_interval = min_interval
+        self.retry_delay = retry_delay
+        self.sink = sink
+        
+        self._heap = []
+        self._sequences = {}
+        self._in_flight = set()
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._executor = None
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "captured": 0,
+            "failed": 0,
+            "skipped_backpressure": 0,
+            "dropped_stale": 0,
+            "no_motion": 0,
+        }
+    
+    @property
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+    
+    def add_camera(self, camera):
+        """Add a camera and schedule its first capture immediately."""
+        with self._cond:
+            self.cameras[camera.camera_id] = camera
+            if camera.camera_id not in self._camera_indexes:
+                self._camera_indexes[camera.camera_id] = len(self.camera_ids)
+                self.camera_ids.append(camera.camera_id)
+            heapq.heappush(self._heap, (time.monotonic(), camera.camera_id))
+            self._cond.notify()
+    
+    def remove_camera(self, camera_id):
+        """Stop scheduling a camera; a capture already running still completes."""
+        with self._cond:
+            self.cameras.pop(camera_id, None)
+    
+    def start(self):
+        """Start the scheduler thread and the capture pool."""
+        if self.is_running:
+            return
+        
+        self._stop_event.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="camera-capture")
+        now = time.monotonic()
+        with self._cond:
+            self._heap = [(now, camera_id) for camera_id in self.cameras]
+            heapq.heapify(self._heap)
+        
+        self._thread = threading.Thread(target=self._run, name="camera-scheduler", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout=5.0):
+        """Stop scheduling captures and wait for running ones to finish."""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def get_frame(self, timeout=None):
+        """
+        Get the next captured frame, skipping frames that went stale in the queue.
+        
+        Args:
+            timeout: Seconds to wait for a frame (None waits forever)
+            
+        Returns:
+            A CapturedFrame, or None if none arrived in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                item = self.frames.get(timeout=remaining)
+            except queue.Empty:
+                return None
+            
+            if self.max_frame_age is not None and time.monotonic() - item.captured_at > self.max_frame_age:
+                self._count("dropped_stale")
+                continue
+            return item
+    
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+    
+    def queue_depth(self):
+        """Number of frames waiting for consumers."""
+        return self.frames.qsize()
+    
+    def _interval(self, camera):
+        return max(float(camera.capture_interval or 0), self.min_interval)
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            due = []
+            with self._cond:
+                if not self._heap:
+                    self._cond.wait(timeout=1.0)
+                    continue
+                
+                next_time = self._heap[0][0]
+                wait = next_time - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(timeout=wait)
+                    continue
+                
+                now = time.monotonic()
+                while self._heap and self._heap[0][0] <= now:
+                    scheduled, camera_id = heapq.heappop(self._heap)
+                    camera = self.cameras.get(camera_id)
+                    if camera is None:
+                        continue  # Removed
+                    if camera_id in self._in_flight:
+                        # Previous capture still running; try again next interval
+                        heapq.heappush(self._heap, (now + self._interval(camera), camera_id))
+                        continue
+                    self._in_flight.add(camera_id)
+                    due.append((scheduled, camera))
+            
+            for scheduled, camera in due:
+                try:
+                    self._executor.submit(self._capture, camera, scheduled)
+                except RuntimeError:
+                    return  # Executor shut down
+    
+    def _capture(self, camera, scheduled):
+        next_delay = self._interval(camera)
+        try:
+            if self.sink is None and self.frames.full():
+                # OCR is behind: keep the stream current without decoding
+                camera.skip_frame()
+                self._count("skipped_backpressure")
+                return
+            
+            if self.ring is not None:
+                frame = camera.capture_into(self.ring, self._camera_indexes[camera.camera_id])
+            else:
+                frame = camera.capture_frame()
+            if frame is None:
+                self._count("failed")
+                next_delay = max(next_delay, self.retry_delay)
+                return
+            
+            # Cheap motion/ROI check so empty-road frames never reach OCR
+            regions = None
+            if camera.motion_gating:
+                pixels = self.ring.view(frame) if self.ring is not None else frame
+                motion = camera.detect_motion(pixels) if pixels is not None else None
+                if motion is None or not motion.has_motion:
+                    self._count("no_motion")
+                    return
+                regions = motion.regions
+            
+            sequence = self._sequences.get(camera.camera_id, 0) + 1
+            self._sequences[camera.camera_id] = sequence
+            item = CapturedFrame(camera.camera_id, sequence, time.monotonic(), frame, regions)
+            self._count("captured")
+            
+            if self.sink is not None:
+                self.sink(item)
+            else:
+                try:
+                    self.frames.put_nowait(item)
+                except queue.Full:
+                    self._count("skipped_backpressure")
+        except Exception as e:
+            self._count("failed")
+            next_delay = max(next_delay, self.retry_delay)
+            print(f"Error in scheduled capture from camera {camera.camera_id}: {str(e)}")
+        finally:
+            with self._cond:
+                self._in_flight.discard(camera.camera_id)
+                if camera.camera_id in self.cameras and not self._stop_event.is_set():
+                    # Schedule from the later of the planned tick and now, so
+                    # missed ticks are dropped rather than replayed
+                    next_time = max(scheduled + next_delay, time.monotonic())
+                    heapq.heappush(self._heap, (next_time, camera.camera_id))
+                    self._cond.notify()
+
 class TrafficCameraManager:
     """Class for managing multiple traffic cameras."""
     
@@ -307,6 +776,7 @@ class TrafficCameraManager:
         """
         self.cameras = {}
         self.config_file = config_file
+        self.scheduler = None
         
         if config_file and os.path.exists(config_file):
             self.load_config(config_file)
@@ -403,6 +873,12 @@ class TrafficCameraManager:
                 "url": camera.url,
                 "capture_interval": camera.capture_interval,
                 "coordinates": camera.coordinates,
+                "roi": camera.roi,
+                "motion_gating": camera.motion_gating,
+                "motion_threshold": camera.motion_threshold,
+                "buffer_size": camera.buffer_size,
+                "frame_step": camera.frame_step,
+                "max_width": camera.max_width,
             }
             
         try:
@@ -445,7 +921,13 @@ class TrafficCameraManager:
                     location=config["location"],
                     url=config.get("url"),
                     capture_interval=config.get("capture_interval", 5),
-                    coordinates=config.get("coordinates", (0.0, 0.0))
+                    coordinates=config.get("coordinates", (0.0, 0.0)),
+                    roi=config.get("roi"),
+                    motion_gating=config.get("motion_gating", True),
+                    motion_threshold=config.get("motion_threshold", 0.01),
+                    buffer_size=config.get("buffer_size", 0),
+                    frame_step=config.get("frame_step", 1),
+                    max_width=config.get("max_width", 0)
                 )
                 self.add_camera(camera)
                 
@@ -455,33 +937,289 @@ class TrafficCameraManager:
             print(f"Error loading camera configuration: {str(e)}")
             return 0
     
-    def capture_from_all(self, save_frames=False):
+    def capture_from_all(self, save_frames=False, max_workers=8):
         """
-        Capture frames from all cameras.
+        Capture frames from all cameras concurrently.
         
         Args:
             save_frames: Whether to save the captured frames to disk
+            max_workers: Maximum number of cameras read at the same time
             
         Returns:
             Dictionary mapping camera_id to the captured frame (or None if capture failed)
         """
-        results = {}
-        for camera_id, camera in self.cameras.items():
+        def capture(camera):
             frame = camera.capture_frame()
             if frame is not None and save_frames:
                 camera.save_frame(frame)
-            results[camera_id] = frame
-        return results
+            return frame
+        
+        cameras = list(self.cameras.values())
+        if not cameras:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(cameras))) as executor:
+            frames = executor.map(capture, cameras)
+            return {camera.camera_id: frame for camera, frame in zip(cameras, frames)}
+    
+    def create_scheduler(self, **kwargs):
+        """
+        Create a FrameScheduler for all managed cameras.
+        
+        Args:
+            **kwargs: FrameScheduler options (max_workers, queue_depth, max_frame_age, ...)
+            
+        Returns:
+            The FrameScheduler, not yet started
+        """
+        return FrameScheduler(self.list_cameras(), **kwargs)
     
-    def start_streaming_all(self):
-        """Start streaming from all cameras."""
+    def start_streaming_all(self, max_workers=8):
+        """
+        Start streaming from all cameras through one shared scheduler.
+        
+        Frames land in each camera's own queue, so get_latest_frame() works
+        as with per-camera streaming, but all cameras share max_workers
+        capture threads.
+        """
+        if self.scheduler is not None and self.scheduler.is_running:
+            return
+        
+        # Replace any per-camera streaming threads with the shared scheduler
+        for camera in self.cameras.values():
+            camera.stop_streaming()
+        
+        self.scheduler = self.create_scheduler(max_workers=max_workers, sink=self._deliver_frame)
         for camera in self.cameras.values():
-            camera.start_streaming()
+            camera.is_streaming = True
+        self.scheduler.start()
     
     def stop_streaming_all(self):
         """Stop streaming from all cameras."""
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            self.scheduler = None
+            for camera in self.cameras.values():
+                if camera._stream_thread is None:
+                    camera.is_streaming = False
         for camera in self.cameras.values():
             camera.stop_streaming()
+    
+    def _deliver_frame(self, item):
+        """Scheduler sink that hands a frame to its camera's streaming queue."""
+        camera = self.cameras.get(item.camera_id)
+        if camera is not None:
+            camera.push_frame(item.frame)
+
+# Shared-memory ring attached once per OCR worker process
+_worker_ring = None
+
+
+def _init_ocr_worker(ring_spec):
+    """ProcessPoolExecutor initializer: attach to the capture ring."""
+    global _worker_ring
+    _worker_ring = FrameRingBuffer.attach(**ring_spec)
+
+
+def _ocr_frame_task(camera_id, token, jpeg_quality, regions=None):
+    """
+    Run plate OCR on one ring frame inside a worker process.
+    
+    Args:
+        camera_id: Camera the frame came from
+        token: FrameToken of the frame in the shared ring
+        jpeg_quality: JPEG quality of the returned image (0 skips encoding)
+        regions: Motion regions to OCR instead of the whole frame
+    
+    Returns:
+        Result dictionary, with 'dropped' set if the frame was overwritten
+        before or during OCR
+    """
+    frame = _worker_ring.view(token)
+    if frame is None:
+        return {"camera_id": camera_id, "dropped": True}
+    
+    result = ocr_license_plate_regions(frame, regions, camera_id)
+    image = None
+    if jpeg_quality:
+        ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+        image = encoded.tobytes() if ok else None
+    
+    if not _worker_ring.is_current(token):
+        return {"camera_id": camera_id, "dropped": True}
+    
+    return {
+        "camera_id": camera_id,
+        "dropped": False,
+        "captured_at": token.captured_at,
+        "success": result.get("success", False),
+        "plate_text": result.get("processed_text", "") if result.get("success") else "",
+        "confidence": result.get("confidence", 0.0),
+        "processing_time_ms": result.get("processing_time_ms", 0.0),
+        "cache_hit": result.get("cache_hit", False),
+        "image": image,
+    }
+
+
+class CameraFeedProcessor:
+    """
+    Processes many camera feeds at full rate on a pool of OCR worker processes.
+    
+    A FrameScheduler captures frames from every camera into a shared-memory
+    ring. Frame tokens fan out to a ProcessPoolExecutor, so plate OCR runs
+    on all cores without the GIL or frame pickling. Results are released
+    in capture order per camera and handed to result_handler in batches,
+    e.g. to bulk-create CameraCapture rows.
+    
+    Backpressure: at most max_in_flight frames are being processed; beyond
+    that frames stay in the scheduler queue (queue_depth), and once that is
+    full the scheduler stops decoding new frames.
+    """
+    
+    def __init__(self, cameras, workers=None, queue_depth=64, max_in_flight=None,
+                 capture_threads=8, frame_shape=(720, 1280, 3), max_frame_age=2.0,
+                 result_handler=None, batch_size=50, flush_interval=1.0, jpeg_quality=85):
+        """
+        Initialize the processor.
+        
+        Args:
+            cameras: Iterable of TrafficCamera objects
+            workers: OCR worker processes (default: CPU count)
+            queue_depth: Captured frames buffered ahead of the workers
+            max_in_flight: Frames submitted to workers at once (default: 2 per worker)
+            capture_threads: Threads shared by all cameras for capture
+            frame_shape: Largest (height, width, channels) kept in the ring
+            max_frame_age: Seconds after which a queued frame is skipped
+            result_handler: Callable receiving lists of result dictionaries
+            batch_size: Results per result_handler call
+            flush_interval: Seconds after which a partial batch is flushed
+            jpeg_quality: JPEG quality of the returned image bytes (0 skips encoding)
+        """
+        self.cameras = list(cameras)
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_depth = queue_depth
+        self.max_in_flight = max_in_flight or 2 * self.workers
+        self.capture_threads = capture_threads
+        self.frame_shape = frame_shape
+        self.max_frame_age = max_frame_age
+        self.result_handler = result_handler
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.jpeg_quality = jpeg_quality
+        
+        self.results = []
+        self.stats = {"submitted": 0, "completed": 0, "dropped": 0, "failed": 0, "plates_detected": 0}
+        self._pending = {}  # camera_id -> deque of futures in capture order
+        self._batch = []
+        self._last_flush = time.monotonic()
+    
+    def run(self, duration=None, stop_event=None):
+        """
+        Process all feeds until duration elapses or stop_event is set.
+        
+        Returns:
+            Dictionary with processing statistics
+        """
+        # Every queued or in-flight frame needs its own slot, plus headroom
+        # for the capture threads writing new frames
+        slots = self.queue_depth + self.max_in_flight + self.capture_threads
+        ring = FrameRingBuffer.create(slots=slots, frame_shape=self.frame_shape)
+        scheduler = FrameScheduler(
+            self.cameras,
+            max_workers=self.capture_threads,
+            queue_depth=self.queue_depth,
+            max_frame_age=self.max_frame_age,
+            ring=ring,
+        )
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_ocr_worker,
+            initargs=(ring.spec(),),
+        )
+        
+        start_time = time.monotonic()
+        end_time = start_time + duration if duration else None
+        in_flight = 0
+        
+        try:
+            scheduler.start()
+            while not (stop_event is not None and stop_event.is_set()):
+                if end_time is not None and time.monotonic() >= end_time:
+                    break
+                
+                # Only pull frames while the workers have capacity
+                if in_flight < self.max_in_flight:
+                    item = scheduler.get_frame(timeout=0.05)
+                    if item is not None:
+                        future = executor.submit(
+                            _ocr_frame_task, item.camera_id, item.frame, self.jpeg_quality, item.regions
+                        )
+                        self._pending.setdefault(item.camera_id, deque()).append(future)
+                        self.stats["submitted"] += 1
+                        in_flight += 1
+                else:
+                    time.sleep(0.005)
+                
+                in_flight -= self._collect()
+                self._maybe_flush()
+        finally:
+            scheduler.stop()
+            # Finish frames already handed to the workers
+            for futures in self._pending.values():
+                for future in futures:
+                    future.exception()
+            self._collect()
+            self._flush()
+            executor.shutdown(wait=True)
+            ring.unlink()
+        
+        elapsed = time.monotonic() - start_time
+        return dict(
+            self.stats,
+            capture=dict(scheduler.stats),
+            elapsed_seconds=elapsed,
+            frames_per_second=self.stats["completed"] / elapsed if elapsed else 0.0,
+        )
+    
+    def _collect(self):
+        """Move finished results to the batch in capture order per camera; returns how many."""
+        collected = 0
+        for futures in self._pending.values():
+            while futures and futures[0].done():
+                future = futures.popleft()
+                collected += 1
+                try:
+                    result = future.result()
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    print(f"OCR worker error: {str(e)}")
+                    continue
+                
+                if result["dropped"]:
+                    self.stats["dropped"] += 1
+                    continue
+                self.stats["completed"] += 1
+                if result["success"] and result["plate_text"]:
+                    self.stats["plates_detected"] += 1
+                self._batch.append(result)
+        return collected
+    
+    def _maybe_flush(self):
+        if len(self._batch) >= self.batch_size or (
+                self._batch and time.monotonic() - self._last_flush >= self.flush_interval):
+            self._flush()
+    
+    def _flush(self):
+        batch, self._batch = self._batch, []
+        self._last_flush = time.monotonic()
+        if not batch:
+            return
+        if self.result_handler is not None:
+            try:
+                self.result_handler(batch)
+            except Exception as e:
+                print(f"Error handling {len(batch)} camera results: {str(e)}")
+        else:
+            self.results.extend(batch)
 
 def create_sample_cameras():
     """Create sample camera objects for testing."""
@@ -601,7 +1339,7 @@ def create_sample_cameras():
                 except Exception as e:
                     print(f"Error loading test plate: {str(e)}")
             
-            self.last_image = frame.copy()
+            self.last_image = frame
             self.last_capture_time = datetime.now()
             self.status = CameraStatus.ONLINE
             return frame
@@ -679,34 +1417,41 @@ def process_camera_feed(camera_id=None, manager=None, duration=30):
             
         frame_count += 1
         
-        # Save frame for demonstration
-        frame_path = camera.save_frame(frame, filename=f"frame_{frame_count:04d}.jpg")
-        
         # Update progress (step 1: Frame capture)
         progress.next_step(save=True)
         
+        # Skip OCR entirely when nothing moved in the camera's regions of interest
+        motion = camera.detect_motion(frame)
+        if not motion.has_motion:
+            progress.current_step = 0
+            time.sleep(0.2)
+            continue
+        
         # Try to detect and recognize license plates
         try:
             # Preprocess the frame to find potential license plates (step 2)
             progress.next_step(save=True)
             
             # For demonstration purposes, we'll use our plate detector on the whole frame
-            # In a real implementation, we'd use a dedicated plate detector model first
-            plate_path = os.path.join(results_dir, f"plate_candidate_{frame_count:04d}.jpg")
-            cv2.imwrite(plate_path, frame)
-            
+            # In a real implementation, we'd use a dedicated plate detector model first.
+            # OCR reads the frame in memory; the frame is only written to
+            # disk once a plate is found in it
             # Simulate plate detection (step 3)
             progress.next_step(save=True)
             
             # Perform OCR on the detected plate (step 4)
             progress.next_step(save=True)
-            ocr_result = ocr_license_plate(plate_path)
+            # OCR only the regions that moved; near-identical consecutive
+            # frames reuse the cached result
+            ocr_result = ocr_license_plate_regions(frame, motion.regions, camera.camera_id)
             
             # Process the OCR result (step 5)
             progress.next_step(save=True)
             
             if ocr_result["success"]:
                 detected_count += 1
+                frame_path = camera.save_frame(frame, filename=f"frame_{frame_count:04d}.jpg")
+                plate_path = frame_path
                 result = {
                     "frame_number": frame_count,
                     "frame_path": frame_path,
@@ -762,6 +1507,9 @@ def process_camera_feed(camera_id=None, manager=None, duration=30):
     print(f"- Plates detected: {detected_count}")
     print(f"- Results saved to: {results_path}")
     print(f"- Animation saved to: {animation_path}")
+    cache_stats = get_cache().stats()
+    print(f"- OCR cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+          f"({cache_stats['hit_rate']:.0%} hit rate)")
     
     return {
         "success": True,
@@ -770,6 +1518,37 @@ def process_camera_feed(camera_id=None, manager=None, duration=30):
         "results_path": results_path,
         "animation_path": animation_path
     }
+
+def process_camera_feeds(manager=None, duration=30, workers=None, queue_depth=64, result_handler=None):
+    """
+    Process all camera feeds at full rate on a multiprocess OCR worker farm.
+    
+    Args:
+        manager: TrafficCameraManager instance, or None to create sample cameras
+        duration: Duration to process in seconds
+        workers: Number of OCR worker processes (default: CPU count)
+        queue_depth: Frames buffered between capture and OCR
+        result_handler: Callable receiving batches of per-frame results
+        
+    Returns:
+        Dictionary with processing statistics
+    """
+    if manager is None:
+        manager = create_sample_cameras()
+    
+    manager.connect_all()
+    if not manager.cameras:
+        return {"success": False, "error": "No cameras available"}
+    
+    processor = CameraFeedProcessor(
+        manager.list_cameras(),
+        workers=workers,
+        queue_depth=queue_depth,
+        result_handler=result_handler,
+    )
+    stats = processor.run(duration=duration)
+    stats["success"] = True
+    return stats
     
 def main():
     """Main function to demonstrate traffic camera integration."""